@@ -0,0 +1,251 @@
+"""
+Micro-benchmarks dos dados: análise da notação, rolagem e montagem do embed
+
+Uso (na raiz do projeto):
+    python -m benchmarks.bench_dice
+    python -m benchmarks.bench_dice --save benchmarks/resultados.json
+    python -m benchmarks.bench_dice --compare benchmarks/baseline.json
+
+Cada caso roda sobre um corpus fixo de notações e mede cada chamada
+isoladamente com perf_counter_ns, reportando a média (ns/op), a mediana e o
+p99. Uma segunda passada, com o tracemalloc ativo, mede a memória alocada
+por chamada (pico, em bytes) e a quantidade de blocos que sobrevivem a ela.
+Com --compare, casos cujo ns/op ou p99 pioraram além da tolerância são
+listados e o processo termina com código 1, para uso em CI.
+
+A benchmarks/baseline.json versionada foi gerada com --save e registra o
+interpretador e se o numpy estava disponível; comparações feitas com outro
+interpretador ou sem o mesmo backend de rolagem geram um aviso.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from utils import dice
+
+# Notações realistas, da mais comum à mais pesada
+CORPUS = [
+    "1d20",
+    "1d20+5",
+    "2d6+3",
+    "4d6kh3",
+    "2d20kl1+4",
+    "1d20+1d6-1d4",
+    "2d20+5,1d6",
+    "8d6",
+    "10d10+10",
+    "20d20",
+    "3d6!+2",
+    "100d1000+2d6-3",
+]
+
+# Níveis de atributo usados no caso do calcular_dado
+NIVEIS = [1, 5, 9, 10, 15, 25, 50]
+
+def _cronometrar(funcao: Callable[[], Any], duracao: float, max_chamadas: int) -> List[int]:
+    """Tempo de cada chamada (ns) até atingir a duração ou o máximo de chamadas"""
+    relogio = time.perf_counter_ns
+    amostras = []
+    limite = relogio() + int(duracao * 1e9)
+    while len(amostras) < max_chamadas:
+        inicio = relogio()
+        funcao()
+        fim = relogio()
+        amostras.append(fim - inicio)
+        if fim >= limite:
+            break
+    return amostras
+
+def _medir_alocacoes(funcao: Callable[[], Any], chamadas: int) -> Tuple[int, float]:
+    """Pico de memória alocada por chamada (bytes) e blocos que sobrevivem a ela"""
+    tracemalloc.start()
+    try:
+        # Só o maior pico é guardado, para não contar as próprias amostras
+        # entre os blocos retidos
+        maior_pico = 0
+        antes = tracemalloc.take_snapshot()
+        for _ in range(chamadas):
+            atual, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            funcao()
+            _, pico = tracemalloc.get_traced_memory()
+            maior_pico = max(maior_pico, pico - atual)
+        depois = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    blocos = sum(stat.count_diff for stat in depois.compare_to(antes, "filename") if stat.count_diff > 0)
+    return maior_pico, blocos / chamadas
+
+def _percentil(ordenadas: List[int], fracao: float) -> int:
+    return ordenadas[min(len(ordenadas) - 1, int(fracao * len(ordenadas)))]
+
+def medir(funcao: Callable[[], Any], duracao: float, max_chamadas: int, chamadas_memoria: int) -> Dict[str, Any]:
+    """Executa um caso e devolve as métricas"""
+    # Aquecimento: preenche caches e estabiliza o interpretador
+    for _ in range(20):
+        funcao()
+
+    gc_ativo = gc.isenabled()
+    gc.disable()
+    try:
+        amostras = _cronometrar(funcao, duracao, max_chamadas)
+    finally:
+        if gc_ativo:
+            gc.enable()
+
+    ordenadas = sorted(amostras)
+    pico, blocos = _medir_alocacoes(funcao, chamadas_memoria)
+    return {
+        "chamadas": len(amostras),
+        "ns_op": round(statistics.fmean(amostras)),
+        "mediana_ns": _percentil(ordenadas, 0.5),
+        "p99_ns": _percentil(ordenadas, 0.99),
+        "pico_bytes": pico,
+        "blocos_retidos": round(blocos, 2),
+    }
+
+def _casos_parse() -> List[Tuple[str, Callable[[], Any]]]:
+    casos = []
+    for notacao in CORPUS:
+        try:
+            dice.parse_dice_notation(notacao)
+        except ValueError:
+            # Aceita apenas um grupo de dados; os demais casos usam o parser múltiplo
+            continue
+        casos.append((f"parse_dice_notation[{notacao}]", lambda n=notacao: dice.parse_dice_notation(n)))
+    return casos
+
+def _casos() -> List[Tuple[str, Callable[[], Any]]]:
+    casos = _casos_parse()
+    casos += [
+        (f"parse_multiple_dice_notation[{n}]", lambda n=n: dice.parse_multiple_dice_notation(n))
+        for n in CORPUS
+    ]
+    # Compilação sem o cache do parser, para medir o custo real da análise
+    casos += [
+        (f"compilar_sem_cache[{n}]", lambda n=n: dice._compilar.__wrapped__(dice.normalizar_notacao(n)))
+        for n in CORPUS
+    ]
+    casos += [(f"rolar_dados[{n}]", lambda n=n: dice.rolar_dados(n)) for n in CORPUS]
+    casos += [(f"calcular_dado[{nivel}]", lambda nivel=nivel: dice.calcular_dado(nivel)) for nivel in NIVEIS]
+    casos += _casos_embed()
+    return casos
+
+def _casos_embed() -> List[Tuple[str, Callable[[], Any]]]:
+    """Montagem do embed do /rolar, a partir de rolagens já feitas"""
+    try:
+        from cogs.fun_commands import FunCommands
+    except ImportError as e:
+        print(f"Casos de embed ignorados (discord.py indisponível: {e})")
+        return []
+
+    class _Autor:
+        display_name = "Benchmark"
+
+        class display_avatar:
+            url = "https://cdn.discordapp.com/embed/avatars/0.png"
+
+    cog = FunCommands.__new__(FunCommands)
+    autor = _Autor()
+    casos = []
+    for notacao in CORPUS:
+        resultado = dice.rolar_dados(notacao)
+        casos.append((
+            f"embed_rolar[{notacao}]",
+            lambda r=resultado: cog._create_roll_embed(r, autor, "benchmark")
+        ))
+    return casos
+
+def comparar(atual: Dict[str, Any], baseline: Dict[str, Any], tolerancia: float) -> List[str]:
+    """Casos que pioraram além da tolerância em relação à baseline"""
+    regressoes = []
+    for nome, metricas in atual["casos"].items():
+        anterior = baseline.get("casos", {}).get(nome)
+        if anterior is None:
+            continue
+        for chave in ("ns_op", "p99_ns"):
+            if anterior[chave] and metricas[chave] > anterior[chave] * (1 + tolerancia):
+                regressoes.append(
+                    f"{nome}: {chave} {anterior[chave]} -> {metricas[chave]} "
+                    f"(+{metricas[chave] / anterior[chave] - 1:.0%})"
+                )
+    return regressoes
+
+def _imprimir(resultados: Dict[str, Dict[str, Any]], baseline: Optional[Dict[str, Any]]):
+    largura = max(len(nome) for nome in resultados)
+    print(f"{'caso':<{largura}} {'ns/op':>10} {'p99 ns':>10} {'pico B':>9} {'blocos':>7} {'Δ ns/op':>8}")
+    for nome, m in resultados.items():
+        delta = ""
+        anterior = (baseline or {}).get("casos", {}).get(nome)
+        if anterior and anterior["ns_op"]:
+            delta = f"{m['ns_op'] / anterior['ns_op'] - 1:+.0%}"
+        print(
+            f"{nome:<{largura}} {m['ns_op']:>10} {m['p99_ns']:>10} "
+            f"{m['pico_bytes']:>9} {m['blocos_retidos']:>7} {delta:>8}"
+        )
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--save", help="grava os resultados em JSON neste caminho")
+    parser.add_argument("--compare", help="JSON de uma execução anterior usada como baseline")
+    parser.add_argument("--tolerancia", type=float, default=0.15,
+                        help="piora relativa aceita antes de acusar regressão (padrão: 0.15)")
+    parser.add_argument("--duracao", type=float, default=0.3, help="segundos por caso (padrão: 0.3)")
+    parser.add_argument("--max-chamadas", type=int, default=200_000, help="máximo de chamadas por caso")
+    parser.add_argument("--chamadas-memoria", type=int, default=50,
+                        help="chamadas medidas com o tracemalloc por caso")
+    parser.add_argument("--filtro", default="", help="roda apenas casos cujo nome contém este texto")
+    parser.add_argument("--semente", type=int, default=1234, help="semente do gerador de dados")
+    args = parser.parse_args(argv)
+
+    # Rolagens reprodutíveis entre execuções
+    random.seed(args.semente)
+    if dice.np is not None:
+        dice._rng = dice.np.random.default_rng(args.semente)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    resultados = {}
+    for nome, funcao in _casos():
+        if args.filtro in nome:
+            resultados[nome] = medir(funcao, args.duracao, args.max_chamadas, args.chamadas_memoria)
+
+    _imprimir(resultados, baseline)
+    atual = {
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy": dice.np is not None,
+        "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "casos": resultados,
+    }
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(atual, f, indent=2, ensure_ascii=False)
+        print(f"\nResultados gravados em {args.save}")
+
+    if baseline is not None:
+        for campo in ("python", "numpy"):
+            if baseline.get(campo) != atual[campo]:
+                print(f"\n⚠️ Baseline gerada com {campo}={baseline.get(campo)}, execução atual com {campo}={atual[campo]}")
+        regressoes = comparar(atual, baseline, args.tolerancia)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}:")
+            for linha in regressoes:
+                print(f"  {linha}")
+            return 1
+        print(f"\n✅ Nenhuma regressão acima de {args.tolerancia:.0%}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
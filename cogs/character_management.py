@@ -4,34 +4,35 @@ from discord import app_commands
 from typing import Dict, Any, List
 
 from models.character import Character
-from utils.storage import StorageManager
+from utils.autocomplete import autocomplete_cache
+from utils.pagination import PaginatedView
+from utils.render_cache import EmbedCache
+from utils.repository import DataRepository
 from utils.dice import calcular_dado
-from config.settings import FICHAS_FILE, UserIDs
+from config.settings import UserIDs
 
 class CharacterManagement(commands.Cog):
     """Cog responsável por gerenciar os comandos relacionados a personagens"""
 
-    def __init__(self, bot):
+    def __init__(self, bot, data: DataRepository):
         self.bot = bot
-        self.storage = StorageManager(FICHAS_FILE)
+        self.characters = data.characters
+        self.user_names = bot.user_names
+        self.embeds = EmbedCache()
 
     async def autocomplete_character_names(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
         """Função de autocompletar para nomes de personagens"""
-        # Carrega as fichas
-        fichas = self.storage.load()
-        user_id = str(interaction.user.id)
-        
-        # Se o usuário não tem fichas, retorna lista vazia
-        if user_id not in fichas:
-            return []
-        
-        # Filtra os nomes que começam com o texto atual
-        matches = []
-        for nome in fichas[user_id].keys():
-            if nome.startswith(current.lower()):
-                matches.append(app_commands.Choice(name=nome, value=nome))
-        
-        return matches[:25]  # Limite de 25 opções
+        # Busca entre as fichas do usuário os nomes que correspondem ao texto atual
+        async def buscar(texto: str, limite: int):
+            encontrados = await self.characters.asearch(texto, user_id=str(interaction.user.id), limit=limite)
+            return [
+                (ficha['key'], app_commands.Choice(name=ficha['key'], value=ficha['key']))
+                for ficha in encontrados
+            ]
+
+        return await autocomplete_cache.complete(
+            interaction, 'nome', current, buscar, version=self.characters.version
+        )
 
     @app_commands.command(name="criarficha", description="Cria uma ficha de personagem personalizada")
     async def criar_ficha(
@@ -62,118 +63,99 @@ class CharacterManagement(commands.Cog):
             }
         )
 
-        # Carrega fichas existentes
-        fichas = self.storage.load()
-        
         # Salva a ficha do usuário
         user_id = str(interaction.user.id)
-        if user_id not in fichas:
-            fichas[user_id] = {}
-        fichas[user_id][nome.lower()] = character.to_dict()
-        
-        # Salva as fichas atualizadas
-        self.storage.save(fichas)
+        ficha_data = character.to_dict()
+        await self.characters.asave_character(user_id, nome.lower(), ficha_data)
+        character.versao = ficha_data["versao"]
 
         # Cria o embed para exibir a ficha
-        await self._send_character_embed(interaction, character)
+        await self._send_character_embed(interaction, character, user_id, nome.lower())
 
     @app_commands.command(name="verficha", description="Mostra uma ficha de personagem salva")
     async def ver_ficha(self, interaction: discord.Interaction):
         # Verifica se é um mestre
         is_mestre = interaction.user.id in UserIDs.MESTRES
         
-        # Carrega as fichas
-        fichas = self.storage.load()
-        
-        # Prepara as opções do menu
-        options = await self._prepare_character_options(interaction, fichas, is_mestre)
-        
-        if not options:
+        # Mestres veem as fichas de todos; os demais, apenas as suas
+        view = CharacterListView(self, interaction.user.id, is_mestre)
+        if not await view.count():
             await interaction.response.send_message(
                 "Não há fichas disponíveis!" if is_mestre else "Você não tem nenhuma ficha criada!",
                 ephemeral=True
             )
             return
 
-        # Cria o menu de seleção
-        view = await self._create_character_select_view(interaction, options, fichas, is_mestre)
-        await interaction.response.send_message("Selecione um personagem:", view=view)
+        await view.send(interaction)
 
     async def _prepare_character_options(
         self,
-        interaction: discord.Interaction,
-        fichas: Dict[str, Any],
+        fichas: List[Dict[str, Any]],
         is_mestre: bool
-    ) -> list:
-        """Prepara as opções do menu de seleção de personagem"""
-        options = []
-        
-        if is_mestre:
-            for user_id, user_fichas in fichas.items():
-                for nome_ficha, ficha_data in user_fichas.items():
-                    try:
-                        user = await self.bot.fetch_user(int(user_id))
-                        user_name = user.name
-                    except:
-                        user_name = f"ID: {user_id}"
-                    
-                    options.append(
-                        discord.SelectOption(
-                            label=ficha_data["nome"],
-                            value=f"{user_id}:{nome_ficha}",
-                            description=f"Nível {ficha_data['nivel']} - {ficha_data['classe']} (Dono: {user_name})"
-                        )
-                    )
-        else:
-            user_id = str(interaction.user.id)
-            if user_id in fichas:
-                options = [
-                    discord.SelectOption(
-                        label=ficha_data["nome"],
-                        value=f"{user_id}:{nome_ficha}",
-                        description=f"Nível {ficha_data['nivel']} - {ficha_data['classe']}"
-                    )
-                    for nome_ficha, ficha_data in fichas[user_id].items()
-                ]
-        
-        return options
+    ) -> List[discord.SelectOption]:
+        """Prepara as opções do menu de seleção para os personagens de uma página"""
+        if not is_mestre:
+            return [
+                discord.SelectOption(
+                    label=ficha["nome"],
+                    value=f"{ficha['user_id']}:{ficha['key']}",
+                    description=f"Nível {ficha['nivel']} - {ficha['classe']}"
+                )
+                for ficha in fichas
+            ]
 
-    async def _create_character_select_view(
-        self,
-        interaction: discord.Interaction,
-        options: list,
-        fichas: Dict[str, Any],
-        is_mestre: bool
-    ) -> discord.ui.View:
-        """Cria a view com o menu de seleção de personagem"""
-        select = discord.ui.Select(
-            placeholder="Escolha um personagem para ver a ficha",
-            options=options,
-            min_values=1,
-            max_values=1
-        )
-
-        view = discord.ui.View()
-        view.add_item(select)
+        # Resolve os donos da página de uma vez, cada ID uma única vez
+        user_names = await self.user_names.resolve_many(ficha["user_id"] for ficha in fichas)
+        return [
+            discord.SelectOption(
+                label=ficha["nome"],
+                value=f"{ficha['user_id']}:{ficha['key']}",
+                description=(
+                    f"Nível {ficha['nivel']} - {ficha['classe']} "
+                    f"(Dono: {user_names[ficha['user_id']] or 'ID: ' + ficha['user_id']})"
+                )
+            )
+            for ficha in fichas
+        ]
 
-        async def select_callback(interaction: discord.Interaction):
-            user_id, nome_ficha = select.values[0].split(":")
-            ficha_data = fichas[user_id][nome_ficha]
-            character = Character.from_dict(ficha_data)
-            
-            embed = await self._create_character_embed(character, is_mestre, user_id)
-            await interaction.response.send_message(embed=embed)
+    async def _show_selected_character(self, interaction: discord.Interaction, value: str, is_mestre: bool):
+        """Mostra a ficha escolhida no menu de seleção"""
+        user_id, nome_ficha = value.split(":", 1)
+        ficha_data = await self.characters.aget_character(user_id, nome_ficha)
+        if ficha_data is None:
+            await interaction.response.send_message("Essa ficha não existe mais!", ephemeral=True)
+            return
+        character = Character.from_dict(ficha_data)
 
-        select.callback = select_callback
-        return view
+        embed = await self._create_character_embed(character, is_mestre, user_id, nome_ficha)
+        await interaction.response.send_message(embed=embed)
 
     async def _create_character_embed(
+        self,
+        character: Character,
+        is_mestre: bool,
+        user_id: str = None,
+        key: str = None
+    ) -> discord.Embed:
+        """Cria o embed para exibir a ficha do personagem, reaproveitando o cache"""
+        if user_id is None or key is None:
+            return await self._render_character_embed(character, is_mestre, user_id)
+
+        # A versão muda a cada alteração da ficha, invalidando o embed anterior
+        cache_key = (user_id, key, character.versao, "mestre" if is_mestre else "jogador")
+        embed = self.embeds.get(cache_key)
+        if embed is None:
+            embed = await self._render_character_embed(character, is_mestre, user_id)
+            self.embeds.put(cache_key, embed)
+        return embed
+
+    async def _render_character_embed(
         self,
         character: Character,
         is_mestre: bool,
         user_id: str = None
     ) -> discord.Embed:
-        """Cria o embed para exibir a ficha do personagem"""
+        """Monta o embed da ficha do personagem"""
         embed = discord.Embed(
             title="𝐅𝐢𝐜𝐡𝐚 𝐝𝐞 𝐏𝐞𝐫𝐬𝐨𝐧𝐚𝐠𝐞𝐦",
             color=discord.Color.dark_purple()
@@ -181,10 +163,10 @@ class CharacterManagement(commands.Cog):
 
         # Se for mestre, adiciona informação do dono da ficha
         if is_mestre and user_id:
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                dono_ficha = f"Dono da ficha: {user.name} (ID: {user_id})"
-            except:
+            user_name = await self.user_names.resolve(user_id)
+            if user_name is not None:
+                dono_ficha = f"Dono da ficha: {user_name} (ID: {user_id})"
+            else:
                 dono_ficha = f"Dono da ficha: ID {user_id}"
             embed.set_footer(text=dono_ficha)
 
@@ -240,10 +222,60 @@ class CharacterManagement(commands.Cog):
 
         return embed
 
-    async def _send_character_embed(self, interaction: discord.Interaction, character: Character):
+    async def _send_character_embed(
+        self,
+        interaction: discord.Interaction,
+        character: Character,
+        user_id: str = None,
+        key: str = None
+    ):
         """Envia o embed do personagem como resposta à interação"""
-        embed = await self._create_character_embed(character, False)
+        embed = await self._create_character_embed(character, False, user_id, key)
         await interaction.response.send_message(embed=embed)
 
+class CharacterListView(PaginatedView):
+    """Lista paginada de fichas, com um menu de seleção para a página atual"""
+
+    def __init__(self, cog: CharacterManagement, author_id: int, is_mestre: bool):
+        # O menu de seleção do Discord aceita no máximo 25 opções
+        super().__init__(author_id, per_page=25)
+        self.cog = cog
+        self.is_mestre = is_mestre
+        self.user_id = None if is_mestre else str(author_id)
+
+        self.select = discord.ui.Select(
+            placeholder="Escolha um personagem para ver a ficha",
+            min_values=1,
+            max_values=1,
+            row=0
+        )
+        self.select.callback = self.select_callback
+        self.add_item(self.select)
+
+    async def count(self) -> int:
+        return await self.cog.characters.acount(self.user_id)
+
+    async def fetch_page(self, offset: int, limit: int) -> List[discord.SelectOption]:
+        fichas = await self.cog.characters.apage(offset, limit, self.user_id)
+        return await self.cog._prepare_character_options(fichas, self.is_mestre)
+
+    def update_components(self, options: List[discord.SelectOption]):
+        # O Discord exige ao menos uma opção, mesmo com o menu desativado
+        self.select.options = options or [discord.SelectOption(label="Nenhuma ficha", value="-")]
+        self.select.disabled = not options
+
+    async def render(self, options: List[discord.SelectOption]) -> discord.Embed:
+        embed = discord.Embed(
+            title="𝐅𝐢𝐜𝐡𝐚𝐬",
+            description="\n".join(f"• **{option.label}** — {option.description}" for option in options)
+                        or "Não há fichas nesta página.",
+            color=discord.Color.dark_purple()
+        )
+        embed.set_footer(text=f"Página {self.page + 1} de {self.pages} • Selecione um personagem abaixo")
+        return embed
+
+    async def select_callback(self, interaction: discord.Interaction):
+        await self.cog._show_selected_character(interaction, self.select.values[0], self.is_mestre)
+
 async def setup(bot):
-    await bot.add_cog(CharacterManagement(bot)) 
\ No newline at end of file
+    await bot.add_cog(CharacterManagement(bot, bot.data)) 
\ No newline at end of file
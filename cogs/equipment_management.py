@@ -2,144 +2,19 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 from typing import Optional, Dict, Any, List
-import json
-import os
 from datetime import datetime
+from models.equipment import IEquipment, Equipment
+from utils.autocomplete import autocomplete_cache
+from utils.pagination import PaginatedView
+from utils.repository import AmbiguousCharacterError, DataRepository, EquipmentRepository
 from config.settings import UserIDs
 
-# Interface para equipamentos
-class IEquipment:
-    def to_dict(self) -> Dict[str, Any]:
-        pass
-
-    @staticmethod
-    def from_dict(data: Dict[str, Any]) -> 'Equipment':
-        pass
-
-# Classe concreta de equipamento
-class Equipment(IEquipment):
-    def __init__(
-        self,
-        name: str,
-        type: str,
-        description: str,
-        damage: Optional[str] = None,
-        armor: Optional[int] = None,
-        weight: Optional[float] = None,
-        value: Optional[int] = None,
-        properties: Optional[list[str]] = None,
-        requirements: Optional[Dict[str, Any]] = None,
-        created_by: Optional[str] = None,
-        created_at: Optional[str] = None
-    ):
-        self.name = name
-        self.type = type
-        self.description = description
-        self.damage = damage
-        self.armor = armor
-        self.weight = weight
-        self.value = value
-        self.properties = properties or []
-        self.requirements = requirements or {}
-        self.created_by = created_by
-        self.created_at = created_at or datetime.now().isoformat()
-
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            "name": self.name,
-            "type": self.type,
-            "description": self.description,
-            "damage": self.damage,
-            "armor": self.armor,
-            "weight": self.weight,
-            "value": self.value,
-            "properties": self.properties,
-            "requirements": self.requirements,
-            "created_by": self.created_by,
-            "created_at": self.created_at
-        }
-
-    @staticmethod
-    def from_dict(data: Dict[str, Any]) -> 'Equipment':
-        return Equipment(**data)
-
-# Gerenciador de persistência de equipamentos
-class EquipmentRepository:
-    def __init__(self, file_path: str = "data/equipment.json"):
-        self.file_path = file_path
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=4)
-
-    def save_equipment(self, equipment: Equipment) -> bool:
-        try:
-            equipments = self.get_all_equipment()
-            equipments.append(equipment.to_dict())
-            
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(equipments, f, ensure_ascii=False, indent=4)
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar equipamento: {e}")
-            return False
-
-    def get_all_equipment(self) -> list[Dict[str, Any]]:
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"Erro ao ler equipamentos: {e}")
-            return []
-
-    def get_equipment_by_name(self, name: str) -> Optional[Equipment]:
-        """Busca um equipamento pelo nome"""
-        equipments = self.get_all_equipment()
-        for eq in equipments:
-            if eq["name"].lower() == name.lower():
-                return Equipment.from_dict(eq)
-        return None
-
-    def update_equipment(self, name: str, updated_equipment: Equipment) -> bool:
-        """Atualiza um equipamento existente"""
-        try:
-            equipments = self.get_all_equipment()
-            for i, eq in enumerate(equipments):
-                if eq["name"].lower() == name.lower():
-                    equipments[i] = updated_equipment.to_dict()
-                    with open(self.file_path, 'w', encoding='utf-8') as f:
-                        json.dump(equipments, f, ensure_ascii=False, indent=4)
-                    return True
-            return False
-        except Exception as e:
-            print(f"Erro ao atualizar equipamento: {e}")
-            return False
-
-    def delete_equipment(self, name: str) -> bool:
-        """Exclui um equipamento pelo nome"""
-        try:
-            equipments = self.get_all_equipment()
-            initial_length = len(equipments)
-            equipments = [eq for eq in equipments if eq["name"].lower() != name.lower()]
-            
-            if len(equipments) == initial_length:
-                return False
-                
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(equipments, f, ensure_ascii=False, indent=4)
-            return True
-        except Exception as e:
-            print(f"Erro ao excluir equipamento: {e}")
-            return False
-
 # Cog para gerenciamento de equipamentos
 class EquipmentManagement(commands.Cog):
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: commands.Bot, data: DataRepository):
         self.bot = bot
-        self.repository = EquipmentRepository()
+        self.characters = data.characters
+        self.repository = data.equipment
 
     # Grupo de comandos de equipamento
     equipment_group = app_commands.Group(
@@ -194,7 +69,7 @@ class EquipmentManagement(commands.Cog):
         )
 
         # Salvamento do equipamento
-        if self.repository.save_equipment(equipment):
+        if await self.repository.asave_equipment(equipment):
             # Criação do embed de sucesso
             success_embed = discord.Embed(
                 title="✨ Equipamento Criado com Sucesso!",
@@ -293,7 +168,7 @@ class EquipmentManagement(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
         # Busca o equipamento
-        equipment = self.repository.get_equipment_by_name(nome_atual)
+        equipment = await self.repository.aget_equipment_by_name(nome_atual)
         if not equipment:
             error_embed = discord.Embed(
                 title="❌ Equipamento Não Encontrado",
@@ -318,7 +193,7 @@ class EquipmentManagement(commands.Cog):
         )
 
         # Tenta atualizar o equipamento
-        if self.repository.update_equipment(nome_atual, updated_equipment):
+        if await self.repository.aupdate_equipment(nome_atual, updated_equipment):
             # Criação do embed de sucesso
             success_embed = discord.Embed(
                 title="✨ Equipamento Atualizado com Sucesso!",
@@ -409,7 +284,7 @@ class EquipmentManagement(commands.Cog):
         await interaction.response.send_message(embed=embed)
 
         # Busca o equipamento antes de excluir para mostrar os detalhes
-        equipment = self.repository.get_equipment_by_name(nome)
+        equipment = await self.repository.aget_equipment_by_name(nome)
         if not equipment:
             error_embed = discord.Embed(
                 title="❌ Equipamento Não Encontrado",
@@ -420,7 +295,7 @@ class EquipmentManagement(commands.Cog):
             return
 
         # Tenta excluir o equipamento
-        if self.repository.delete_equipment(nome):
+        if await self.repository.adelete_equipment(nome):
             # Criação do embed de sucesso
             success_embed = discord.Embed(
                 title="✅ Equipamento Excluído com Sucesso!",
@@ -453,6 +328,24 @@ class EquipmentManagement(commands.Cog):
             )
             await interaction.edit_original_response(embed=error_embed)
 
+    @equipment_group.command(
+        name="listar",
+        description="Lista os equipamentos cadastrados no sistema"
+    )
+    async def list_equipment(self, interaction: discord.Interaction):
+        """
+        Lista o catálogo de equipamentos em páginas
+        """
+        view = EquipmentListView(self.repository, interaction.user.id)
+        if not await view.count():
+            await interaction.response.send_message(
+                "Não há equipamentos cadastrados!",
+                ephemeral=True
+            )
+            return
+
+        await view.send(interaction, ephemeral=True)
+
     @equipment_group.command(
         name="equipar",
         description="Equipa um item em um personagem"
@@ -474,10 +367,6 @@ class EquipmentManagement(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
-        # Carrega os dados das fichas
-        with open('data/fichas.json', 'r', encoding='utf-8') as f:
-            fichas = json.load(f)
-
         # Verifica se o usuário é mestre
         is_mestre = interaction.user.id in UserIDs.MESTRES
         user_id = str(interaction.user.id)
@@ -487,15 +376,27 @@ class EquipmentManagement(commands.Cog):
         # Busca o personagem
         if is_mestre:
             # Mestres podem equipar em qualquer personagem
-            for uid, user_fichas in fichas.items():
-                if nome_personagem in user_fichas:
-                    personagem = user_fichas[nome_personagem]
-                    owner_id = uid
-                    break
+            try:
+                encontrado = await self.characters.aresolve(nome_personagem)
+            except AmbiguousCharacterError as e:
+                donos = ", ".join(f"<@{owner}>" for owner in e.owners)
+                error_embed = discord.Embed(
+                    title="❌ Personagem Ambíguo",
+                    description=(
+                        f"Há mais de um personagem chamado '{e.key}' (donos: {donos}). "
+                        "Escolha o personagem desejado pelo autocomplete."
+                    ),
+                    color=discord.Color.red()
+                )
+                await interaction.edit_original_response(embed=error_embed)
+                return
+            if encontrado:
+                owner_id, nome_personagem = encontrado
+                personagem = await self.characters.aget_character(owner_id, nome_personagem)
         else:
             # Usuários normais só podem equipar em seus próprios personagens
-            if user_id in fichas and nome_personagem in fichas[user_id]:
-                personagem = fichas[user_id][nome_personagem]
+            personagem = await self.characters.aget_character(user_id, nome_personagem)
+            if personagem:
                 owner_id = user_id
 
         if not personagem:
@@ -508,7 +409,7 @@ class EquipmentManagement(commands.Cog):
             return
 
         # Busca o equipamento
-        equipment = self.repository.get_equipment_by_name(nome_equipamento)
+        equipment = await self.repository.aget_equipment_by_name(nome_equipamento)
         if not equipment:
             error_embed = discord.Embed(
                 title="❌ Equipamento Não Encontrado",
@@ -519,13 +420,7 @@ class EquipmentManagement(commands.Cog):
             return
 
         # Adiciona o equipamento ao personagem
-        if nome_equipamento not in personagem["equipamentos"]:
-            personagem["equipamentos"].append(nome_equipamento)
-            
-            # Salva as alterações
-            with open('data/fichas.json', 'w', encoding='utf-8') as f:
-                json.dump(fichas, f, ensure_ascii=False, indent=4)
-
+        if await self.characters.aadd_equipment(owner_id, nome_personagem, nome_equipamento):
             # Cria embed de sucesso
             success_embed = discord.Embed(
                 title="✅ Equipamento Adicionado",
@@ -581,40 +476,23 @@ class EquipmentManagement(commands.Cog):
         current: str,
     ) -> List[app_commands.Choice[str]]:
         """Autocomplete para nomes de personagens no comando de equipar"""
-        # Carrega as fichas
-        with open('data/fichas.json', 'r', encoding='utf-8') as f:
-            fichas = json.load(f)
-        
-        choices = []
-        user_id = str(interaction.user.id)
-        
-        # Verifica se o usuário é mestre
+        # Mestres veem todos os personagens; usuários normais, apenas os seus
         is_mestre = interaction.user.id in UserIDs.MESTRES
-        
-        if is_mestre:
-            # Para mestres, mostra todos os personagens
-            for user_fichas in fichas.values():
-                for nome_ficha, ficha_data in user_fichas.items():
-                    if current.lower() in nome_ficha.lower():
-                        choices.append(
-                            app_commands.Choice(
-                                name=f"{ficha_data['nome']} (Nível {ficha_data['nivel']} {ficha_data['classe']})",
-                                value=nome_ficha
-                            )
-                        )
-        else:
-            # Para usuários normais, mostra apenas seus personagens
-            if user_id in fichas:
-                for nome_ficha, ficha_data in fichas[user_id].items():
-                    if current.lower() in nome_ficha.lower():
-                        choices.append(
-                            app_commands.Choice(
-                                name=f"{ficha_data['nome']} (Nível {ficha_data['nivel']} {ficha_data['classe']})",
-                                value=nome_ficha
-                            )
-                        )
-        
-        return choices[:25]  # Limite de 25 opções
+        user_id = None if is_mestre else str(interaction.user.id)
+
+        async def buscar(texto: str, limite: int):
+            encontrados = await self.characters.asearch(texto, user_id=user_id, limit=limite)
+            return [
+                (ficha['key'], app_commands.Choice(
+                    name=f"{ficha['nome']} (Nível {ficha['nivel']} {ficha['classe']})",
+                    value=self.characters.choice_value(ficha['user_id'], ficha['key']) if is_mestre else ficha['key']
+                ))
+                for ficha in encontrados
+            ]
+
+        return await autocomplete_cache.complete(
+            interaction, 'nome_personagem', current, buscar, version=self.characters.version
+        )
 
     @equip_item.autocomplete('nome_equipamento')
     async def autocomplete_equipamento_equipar(
@@ -623,16 +501,42 @@ class EquipmentManagement(commands.Cog):
         current: str,
     ) -> List[app_commands.Choice[str]]:
         """Autocomplete para equipamentos disponíveis"""
-        equipments = self.repository.get_all_equipment()
-        
-        return [
-            app_commands.Choice(
-                name=f"{eq['name']} ({eq['type']})",
-                value=eq['name']
-            )
-            for eq in equipments
-            if current.lower() in eq['name'].lower()
-        ][:25]  # Limite de 25 opções
+        async def buscar(texto: str, limite: int):
+            equipments = await self.repository.asearch_equipment(texto, limite)
+            return [
+                (eq.name, app_commands.Choice(name=f"{eq.name} ({eq.type})", value=eq.name))
+                for eq in equipments
+            ]
+
+        return await autocomplete_cache.complete(
+            interaction, 'nome_equipamento', current, buscar, version=self.repository.version
+        )
+
+class EquipmentListView(PaginatedView):
+    """Lista paginada do catálogo de equipamentos"""
+
+    def __init__(self, repository: EquipmentRepository, author_id: int):
+        super().__init__(author_id, per_page=15)
+        self.repository = repository
+
+    async def count(self) -> int:
+        return await self.repository.acount_equipment()
+
+    async def fetch_page(self, offset: int, limit: int) -> List[Equipment]:
+        return await self.repository.apage_equipment(offset, limit)
+
+    async def render(self, equipments: List[Equipment]) -> discord.Embed:
+        embed = discord.Embed(
+            title="🗡️ Equipamentos Cadastrados",
+            description="\n".join(
+                f"• **{eq.name}** ({eq.type})" + (f" — ⚔️ {eq.damage}" if eq.damage else "")
+                + (f" — 🛡️ {eq.armor}" if eq.armor else "")
+                for eq in equipments
+            ) or "Nenhum equipamento nesta página.",
+            color=discord.Color.blue()
+        )
+        embed.set_footer(text=f"Página {self.page + 1} de {self.pages}")
+        return embed
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(EquipmentManagement(bot)) 
\ No newline at end of file
+    await bot.add_cog(EquipmentManagement(bot, bot.data)) 
\ No newline at end of file
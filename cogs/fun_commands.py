@@ -1,9 +1,11 @@
+import io
+
 import discord
 from discord.ext import commands
 from discord import app_commands
-from config.settings import UserIDs
-from utils.dice import rolar_dados
-import re
+from config.settings import MAX_SIMULATION_TRIALS, ROLL_SUMMARY_THRESHOLD, UserIDs
+from utils.dice import ResumoDistribuicao, compilar_notacao, rolar_dados, validar_distribuicao
+from utils.simulation import ResultadoSimulacao, Simulacao, calcular_distribuicao
 
 class FunCommands(commands.Cog):
     """Cog responsável por comandos divertidos e não relacionados ao RPG"""
@@ -45,120 +47,422 @@ class FunCommands(commands.Cog):
 
     @app_commands.command(name="rolar", description="Rola dados usando notação padrão (exemplo: 2d20+5,1d6)")
     @app_commands.describe(
-        notacao="Notação dos dados (exemplo: 2d20+5,1d6, 1d20,2d8)",
-        motivo="Motivo da rolagem (opcional)"
+        notacao="Notação dos dados (exemplo: 2d20+5,1d6, 1d20+1d6-1d4)",
+        motivo="Motivo da rolagem (opcional)",
+        detalhado="Anexa um arquivo de texto com todos os dados rolados (opcional)"
     )
     async def rolar(
         self,
         interaction: discord.Interaction,
         notacao: str,
-        motivo: str = None
+        motivo: str = None,
+        detalhado: bool = False
     ):
         """
         Rola dados usando notação padrão e exibe um resultado estilizado
         """
         try:
-            # Remove espaços extras e converte para minúsculas
-            notacao = notacao.strip().lower()
-            
-            # Realiza a rolagem
+            # Realiza a rolagem (a notação é normalizada e compilada uma única vez)
             resultado = rolar_dados(notacao)
+            embed = self._create_roll_embed(resultado, interaction.user, motivo)
+
+            if detalhado:
+                arquivo = discord.File(
+                    io.BytesIO(self._roll_details_text(resultado, motivo).encode("utf-8")),
+                    filename="rolagem.txt"
+                )
+                await interaction.response.send_message(embed=embed, file=arquivo)
+            else:
+                await interaction.response.send_message(embed=embed)
             
-            # Cria o embed
-            embed = discord.Embed(
-                title="🎲 Rolagem de Dados",
-                color=discord.Color.blue()
+        except ValueError as e:
+            await interaction.response.send_message(
+                f"❌ Erro: {str(e)}",
+                ephemeral=True
             )
-            
-            # Adiciona o autor
-            embed.set_author(
-                name=interaction.user.display_name,
-                icon_url=interaction.user.display_avatar.url
+        except Exception as e:
+            await interaction.response.send_message(
+                "❌ Ocorreu um erro ao processar sua rolagem. Verifique a notação e tente novamente.",
+                ephemeral=True
             )
-            
-            # Adiciona o motivo se fornecido
-            if motivo:
-                embed.description = f"**Motivo:** {motivo}"
-            
-            # Campo com a notação e resultado total
+            print(f"Erro ao processar rolagem: {e}")
+
+    def _create_roll_embed(self, resultado: dict, autor: discord.abc.User, motivo: str = None) -> discord.Embed:
+        """
+        Cria o embed de uma rolagem em uma única passada pelos grupos
+
+        Até ROLL_SUMMARY_THRESHOLD dados, cada dado aparece em sua própria
+        linha; acima disso, cada grupo vira um campo com a contagem de cada
+        face em barras, o subtotal e os críticos somados. Para respeitar os
+        limites do Discord (6000 caracteres por embed, 1024 por campo), os
+        grupos que não cabem viram uma linha com o subtotal e as listas
+        longas são cortadas, apontando para o detalhado: True.
+        """
+        embed = discord.Embed(
+            title="🎲 Rolagem de Dados",
+            color=discord.Color.blue()
+        )
+        embed.set_author(
+            name=autor.display_name,
+            icon_url=autor.display_avatar.url
+        )
+        if motivo:
+            embed.description = f"**Motivo:** {motivo}"[:1024]
+
+        # Campo com a notação e resultado total
+        embed.add_field(
+            name="📝 Rolagem",
+            value=f"`{resultado['notacao']}` = **{resultado['total']}**",
+            inline=False
+        )
+
+        # Grupos rolados em lote não têm os dados individuais para listar
+        resumido = (
+            sum(grupo['quantidade'] for grupo in resultado['grupos']) > ROLL_SUMMARY_THRESHOLD
+            or any(grupo['resultados'] is None for grupo in resultado['grupos'])
+        )
+        # Valores dos d20 críticos de cada grupo, já sem os descartados
+        criticos_grupo = {}
+        for i, posicao in resultado['criticos']:
+            criticos_grupo.setdefault(i, []).append(resultado['grupos'][i]['resultados'][posicao - 1])
+        linhas = []
+        criticos = []
+        # Grupos sem espaço para o histograma, mostrados só com o subtotal
+        compactos = []
+
+        for i, grupo in enumerate(resultado['grupos']):
+            # Tipo do dado (d20, d6, etc), com sinal se for subtraído
+            tipo_dado = f"{'-' if grupo['sinal'] < 0 else ''}d{grupo['faces']}"
+            emoji = "🎯" if grupo['faces'] == 20 else "🎲"
+            descartados = set(grupo['descartados'])
+
+            if resumido:
+                # Grupos em lote ficam fora dos críticos por posição
+                if grupo['faces'] == 20 and grupo['resultados'] is None:
+                    sucessos = grupo['contagens'].get(20, 0)
+                    falhas = grupo['contagens'].get(1, 0)
+                else:
+                    sucessos = sum(1 for valor in criticos_grupo.get(i, []) if valor >= 20)
+                    falhas = len(criticos_grupo.get(i, [])) - sucessos
+                nome = f"{emoji} {grupo['notacao']} = {grupo['subtotal']}"
+                valor = self._face_histogram(grupo['contagens'])
+                if descartados:
+                    valor += f"\n~~{len(descartados)} dado(s) descartado(s)~~"
+                cabe = (
+                    not compactos
+                    and len(embed.fields) < self.ROLL_MAX_GROUP_FIELDS
+                    and len(embed) + len(nome) + len(valor) <= self.ROLL_EMBED_BUDGET
+                )
+                if cabe:
+                    embed.add_field(name=nome, value=valor, inline=False)
+                else:
+                    compactos.append(nome)
+                if sucessos:
+                    criticos.append(f"🌟 {sucessos} Sucesso(s) Crítico(s)! ({grupo['notacao']})")
+                if falhas:
+                    criticos.append(f"💥 {falhas} Falha(s) Crítica(s)! ({grupo['notacao']})")
+                continue
+
+            for j, valor in enumerate(grupo['resultados']):
+                if j in descartados:
+                    # Dado descartado pela regra de manter
+                    linhas.append(f"{emoji} {tipo_dado}: ~~{valor}~~")
+                    continue
+                linhas.append(f"{emoji} {tipo_dado}: **{valor}**")
+            for valor in criticos_grupo.get(i, []):
+                if valor >= 20:
+                    criticos.append(f"🌟 Sucesso Crítico! (d20: {valor})")
+                else:
+                    criticos.append(f"💥 Falha Crítica! (d20: {valor})")
+
+        if compactos:
+            embed.add_field(name="🎲 Outros grupos", value=self._limit_lines(compactos), inline=False)
+
+        if resultado['modificador']:
+            sinal = "+" if resultado['modificador'] > 0 else ""
+            if resumido:
+                embed.add_field(name="💫 Modificador", value=f"{sinal}{resultado['modificador']}", inline=False)
+            else:
+                linhas.append(f"💫 Modificador: {sinal}{resultado['modificador']}")
+
+        if linhas:
+            embed.add_field(name="🎲 Resultados", value=self._limit_lines(linhas), inline=False)
+
+        if criticos:
             embed.add_field(
-                name="📝 Rolagem",
-                value=f"`{resultado['notacao']}` = **{resultado['total']}**",
+                name="⚡ Críticos",
+                value=self._limit_lines(criticos),
                 inline=False
             )
-            
-            # Mostra os resultados individuais de cada dado
-            resultados_str = []
-            notacoes = [n.strip() for n in resultado['notacao'].split(',')]
-            
-            for grupo_idx, (resultados, notacao) in enumerate(zip(resultado['resultados_grupos'], notacoes)):
-                tipo_dado = re.search(r'd\d+', notacao).group()  # Extrai o tipo do dado (d20, d6, etc)
-                for valor in resultados:
-                    # Adiciona emoji baseado no tipo do dado
-                    emoji = "🎯" if tipo_dado == "d20" else "🎲"
-                    resultados_str.append(f"{emoji} {tipo_dado}: **{valor}**")
-            
-            # Adiciona o modificador total no final se houver
-            if resultado['modificador']:
-                sinal = "+" if resultado['modificador'] > 0 else ""
-                resultados_str.append(f"💫 Modificador: {sinal}{resultado['modificador']}")
-            
-            # Divide em múltiplos campos se necessário (limite de 1024 caracteres por campo)
-            resultados_chunks = []
-            current_chunk = []
-            current_length = 0
-            
-            for resultado_str in resultados_str:
-                if current_length + len(resultado_str) + 1 > 1024:  # +1 para a quebra de linha
-                    resultados_chunks.append("\n".join(current_chunk))
-                    current_chunk = [resultado_str]
-                    current_length = len(resultado_str)
-                else:
-                    current_chunk.append(resultado_str)
-                    current_length += len(resultado_str) + 1
-            
-            if current_chunk:
-                resultados_chunks.append("\n".join(current_chunk))
-            
-            # Adiciona os campos de resultados
-            for i, chunk in enumerate(resultados_chunks, 1):
-                embed.add_field(
-                    name=f"🎲 Resultados {f'(Parte {i})' if len(resultados_chunks) > 1 else ''}",
-                    value=chunk,
-                    inline=False
-                )
-            
-            # Adiciona críticos se houver (apenas para d20)
-            criticos = []
-            if resultado['criticos']:
-                for grupo, idx in resultado['criticos']:
-                    valor = resultado['resultados_grupos'][grupo][idx - 1]
-                    if valor == 20:
-                        criticos.append(f"🌟 Sucesso Crítico! (d20: {valor})")
-                    elif valor == 1:
-                        criticos.append(f"💥 Falha Crítica! (d20: {valor})")
-            
-            if criticos:
-                embed.add_field(
-                    name="⚡ Críticos",
-                    value="\n".join(criticos),
-                    inline=False
-                )
-            
-            # Envia o resultado
-            await interaction.response.send_message(embed=embed)
-            
+
+        if resumido:
+            embed.set_footer(text="Use detalhado: True para receber todos os dados em um arquivo")
+        return embed
+
+    # Espaço do embed da rolagem ocupado pelos histogramas dos grupos; o
+    # restante fica para a lista de outros grupos, o modificador, os
+    # críticos (até 1024 caracteres cada) e o rodapé
+    ROLL_EMBED_BUDGET = 6000 - 2 * 1024 - 200
+    ROLL_MAX_GROUP_FIELDS = 20
+
+    def _limit_lines(self, linhas: list, limite: int = 1024) -> str:
+        """Junta as linhas cortando as que passariam do limite de caracteres"""
+        texto = "\n".join(linhas)
+        if len(texto) <= limite:
+            return texto
+        usadas = []
+        tamanho = 0
+        for i, linha in enumerate(linhas):
+            aviso = f"… e mais {len(linhas) - i} (veja detalhado: True)"
+            if tamanho + len(linha) + 1 + len(aviso) > limite:
+                return "\n".join(usadas + [aviso])[:limite]
+            usadas.append(linha)
+            tamanho += len(linha) + 1
+        return texto[:limite]
+
+    def _face_histogram(self, contagens: dict, largura: int = 12) -> str:
+        """
+        Contagem de cada face em barras, dentro de um bloco de código
+
+        Dados com mais de 20 valores possíveis são agrupados em até 10 faixas.
+        """
+        maior_valor = max(contagens)
+        passo = 1 if maior_valor <= 20 else -(-maior_valor // 10)
+        faixas = {}
+        for face, n in contagens.items():
+            inicio = (face - 1) // passo * passo + 1
+            faixas[inicio] = faixas.get(inicio, 0) + n
+
+        maior = max(faixas.values())
+        rotulo = len(str(maior_valor)) * (2 if passo > 1 else 1) + (1 if passo > 1 else 0)
+        linhas = []
+        for inicio in sorted(faixas):
+            nome = str(inicio) if passo == 1 else f"{inicio}-{min(inicio + passo - 1, maior_valor)}"
+            barra = "█" * max(1, round(faixas[inicio] / maior * largura))
+            linhas.append(f"{nome:>{rotulo}} {barra:<{largura}} ×{faixas[inicio]}")
+        return "```\n" + "\n".join(linhas) + "\n```"
+
+    def _roll_details_text(self, resultado: dict, motivo: str = None) -> str:
+        """Texto com todos os dados de uma rolagem, para o arquivo anexo"""
+        linhas = [f"Rolagem: {resultado['notacao']}"]
+        if motivo:
+            linhas.append(f"Motivo: {motivo}")
+        for grupo in resultado['grupos']:
+            linhas.append("")
+            linhas.append(f"{grupo['notacao']} = {grupo['subtotal']}")
+            if grupo['resultados'] is None:
+                # Grupo rolado em lote: só existem as contagens de cada face
+                linhas.extend(f"  {face}: {n}x" for face, n in sorted(grupo['contagens'].items()))
+                continue
+            descartados = set(grupo['descartados'])
+            valores = [f"({v})" if j in descartados else str(v) for j, v in enumerate(grupo['resultados'])]
+            linhas.extend("  " + ", ".join(valores[i:i + 20]) for i in range(0, len(valores), 20))
+            if descartados:
+                linhas.append("  (valores entre parênteses foram descartados)")
+        if resultado['modificador']:
+            linhas.append("")
+            linhas.append(f"Modificador: {resultado['modificador']:+d}")
+        linhas.append("")
+        linhas.append(f"Total: {resultado['total']}")
+        return "\n".join(linhas) + "\n"
+
+    @app_commands.command(name="probabilidade", description="Calcula a distribuição exata de uma rolagem (exemplo: 20d20+3d12)")
+    @app_commands.describe(
+        notacao="Notação dos dados (exemplo: 2d20+5, 1d20+1d6-1d4)",
+        alvo="Valor mínimo desejado, para calcular a chance de atingi-lo (opcional)"
+    )
+    async def probabilidade(
+        self,
+        interaction: discord.Interaction,
+        notacao: str,
+        alvo: int = None
+    ):
+        """
+        Mostra média, desvio padrão, percentis e a chance de atingir um alvo
+        """
+        try:
+            # Recusa notações inválidas ou grandes demais antes de ocupar o pool
+            validar_distribuicao(compilar_notacao(notacao))
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ Erro: {str(e)}", ephemeral=True)
+            return
+
+        # O cálculo pode passar do prazo de resposta da interação
+        await interaction.response.defer()
+        try:
+            # Convoluções e resumo rodam no pool de processos; só o resumo volta
+            resumo = await calcular_distribuicao(notacao, alvo)
         except ValueError as e:
+            await interaction.followup.send(f"❌ Erro: {str(e)}", ephemeral=True)
+            return
+        except Exception as e:
+            await interaction.followup.send(
+                "❌ Ocorreu um erro ao calcular as probabilidades. Tente novamente.",
+                ephemeral=True
+            )
+            print(f"Erro ao calcular probabilidades: {e}")
+            return
+
+        embed = discord.Embed(
+            title="📊 Probabilidades",
+            description=f"`{notacao}`",
+            color=discord.Color.blue()
+        )
+        self._add_distribution_fields(embed, resumo)
+        if alvo is not None:
+            embed.add_field(
+                name="🎯 Alvo",
+                value=f"**P(total ≥ {alvo}):** {resumo.prob_alvo:.2%}",
+                inline=False
+            )
+
+        await interaction.followup.send(embed=embed)
+
+    def _add_distribution_fields(self, embed: discord.Embed, resumo: ResumoDistribuicao):
+        """Adiciona os campos de resumo e percentis de uma distribuição"""
+        embed.add_field(
+            name="📈 Resumo",
+            value=(
+                f"**Mínimo:** {resumo.minimo}\n"
+                f"**Máximo:** {resumo.maximo}\n"
+                f"**Média:** {resumo.media:.2f}\n"
+                f"**Desvio padrão:** {resumo.desvio_padrao:.2f}"
+            ),
+            inline=True
+        )
+        embed.add_field(
+            name="📐 Percentis",
+            value="\n".join(f"**{int(fracao * 100)}%:** {total}" for fracao, total in resumo.percentis),
+            inline=True
+        )
+
+    @app_commands.command(name="simular", description="Simula uma rolagem milhões de vezes (aceita dados explosivos e kh/kl)")
+    @app_commands.describe(
+        notacao="Notação dos dados (exemplo: 4d6kh3, 1d20!+5, 2d20kl1)",
+        tentativas="Quantidade de rolagens simuladas (padrão: 1 milhão)",
+        alvo="Valor mínimo desejado, para estimar a chance de atingi-lo (opcional)"
+    )
+    async def simular(
+        self,
+        interaction: discord.Interaction,
+        notacao: str,
+        tentativas: int = 1_000_000,
+        alvo: int = None
+    ):
+        """
+        Estima a distribuição de uma rolagem por simulação, em vários processos
+        """
+        if not 1 <= tentativas <= MAX_SIMULATION_TRIALS:
             await interaction.response.send_message(
-                f"❌ Erro: {str(e)}",
+                f"❌ Erro: escolha entre 1 e {MAX_SIMULATION_TRIALS:,} tentativas".replace(",", "."),
                 ephemeral=True
             )
+            return
+
+        try:
+            simulacao = Simulacao(notacao, tentativas)
+        except ValueError as e:
+            await interaction.response.send_message(f"❌ Erro: {str(e)}", ephemeral=True)
+            return
+
+        view = SimulacaoView(simulacao, interaction.user.id)
+        await interaction.response.send_message(embed=self._create_simulation_embed(simulacao.resultado, alvo), view=view)
+
+        async def progredir(resultado: ResultadoSimulacao):
+            try:
+                await interaction.edit_original_response(embed=self._create_simulation_embed(resultado, alvo))
+            except discord.HTTPException as e:
+                # Uma atualização perdida não deve interromper a simulação
+                print(f"Erro ao atualizar progresso da simulação: {e}")
+
+        try:
+            resultado = await simulacao.executar(progredir)
         except Exception as e:
+            print(f"Erro ao simular rolagem: {e}")
+            await interaction.edit_original_response(
+                embed=discord.Embed(
+                    title="❌ Erro na Simulação",
+                    description="Não foi possível concluir a simulação. Tente novamente.",
+                    color=discord.Color.red()
+                ),
+                view=None
+            )
+            return
+        finally:
+            view.stop()
+
+        await interaction.edit_original_response(embed=self._create_simulation_embed(resultado, alvo), view=None)
+
+    def _create_simulation_embed(self, resultado: ResultadoSimulacao, alvo: int = None) -> discord.Embed:
+        """Cria o embed com o andamento ou o resultado de uma simulação"""
+        if resultado.cancelada:
+            titulo, cor = "🛑 Simulação Cancelada", discord.Color.orange()
+        elif resultado.concluidas < resultado.tentativas:
+            titulo, cor = "⏳ Simulando...", discord.Color.blue()
+        else:
+            titulo, cor = "🎰 Simulação Concluída", discord.Color.green()
+
+        embed = discord.Embed(
+            title=titulo,
+            description=(
+                f"`{resultado.notacao}` • {resultado.concluidas:,} de {resultado.tentativas:,} tentativas "
+                f"({resultado.concluidas / resultado.tentativas:.0%})"
+            ).replace(",", "."),
+            color=cor
+        )
+        if not resultado.concluidas:
+            return embed
+
+        resumo = resultado.distribuicao().resumir(alvo)
+        self._add_distribution_fields(embed, resumo)
+        if resultado.sucessos_criticos or resultado.falhas_criticas:
+            embed.add_field(
+                name="⚡ Críticos (d20)",
+                value=(
+                    f"🌟 Ao menos um sucesso: {resultado.sucessos_criticos / resultado.concluidas:.2%}\n"
+                    f"💥 Ao menos uma falha: {resultado.falhas_criticas / resultado.concluidas:.2%}"
+                ),
+                inline=False
+            )
+        if alvo is not None:
+            embed.add_field(
+                name="🎯 Alvo",
+                value=f"**P(total ≥ {alvo}):** {resumo.prob_alvo:.2%}",
+                inline=False
+            )
+
+        # Histograma em faixas, com barras proporcionais à faixa mais frequente
+        faixas = resultado.faixas()
+        maior = max(fracao for _, _, fracao in faixas)
+        linhas = [
+            f"{inicio:>6}–{fim:<6} {'█' * round(fracao / maior * 20):<20} {fracao:6.2%}"
+            for inicio, fim, fracao in faixas
+        ]
+        embed.add_field(name="📊 Histograma", value="```\n" + "\n".join(linhas) + "\n```", inline=False)
+        return embed
+
+class SimulacaoView(discord.ui.View):
+    """Botão para cancelar uma simulação em andamento"""
+
+    def __init__(self, simulacao: Simulacao, author_id: int):
+        super().__init__(timeout=None)
+        self.simulacao = simulacao
+        self.author_id = author_id
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
             await interaction.response.send_message(
-                "❌ Ocorreu um erro ao processar sua rolagem. Verifique a notação e tente novamente.",
+                "Apenas quem iniciou a simulação pode cancelá-la.",
                 ephemeral=True
             )
-            print(f"Erro ao processar rolagem: {e}")
+            return False
+        return True
+
+    @discord.ui.button(label="Cancelar", style=discord.ButtonStyle.danger)
+    async def cancelar(self, interaction: discord.Interaction, button: discord.ui.Button):
+        self.simulacao.cancelar()
+        button.disabled = True
+        await interaction.response.edit_message(view=self)
 
 async def setup(bot):
     await bot.add_cog(FunCommands(bot)) 
\ No newline at end of file
@@ -2,121 +2,59 @@ import discord
 from discord.ext import commands
 from discord import app_commands
 from typing import Dict, Any, List, Optional
-import json
-import os
 
-from utils.storage import StorageManager
-from config.settings import FICHAS_FILE, TITULOS_FILE, UserIDs
+from utils.autocomplete import autocomplete_cache
+from utils.name_index import match_names
+from utils.pagination import PaginatedView
+from utils.repository import AmbiguousCharacterError, CharacterTitleManager, DataRepository, TitleRepository
+from config.settings import UserIDs
 
-class TitleRepository:
-    """Repositório para gerenciamento de títulos"""
-    def __init__(self, file_path: str = TITULOS_FILE):
-        self.file_path = file_path
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        """Garante que o arquivo de títulos existe"""
-        os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-        if not os.path.exists(self.file_path):
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump({"titulos": []}, f, ensure_ascii=False, indent=4)
-
-    def get_all_titles(self) -> List[str]:
-        """Carrega a lista de títulos disponíveis"""
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                return data.get("titulos", [])
-        except Exception as e:
-            print(f"Erro ao carregar títulos: {e}")
-            return []
-
-    def save_titles(self, titles: List[str]) -> bool:
-        """Salva a lista de títulos"""
-        try:
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump({"titulos": titles}, f, ensure_ascii=False, indent=4)
-            return True
-        except Exception as e:
-            print(f"Erro ao salvar títulos: {e}")
-            return False
+class TitleManagement(commands.Cog):
+    """Cog para gerenciamento de títulos"""
+    
+    def __init__(self, bot: commands.Bot, data: DataRepository):
+        self.bot = bot
+        self.characters = data.characters
+        self.title_repository = data.titles
+        self.character_title_manager = data.character_titles
 
-class CharacterTitleManager:
-    """Gerenciador de títulos de personagens"""
-    def __init__(self):
-        self.storage = StorageManager(FICHAS_FILE)
+    async def _get_character_choices(self, interaction: discord.Interaction, current: str = "") -> List[app_commands.Choice[str]]:
+        """Retorna os personagens disponíveis que correspondem ao texto digitado"""
+        # Mestres veem todos os personagens; os demais, apenas os seus
+        user_id = None if interaction.user.id in UserIDs.MESTRES else str(interaction.user.id)
 
-    def get_character_titles(self, character_name: str) -> Optional[List[str]]:
-        """Obtém os títulos de um personagem específico"""
-        fichas = self.storage.load()
-        for user_fichas in fichas.values():
-            if character_name.lower() in user_fichas:
-                personagem = user_fichas[character_name.lower()]
-                return personagem.get("titulos", [])
-        return None
+        async def buscar(texto: str, limite: int):
+            encontrados = await self.characters.asearch(texto, user_id=user_id, limit=limite)
+            return [
+                (ficha['key'], app_commands.Choice(
+                    name=f"{ficha['nome']} (Nível {ficha['nivel']} {ficha['classe']})",
+                    value=self.characters.choice_value(ficha['user_id'], ficha['key'])
+                ))
+                for ficha in encontrados
+            ]
 
-    def add_title_to_character(self, character_name: str, title: str) -> bool:
-        """Adiciona um título a um personagem"""
-        fichas = self.storage.load()
-        for user_fichas in fichas.values():
-            if character_name.lower() in user_fichas:
-                personagem = user_fichas[character_name.lower()]
-                if "titulos" not in personagem:
-                    personagem["titulos"] = []
-                if title not in personagem["titulos"]:
-                    personagem["titulos"].append(title)
-                    self.storage.save(fichas)
-                return True
-        return False
+        return await autocomplete_cache.complete(
+            interaction, 'nome_personagem', current, buscar, version=self.characters.version
+        )
 
-    def remove_title_from_character(self, character_name: str, title: str) -> bool:
-        """Remove um título de um personagem"""
-        fichas = self.storage.load()
-        for user_fichas in fichas.values():
-            if character_name.lower() in user_fichas:
-                personagem = user_fichas[character_name.lower()]
-                if "titulos" in personagem and title in personagem["titulos"]:
-                    personagem["titulos"].remove(title)
-                    self.storage.save(fichas)
-                    return True
-        return False
+    async def _get_title_choices(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        """Retorna os títulos do catálogo que correspondem ao texto digitado"""
+        async def buscar(texto: str, limite: int):
+            titulos = await self.title_repository.asearch_titles(texto, limite)
+            return [(titulo, app_commands.Choice(name=titulo, value=titulo)) for titulo in titulos]
 
-class TitleManagement(commands.Cog):
-    """Cog para gerenciamento de títulos"""
-    
-    def __init__(self, bot: commands.Bot):
-        self.bot = bot
-        self.title_repository = TitleRepository()
-        self.character_title_manager = CharacterTitleManager()
+        return await autocomplete_cache.complete(
+            interaction, 'titulo', current, buscar, version=self.title_repository.version
+        )
 
-    def _get_character_choices(self, interaction: discord.Interaction) -> List[app_commands.Choice[str]]:
-        """Retorna a lista de personagens disponíveis para choices"""
-        fichas = self.character_title_manager.storage.load()
-        choices = []
-        
-        # Se for mestre, mostra todos os personagens
-        if interaction.user.id in UserIDs.MESTRES:
-            for user_fichas in fichas.values():
-                for nome_ficha, ficha_data in user_fichas.items():
-                    choices.append(
-                        app_commands.Choice(
-                            name=f"{ficha_data['nome']} (Nível {ficha_data['nivel']} {ficha_data['classe']})",
-                            value=nome_ficha
-                        )
-                    )
-        else:
-            # Se não for mestre, mostra apenas seus personagens
-            user_id = str(interaction.user.id)
-            if user_id in fichas:
-                for nome_ficha, ficha_data in fichas[user_id].items():
-                    choices.append(
-                        app_commands.Choice(
-                            name=f"{ficha_data['nome']} (Nível {ficha_data['nivel']} {ficha_data['classe']})",
-                            value=nome_ficha
-                        )
-                    )
-        
-        return choices
+    async def _send_ambiguous_character(self, interaction: discord.Interaction, erro: AmbiguousCharacterError):
+        """Informa que o nome do personagem se repete entre usuários diferentes"""
+        donos = ", ".join(f"<@{owner}>" for owner in erro.owners)
+        await interaction.response.send_message(
+            f"❌ Há mais de um personagem chamado '{erro.key}' (donos: {donos}). "
+            "Escolha o personagem desejado pelo autocomplete.",
+            ephemeral=True
+        )
 
     @app_commands.command(name="criartitulo", description="Cria um novo título para ser usado (apenas mestres)")
     # @app_commands.default_permissions(administrator=True)
@@ -130,11 +68,8 @@ class TitleManagement(commands.Cog):
             )
             return
         
-        # Carrega títulos existentes
-        titulos = self.title_repository.get_all_titles()
-        
         # Verifica se o título já existe
-        if titulo in titulos:
+        if titulo in await self.title_repository.aget_all_titles():
             await interaction.response.send_message(
                 f"O título '{titulo}' já existe!",
                 ephemeral=True
@@ -142,8 +77,7 @@ class TitleManagement(commands.Cog):
             return
         
         # Adiciona o novo título
-        titulos.append(titulo)
-        if self.title_repository.save_titles(titulos):
+        if await self.title_repository.aadd_title(titulo):
             await interaction.response.send_message(
                 f"✨ Título '{titulo}' criado com sucesso!",
                 ephemeral=True
@@ -166,11 +100,8 @@ class TitleManagement(commands.Cog):
             )
             return
         
-        # Carrega títulos existentes
-        titulos = self.title_repository.get_all_titles()
-        
         # Verifica se o título existe
-        if titulo not in titulos:
+        if titulo not in await self.title_repository.aget_all_titles():
             await interaction.response.send_message(
                 f"O título '{titulo}' não existe!",
                 ephemeral=True
@@ -178,8 +109,7 @@ class TitleManagement(commands.Cog):
             return
         
         # Remove o título
-        titulos.remove(titulo)
-        if self.title_repository.save_titles(titulos):
+        if await self.title_repository.aremove_title(titulo):
             await interaction.response.send_message(
                 f"✨ Título '{titulo}' removido com sucesso!",
                 ephemeral=True
@@ -193,30 +123,16 @@ class TitleManagement(commands.Cog):
     @app_commands.command(name="listatitulos", description="Lista todos os títulos disponíveis")
     async def listar_titulos(self, interaction: discord.Interaction):
         """Lista todos os títulos disponíveis no sistema"""
-        # Carrega títulos existentes
-        titulos = self.title_repository.get_all_titles()
-        
-        if not titulos:
+        view = TitleListView(self.title_repository, interaction.user.id)
+        if not await view.count():
             await interaction.response.send_message(
                 "Não há títulos disponíveis!",
                 ephemeral=True
             )
             return
         
-        # Cria embed para mostrar os títulos
-        embed = discord.Embed(
-            title="𝐓𝐢́𝐭𝐮𝐥𝐨𝐬 𝐃𝐢𝐬𝐩𝐨𝐧𝐢́𝐯𝐞𝐢𝐬",
-            color=discord.Color.dark_purple()
-        )
-        
-        # Adiciona os títulos ao embed
-        embed.add_field(
-            name="Lista de Títulos",
-            value="\n".join(f"• {titulo}" for titulo in titulos),
-            inline=False
-        )
-        
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        # Mostra os títulos em páginas, carregando apenas a página visível
+        await view.send(interaction, ephemeral=True)
 
     @app_commands.command(name="adicionartitulo", description="Adiciona um título a um personagem (apenas mestres)")
     async def adicionar_titulo(
@@ -233,7 +149,13 @@ class TitleManagement(commands.Cog):
             )
             return
 
-        if self.character_title_manager.add_title_to_character(nome_personagem, titulo):
+        try:
+            adicionado = await self.character_title_manager.aadd_title_to_character(nome_personagem, titulo)
+        except AmbiguousCharacterError as e:
+            await self._send_ambiguous_character(interaction, e)
+            return
+
+        if adicionado:
             await interaction.response.send_message(
                 f"✨ Título '{titulo}' adicionado ao personagem '{nome_personagem}'!"
             )
@@ -258,7 +180,13 @@ class TitleManagement(commands.Cog):
             )
             return
 
-        if self.character_title_manager.remove_title_from_character(nome_personagem, titulo):
+        try:
+            removido = await self.character_title_manager.aremove_title_from_character(nome_personagem, titulo)
+        except AmbiguousCharacterError as e:
+            await self._send_ambiguous_character(interaction, e)
+            return
+
+        if removido:
             await interaction.response.send_message(
                 f"✨ Título '{titulo}' removido do personagem '{nome_personagem}'!"
             )
@@ -276,7 +204,7 @@ class TitleManagement(commands.Cog):
         current: str,
     ) -> List[app_commands.Choice[str]]:
         """Autocomplete para nomes de personagens no comando de adicionar título"""
-        return self._get_character_choices(interaction)
+        return await self._get_character_choices(interaction, current)
 
     @adicionar_titulo.autocomplete('titulo')
     async def autocomplete_titulo_adicionar(
@@ -285,12 +213,7 @@ class TitleManagement(commands.Cog):
         current: str,
     ) -> List[app_commands.Choice[str]]:
         """Autocomplete para títulos disponíveis no comando de adicionar título"""
-        titulos = self.title_repository.get_all_titles()
-        return [
-            app_commands.Choice(name=titulo, value=titulo)
-            for titulo in titulos
-            if current.lower() in titulo.lower()
-        ][:25]
+        return await self._get_title_choices(interaction, current)
 
     @remover_titulo.autocomplete('nome_personagem')
     async def autocomplete_personagem_remover(
@@ -299,7 +222,7 @@ class TitleManagement(commands.Cog):
         current: str,
     ) -> List[app_commands.Choice[str]]:
         """Autocomplete para nomes de personagens no comando de remover título"""
-        return self._get_character_choices(interaction)
+        return await self._get_character_choices(interaction, current)
 
     @remover_titulo.autocomplete('titulo')
     async def autocomplete_titulo_remover(
@@ -311,16 +234,22 @@ class TitleManagement(commands.Cog):
         nome_personagem = interaction.namespace.nome_personagem
         if not nome_personagem:
             return []
-        
-        titulos = self.character_title_manager.get_character_titles(nome_personagem)
-        if not titulos:
-            return []
-            
-        return [
-            app_commands.Choice(name=titulo, value=titulo)
-            for titulo in titulos
-            if current.lower() in titulo.lower()
-        ][:25]
+
+        async def buscar(texto: str, limite: int):
+            try:
+                titulos = await self.character_title_manager.aget_character_titles(nome_personagem)
+            except AmbiguousCharacterError:
+                return []
+            return [
+                (titulo, app_commands.Choice(name=titulo, value=titulo))
+                for titulo in match_names(titulos or [], texto, limite)
+            ]
+
+        # Os títulos dependem do personagem já escolhido na outra opção
+        return await autocomplete_cache.complete(
+            interaction, 'titulo', current, buscar,
+            version=self.characters.version, context=nome_personagem.lower()
+        )
 
     @remover_titulo_criado.autocomplete('titulo')
     async def autocomplete_titulo_remover_criado(
@@ -329,12 +258,33 @@ class TitleManagement(commands.Cog):
         current: str,
     ) -> List[app_commands.Choice[str]]:
         """Autocomplete para títulos disponíveis no comando de remover título criado"""
-        titulos = self.title_repository.get_all_titles()
-        return [
-            app_commands.Choice(name=titulo, value=titulo)
-            for titulo in titulos
-            if current.lower() in titulo.lower()
-        ][:25]
+        return await self._get_title_choices(interaction, current)
+
+class TitleListView(PaginatedView):
+    """Lista paginada dos títulos disponíveis"""
+
+    def __init__(self, repository: TitleRepository, author_id: int):
+        super().__init__(author_id, per_page=20)
+        self.repository = repository
+
+    async def count(self) -> int:
+        return await self.repository.acount_titles()
+
+    async def fetch_page(self, offset: int, limit: int) -> List[str]:
+        return await self.repository.apage_titles(offset, limit)
+
+    async def render(self, titulos: List[str]) -> discord.Embed:
+        embed = discord.Embed(
+            title="𝐓𝐢́𝐭𝐮𝐥𝐨𝐬 𝐃𝐢𝐬𝐩𝐨𝐧𝐢́𝐯𝐞𝐢𝐬",
+            color=discord.Color.dark_purple()
+        )
+        embed.add_field(
+            name="Lista de Títulos",
+            value="\n".join(f"• {titulo}" for titulo in titulos) or "Nenhum título nesta página.",
+            inline=False
+        )
+        embed.set_footer(text=f"Página {self.page + 1} de {self.pages}")
+        return embed
 
 async def setup(bot: commands.Bot):
-    await bot.add_cog(TitleManagement(bot)) 
\ No newline at end of file
+    await bot.add_cog(TitleManagement(bot, bot.data)) 
\ No newline at end of file
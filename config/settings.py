@@ -11,7 +11,71 @@ COMMAND_PREFIX = "!"
 
 # Caminhos de arquivo
 FICHAS_FILE = 'data/fichas.json'
+FICHAS_DIR = 'data/fichas'
+JOURNAL_FILE = 'data/fichas.journal'
 TITULOS_FILE = 'data/titulos.json'
+EQUIPMENT_FILE = 'data/equipment.json'
+DATABASE_FILE = 'data/eraldete.db'
+# Projeção com o resumo (dono, nome, nível, classe) de cada ficha, usada nas
+# listagens e no autocomplete dos mecanismos baseados em JSON
+SUMMARY_FILE = 'data/fichas_resumo.json'
+# Hash dos comandos da última sincronização com o Discord, por escopo
+COMMAND_SYNC_FILE = 'data/command_sync.json'
+
+# Mecanismo de armazenamento: "json" (arquivos em data/), "sharded" (um
+# arquivo de fichas por usuário em data/fichas/), "journal" (diário de
+# alterações sobre o fichas.json) ou "sqlite"
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json')
+
+# Tamanho (em bytes) a partir do qual o diário de fichas é compactado
+JOURNAL_MAX_BYTES = int(os.getenv('JOURNAL_MAX_BYTES', str(1024 * 1024)))
+
+# Quantidade de diários arquivados mantidos após as compactações (os mais
+# antigos são apagados; 0 apaga cada diário logo após o snapshot)
+JOURNAL_ARCHIVE_KEEP = int(os.getenv('JOURNAL_ARCHIVE_KEEP', '10'))
+
+# Intervalo (em segundos) entre gravações em segundo plano das fichas
+# (0 grava de forma síncrona a cada alteração)
+FLUSH_INTERVAL = float(os.getenv('FLUSH_INTERVAL', '2'))
+
+# Espera (em segundos) antes de tentar de novo uma gravação em segundo plano
+# que falhou; dobra a cada falha seguida, até FLUSH_RETRY_MAX
+FLUSH_RETRY_BACKOFF = float(os.getenv('FLUSH_RETRY_BACKOFF', '1'))
+FLUSH_RETRY_MAX = float(os.getenv('FLUSH_RETRY_MAX', '60'))
+
+# Número máximo de threads usadas para E/S de disco fora do event loop
+IO_WORKERS = int(os.getenv('IO_WORKERS', '4'))
+
+# Tempo (em segundos) que resultados de autocomplete ficam em cache por usuário
+AUTOCOMPLETE_TTL = float(os.getenv('AUTOCOMPLETE_TTL', '30'))
+
+# Cache de nomes de usuários do Discord: validade (em segundos) e número
+# máximo de buscas simultâneas na API
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '3600'))
+USER_FETCH_CONCURRENCY = int(os.getenv('USER_FETCH_CONCURRENCY', '8'))
+
+# Tempo (em segundos) sem interação após o qual listas paginadas expiram
+PAGINATION_TIMEOUT = float(os.getenv('PAGINATION_TIMEOUT', '180'))
+
+# Quantidade máxima de embeds de fichas mantidos em cache
+EMBED_CACHE_SIZE = int(os.getenv('EMBED_CACHE_SIZE', '512'))
+
+# Quantidade de dados a partir da qual o /rolar mostra um resumo por grupo
+# (contagem de cada face) em vez de uma linha por dado
+ROLL_SUMMARY_THRESHOLD = int(os.getenv('ROLL_SUMMARY_THRESHOLD', '25'))
+
+# Sincronização de comandos de servidores novos: intervalo mínimo (em
+# segundos) entre sincronizações, tentativas após erros e espera base do
+# backoff exponencial
+GUILD_SYNC_INTERVAL = float(os.getenv('GUILD_SYNC_INTERVAL', '2'))
+GUILD_SYNC_MAX_RETRIES = int(os.getenv('GUILD_SYNC_MAX_RETRIES', '5'))
+GUILD_SYNC_BACKOFF = float(os.getenv('GUILD_SYNC_BACKOFF', '5'))
+
+# Simulações de Monte Carlo (/simular): processos usados, tentativas por
+# lote enviado a cada processo e máximo de tentativas por simulação
+SIMULATION_WORKERS = int(os.getenv('SIMULATION_WORKERS', str(os.cpu_count() or 2)))
+SIMULATION_BATCH = int(os.getenv('SIMULATION_BATCH', '250000'))
+MAX_SIMULATION_TRIALS = int(os.getenv('MAX_SIMULATION_TRIALS', '10000000'))
 
 # IDs de usuários especiais
 class UserIDs:
@@ -1,105 +1,266 @@
+import signal
+import os
 import discord
 from discord.ext import commands
 from config.settings import TOKEN, COMMAND_PREFIX, UserIDs
+from utils.repository import DataRepository
+from utils import aio, simulation
+from utils.autocomplete import autocomplete_cache
+from utils.command_sync import CommandSyncState
+from utils.guild_sync import GuildSyncQueue
+from utils.storage import cache_stats, flush_all
+from utils.users import UserNameResolver
 
-# Configuração do bot com todos os intents necessários
-intents = discord.Intents.default()
-intents.message_content = True
-intents.members = True
-bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents)
-
-# Comando para sincronizar os comandos slash
-@bot.tree.command(name="sync", description="Sincroniza os comandos do bot (apenas mestres)")
-async def sync(interaction: discord.Interaction):
-    # Verifica se é um mestre
-    if interaction.user.id not in UserIDs.MESTRES:
-        await interaction.response.send_message(
-            "Você não tem permissão para sincronizar os comandos!",
-            ephemeral=True
-        )
-        return
-    
-    # Tenta sincronizar os comandos
-    try:
-        # Sincroniza globalmente
-        synced = await bot.tree.sync()
-        
-        # Envia mensagem de sucesso
-        await interaction.response.send_message(
-            f"✅ Sincronizados {len(synced)} comandos globalmente!",
-            ephemeral=True
+# Extensões carregadas uma única vez, no setup_hook
+EXTENSIONS = [
+    'cogs.character_management',
+    'cogs.fun_commands',
+    'cogs.equipment_management',
+    'cogs.title_management',
+]
+
+def create_bot() -> commands.Bot:
+    """
+    Cria o bot com a camada de dados, os comandos e os eventos
+
+    Fica em uma função para que importar este módulo não tenha efeitos: os
+    processos de simulação (spawn) reimportam o main.py como __mp_main__ e
+    não podem criar outro bot nem abrir o armazenamento.
+    """
+    # Configuração do bot com todos os intents necessários
+    intents = discord.Intents.default()
+    intents.message_content = True
+    intents.members = True
+    bot = commands.Bot(command_prefix=COMMAND_PREFIX, intents=intents)
+
+    # Camada de dados única, compartilhada por todos os cogs
+    bot.data = DataRepository()
+
+    # Nomes de usuários do Discord, em cache para as telas dos mestres
+    bot.user_names = UserNameResolver(bot)
+
+    # Hashes das sincronizações de comandos, para só sincronizar o que mudou
+    bot.command_sync = CommandSyncState(bot.tree)
+
+    # Fila de sincronização dos servidores em que o bot entra
+    bot.guild_sync = GuildSyncQueue(bot.command_sync)
+
+    # Comando para sincronizar os comandos slash
+    @bot.tree.command(name="sync", description="Sincroniza os comandos do bot (apenas mestres)")
+    @discord.app_commands.describe(forcar="Sincroniza mesmo que nenhum comando tenha mudado")
+    async def sync(interaction: discord.Interaction, forcar: bool = False):
+        # Verifica se é um mestre
+        if interaction.user.id not in UserIDs.MESTRES:
+            await interaction.response.send_message(
+                "Você não tem permissão para sincronizar os comandos!",
+                ephemeral=True
+            )
+            return
+
+        # A sincronização pode passar do prazo de resposta da interação
+        await interaction.response.defer(ephemeral=True)
+        try:
+            # Sincroniza globalmente, apenas se os comandos mudaram (ou se forçado)
+            synced = await bot.command_sync.sync(force=forcar)
+
+            if synced is None:
+                await interaction.followup.send(
+                    "✅ Os comandos já estão sincronizados. Use `forcar: True` para sincronizar mesmo assim.",
+                    ephemeral=True
+                )
+                return
+
+            # Envia mensagem de sucesso
+            await interaction.followup.send(
+                f"✅ Sincronizados {len(synced)} comandos globalmente!\n"
+                f"🌐 Servidores na fila de sincronização: {bot.guild_sync.depth}",
+                ephemeral=True
+            )
+            print(f'Comandos sincronizados por {interaction.user.name} (ID: {interaction.user.id})')
+
+        except Exception as e:
+            # Em caso de erro
+            await interaction.followup.send(
+                f"❌ Erro ao sincronizar comandos: {str(e)}",
+                ephemeral=True
+            )
+            print(f'Erro ao sincronizar comandos: {e}')
+
+    # Comando para consultar os contadores dos caches
+    @bot.tree.command(name="stats", description="Mostra os contadores dos caches do bot (apenas mestres)")
+    async def stats(interaction: discord.Interaction):
+        # Verifica se é um mestre
+        if interaction.user.id not in UserIDs.MESTRES:
+            await interaction.response.send_message(
+                "Você não tem permissão para ver as estatísticas!",
+                ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(title="📊 Estatísticas dos caches", color=discord.Color.blurple())
+
+        # Caches em memória dos nomes de usuários, dos autocompletes e das fichas
+        nomes = bot.user_names.stats()
+        embed.add_field(
+            name="👤 Nomes de usuários",
+            value=(
+                f"Entradas: {nomes['entries']}\n"
+                f"Acertos: {nomes['gateway_hits']} (gateway) + {nomes['hits']} (cache)\n"
+                f"Buscas na API: {nomes['fetches']} ({nomes['failures']} falhas)\n"
+                f"Taxa de acerto: {nomes['hit_rate']:.0%}"
+            ),
+            inline=True
         )
-        print(f'Comandos sincronizados por {interaction.user.name} (ID: {interaction.user.id})')
-        
-    except Exception as e:
-        # Em caso de erro
-        await interaction.response.send_message(
-            f"❌ Erro ao sincronizar comandos: {str(e)}",
-            ephemeral=True
+        autocompletes = autocomplete_cache.stats()
+        embed.add_field(
+            name="🔎 Autocomplete",
+            value=(
+                f"Entradas: {autocompletes['entries']}\n"
+                f"Acertos: {autocompletes['hits']} + {autocompletes['narrowed']} refinados de um prefixo\n"
+                f"Consultas aos dados: {autocompletes['misses']}\n"
+                f"Consultas canceladas: {autocompletes['cancelled']}"
+            ),
+            inline=True
         )
-        print(f'Erro ao sincronizar comandos: {e}')
-
-# Evento executado quando o bot está pronto
-@bot.event
-async def on_ready():
-    print('='*50)
-    print(f'Iniciando {bot.user.name}...')
-    print('='*50)
-    
-    # Carrega as extensões do bot
-    print('\n📂 Carregando extensões...')
-    try:
-        await bot.load_extension('cogs.character_management')
-        print('✅ Extensão character_management carregada')
-        await bot.load_extension('cogs.fun_commands')
-        print('✅ Extensão fun_commands carregada')
-        await bot.load_extension('cogs.equipment_management')
-        print('✅ Extensão equipment_management carregada')
-        await bot.load_extension('cogs.title_management')
-        print('✅ Extensão title_management carregada')
-    except Exception as e:
-        print(f'❌ Erro ao carregar extensões: {e}')
-    
-    # Sincroniza os comandos com o Discord
-    print('\n🔄 Sincronizando comandos...')
-    try:
-        synced = await bot.tree.sync()
-        print(f'✅ {len(synced)} comandos sincronizados:')
-        for cmd in synced:
-            print(f'  • /{cmd.name}: {cmd.description}')
-    except Exception as e:
-        print(f'❌ Erro ao sincronizar comandos: {e}')
-    
-    # Lista todos os servidores conectados
-    print('\n🌐 Servidores conectados:')
-    for guild in bot.guilds:
-        print(f'  • {guild.name}')
-        print(f'    - ID: {guild.id}')
-        print(f'    - Membros: {guild.member_count}')
-        print(f'    - Dono: {guild.owner.name} (ID: {guild.owner.id})')
-    
-    print('\n'+'='*50)
-    print(f'✨ {bot.user.name} está online e pronto!')
-    print('='*50)
-
-# Evento executado quando o bot entra em um novo servidor
-@bot.event
-async def on_guild_join(guild):
-    print('\n'+'='*50)
-    print(f'🎉 Bot entrou em um novo servidor!')
-    print(f'  • Nome: {guild.name}')
-    print(f'  • ID: {guild.id}')
-    print(f'  • Membros: {guild.member_count}')
-    print(f'  • Dono: {guild.owner.name} (ID: {guild.owner.id})')
-    
-    # Sincroniza os comandos com o novo servidor
-    print('\n🔄 Sincronizando comandos com o novo servidor...')
+        fichas = bot.get_cog('CharacterManagement')
+        if fichas is not None:
+            embeds = fichas.embeds.stats()
+            embed.add_field(
+                name="🖼️ Embeds de fichas",
+                value=(
+                    f"Entradas: {embeds['entries']}\n"
+                    f"Acertos: {embeds['hits']}\n"
+                    f"Falhas: {embeds['misses']}"
+                ),
+                inline=True
+            )
+
+        # Um campo por arquivo JSON carregado pelo processo (o embed aceita
+        # no máximo 25 campos, e os shards de fichas podem passar disso)
+        arquivos = sorted(cache_stats().items())
+        for path, contadores in arquivos[:20]:
+            embed.add_field(
+                name=f"💾 {os.path.relpath(path)}",
+                value=(
+                    f"Acertos: {contadores['hits']}\n"
+                    f"Leituras do disco: {contadores['misses']}\n"
+                    f"Gravações: {contadores['writes']}"
+                ),
+                inline=True
+            )
+        if len(arquivos) > 20:
+            embed.set_footer(text=f"... e mais {len(arquivos) - 20} arquivos")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # Executado uma única vez, após o login e antes de conectar ao gateway; o
+    # on_ready, ao contrário, dispara de novo a cada reconexão
+    async def setup_hook():
+        print('='*50)
+        print(f'Iniciando {bot.user.name}...')
+        print('='*50)
+
+        # Carrega as extensões do bot
+        print('\n📂 Carregando extensões...')
+        for extension in EXTENSIONS:
+            try:
+                await bot.load_extension(extension)
+                print(f'✅ Extensão {extension.split(".")[-1]} carregada')
+            except Exception as e:
+                print(f'❌ Erro ao carregar a extensão {extension}: {e}')
+
+        # Sincroniza os comandos com o Discord, se mudaram desde a última vez
+        print('\n🔄 Sincronizando comandos...')
+        try:
+            synced = await bot.command_sync.sync()
+            if synced is None:
+                print('✅ Comandos inalterados desde a última sincronização')
+            else:
+                print(f'✅ {len(synced)} comandos sincronizados:')
+                for cmd in synced:
+                    print(f'  • /{cmd.name}: {cmd.description}')
+        except Exception as e:
+            print(f'❌ Erro ao sincronizar comandos: {e}')
+
+        # Sincronizações de servidores novos rodam em segundo plano
+        bot.guild_sync.start()
+
+    bot.setup_hook = setup_hook
+
+    # Para a fila de sincronização antes de fechar a conexão, para que ela não
+    # chame a API (ou espere um rate limit) com o cliente já encerrando
+    close = bot.close
+
+    async def close_bot():
+        await bot.guild_sync.stop()
+        await close()
+
+    bot.close = close_bot
+
+    # Evento executado quando o bot está pronto (inclusive após reconexões)
+    @bot.event
+    async def on_ready():
+        # Lista todos os servidores conectados
+        print('\n🌐 Servidores conectados:')
+        for guild in bot.guilds:
+            print(f'  • {guild.name}')
+            print(f'    - ID: {guild.id}')
+            print(f'    - Membros: {guild.member_count}')
+            print(f'    - Dono: {guild.owner.name} (ID: {guild.owner.id})')
+
+        print('\n'+'='*50)
+        print(f'✨ {bot.user.name} está online e pronto!')
+        print('='*50)
+
+    # Evento executado quando o bot entra em um novo servidor
+    @bot.event
+    async def on_guild_join(guild):
+        print('\n'+'='*50)
+        print(f'🎉 Bot entrou em um novo servidor!')
+        print(f'  • Nome: {guild.name}')
+        print(f'  • ID: {guild.id}')
+        print(f'  • Membros: {guild.member_count}')
+        print(f'  • Dono: {guild.owner.name} (ID: {guild.owner.id})')
+
+        # Agenda a sincronização dos comandos com o novo servidor
+        if bot.guild_sync.enqueue(guild.id):
+            print(f'\n🔄 Sincronização agendada ({bot.guild_sync.depth} servidores na fila)')
+        else:
+            print(f'\n🔄 Servidor já estava na fila ({bot.guild_sync.depth} servidores na fila)')
+        print('='*50)
+
+    # Evento executado quando o bot sai de um servidor
+    @bot.event
+    async def on_guild_remove(guild):
+        bot.guild_sync.discard(guild.id)
+        # Ao voltar, o servidor precisa ser sincronizado de novo
+        try:
+            await bot.command_sync.forget(guild)
+        except Exception as e:
+            print(f'❌ Erro ao descartar a sincronização do servidor {guild.id}: {e}')
+
+    return bot
+
+# Trata o SIGTERM (docker stop) como um encerramento normal, para que o bot
+# feche a conexão e as alterações pendentes sejam gravadas
+def _handle_sigterm(signum, frame):
+    raise KeyboardInterrupt
+
+def main():
+    bot = create_bot()
+    signal.signal(signal.SIGTERM, _handle_sigterm)
+
+    # Inicia o bot
     try:
-        await bot.tree.sync(guild=guild)
-        print('✅ Comandos sincronizados com sucesso!')
-    except Exception as e:
-        print(f'❌ Erro ao sincronizar comandos: {e}')
-    print('='*50)
-
-# Inicia o bot
-bot.run(TOKEN)
+        bot.run(TOKEN)
+    finally:
+        # Conclui as operações de disco em andamento antes de gravar o que
+        # ainda está pendente no modo write-behind
+        aio.shutdown()
+        bot.data.close()
+        flush_all()
+        # Descarta simulações de dados que ainda não começaram
+        simulation.shutdown()
+
+if __name__ == "__main__":
+    main()
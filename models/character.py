@@ -1,9 +1,32 @@
+# Campos da ficha lidos apenas quando acessados (veja Character.from_dict)
+_CAMPOS_DETALHE = (
+    "atributos", "vida_total", "vida_atual", "pericias",
+    "capacidades", "equipamentos", "titulos"
+)
+
 # Classe que representa a estrutura de dados de um personagem
 class Character:
+    """
+    Ficha de um personagem
+
+    Usa __slots__ em vez de um __dict__ por instância. Fichas criadas por
+    from_dict começam só com o cabeçalho (nome, nivel, classe e versao) e
+    guardam o dicionário de origem; o primeiro acesso a um campo de detalhe
+    preenche todos eles de uma vez, sem copiar as listas do dicionário.
+
+    Sem o __dict__, cada instância ocupa só os slots, e as listas continuam
+    sendo as do dicionário que o armazenamento já mantém. Montar a ficha não
+    calcula a vida nem lê os campos de detalhe quando só o cabeçalho é
+    usado, e a hidratação reaproveita a vida_total gravada.
+    """
+
+    __slots__ = ("nome", "nivel", "classe", "versao", "_dados") + _CAMPOS_DETALHE
+
     def __init__(self, nome: str, nivel: int, classe: str, atributos: dict):
         self.nome = nome
         self.nivel = nivel
         self.classe = classe
+        self._dados = None
         self.atributos = atributos
         self.vida_total = self._calcular_vida()
         self.vida_atual = self.vida_total
@@ -11,6 +34,36 @@ class Character:
         self.capacidades = []
         self.equipamentos = []
         self.titulos = []
+        # Incrementada a cada alteração salva da ficha
+        self.versao = 0
+
+    def __getattr__(self, nome: str):
+        # Chamado apenas para slots ainda não preenchidos
+        if nome in _CAMPOS_DETALHE and self._dados is not None:
+            self._hidratar()
+            return getattr(self, nome)
+        raise AttributeError(f"'Character' object has no attribute '{nome}'")
+
+    def _hidratar(self):
+        """Preenche os campos de detalhe a partir do dicionário de origem"""
+        data, self._dados = self._dados, None
+        # Campos já atribuídos antes da leitura prevalecem sobre os do dicionário
+        if not hasattr(self, "atributos"):
+            self.atributos = data["atributos"]
+        if not hasattr(self, "vida_total"):
+            # Recalcula apenas para fichas antigas, gravadas sem a vida total
+            vida_total = data.get("vida_total")
+            self.vida_total = vida_total if vida_total is not None else self._calcular_vida()
+        if not hasattr(self, "vida_atual"):
+            self.vida_atual = data["vida_atual"]
+        if not hasattr(self, "pericias"):
+            self.pericias = data["pericias"]
+        if not hasattr(self, "capacidades"):
+            self.capacidades = data["capacidades"]
+        if not hasattr(self, "equipamentos"):
+            self.equipamentos = data["equipamentos"]
+        if not hasattr(self, "titulos"):
+            self.titulos = data.get("titulos", [])  # Usa get para compatibilidade com fichas antigas
 
     def _calcular_vida(self) -> int:
         """Calcula a vida total do personagem baseado nos atributos"""
@@ -30,21 +83,17 @@ class Character:
             "pericias": self.pericias,
             "capacidades": self.capacidades,
             "equipamentos": self.equipamentos,
-            "titulos": self.titulos
+            "titulos": self.titulos,
+            "versao": self.versao
         }
 
     @staticmethod
     def from_dict(data: dict) -> 'Character':
-        """Cria um personagem a partir de um dicionário"""
-        char = Character(
-            data["nome"],
-            data["nivel"],
-            data["classe"],
-            data["atributos"]
-        )
-        char.vida_atual = data["vida_atual"]
-        char.pericias = data["pericias"]
-        char.capacidades = data["capacidades"]
-        char.equipamentos = data["equipamentos"]
-        char.titulos = data.get("titulos", [])  # Usa get para compatibilidade com fichas antigas
-        return char 
\ No newline at end of file
+        """Cria um personagem a partir de um dicionário, lendo só o cabeçalho"""
+        char = Character.__new__(Character)
+        char.nome = data["nome"]
+        char.nivel = data["nivel"]
+        char.classe = data["classe"]
+        char.versao = data.get("versao", 0)
+        char._dados = data
+        return char
@@ -0,0 +1,66 @@
+from typing import Optional, Dict, Any
+from datetime import datetime
+
+# Interface para equipamentos
+class IEquipment:
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        pass
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'Equipment':
+        pass
+
+# Classe concreta de equipamento
+class Equipment(IEquipment):
+    # Sem __dict__ por instância: o repositório mantém todos os itens em memória
+    __slots__ = (
+        "name", "type", "description", "damage", "armor", "weight", "value",
+        "properties", "requirements", "created_by", "created_at"
+    )
+
+    def __init__(
+        self,
+        name: str,
+        type: str,
+        description: str,
+        damage: Optional[str] = None,
+        armor: Optional[int] = None,
+        weight: Optional[float] = None,
+        value: Optional[int] = None,
+        properties: Optional[list[str]] = None,
+        requirements: Optional[Dict[str, Any]] = None,
+        created_by: Optional[str] = None,
+        created_at: Optional[str] = None
+    ):
+        self.name = name
+        self.type = type
+        self.description = description
+        self.damage = damage
+        self.armor = armor
+        self.weight = weight
+        self.value = value
+        self.properties = properties or []
+        self.requirements = requirements or {}
+        self.created_by = created_by
+        self.created_at = created_at or datetime.now().isoformat()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "type": self.type,
+            "description": self.description,
+            "damage": self.damage,
+            "armor": self.armor,
+            "weight": self.weight,
+            "value": self.value,
+            "properties": self.properties,
+            "requirements": self.requirements,
+            "created_by": self.created_by,
+            "created_at": self.created_at
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> 'Equipment':
+        return Equipment(**data)
@@ -0,0 +1,19 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from config.settings import IO_WORKERS
+
+# Pool limitado compartilhado por todas as operações de disco, para que
+# leituras, gravações e serialização de JSON nunca bloqueiem o event loop
+_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix='io')
+
+async def run_io(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Executa uma função bloqueante no pool de E/S e aguarda seu resultado"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+
+def shutdown():
+    """Aguarda as operações em andamento e encerra o pool de E/S"""
+    _executor.shutdown(wait=True)
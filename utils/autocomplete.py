@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import OrderedDict
+from operator import itemgetter
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+import discord
+from discord import app_commands
+
+from config.settings import AUTOCOMPLETE_TTL
+from utils.name_index import match_items
+
+# Candidato de autocomplete: (nome usado na comparação, opção exibida)
+Candidate = Tuple[str, app_commands.Choice]
+Fetcher = Callable[[str, int], Awaitable[List[Candidate]]]
+
+class _Entry:
+    """Resultado em cache de uma consulta de autocomplete"""
+    __slots__ = ("candidates", "complete", "version", "expires")
+
+    def __init__(self, candidates: List[Candidate], complete: bool, version: Hashable, expires: float):
+        self.candidates = candidates
+        # True quando a lista contém todos os itens que casam com o texto,
+        # e não apenas os primeiros; só então ela pode ser refinada
+        self.complete = complete
+        self.version = version
+        self.expires = expires
+
+class AutocompleteCache:
+    """
+    Cache de resultados de autocomplete por usuário
+
+    O Discord envia uma interação a cada tecla digitada. Os resultados ficam
+    guardados por (usuário, comando, opção, contexto, texto) durante ttl
+    segundos; quando o texto novo estende um texto já consultado cujo
+    resultado estava completo, a resposta é obtida filtrando esses candidatos
+    em vez de consultar os repositórios. Uma consulta ainda em andamento para
+    o mesmo usuário e opção é cancelada quando chega a tecla seguinte, já que
+    sua resposta não seria mais exibida.
+    """
+
+    def __init__(self, ttl: float = AUTOCOMPLETE_TTL, max_entries: int = 2048):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, _Entry]" = OrderedDict()
+        self._inflight: Dict[Tuple, asyncio.Task] = {}
+        self.hits = 0
+        self.narrowed = 0
+        self.misses = 0
+        self.cancelled = 0
+
+    async def complete(
+        self,
+        interaction: discord.Interaction,
+        option: str,
+        current: str,
+        fetch: Fetcher,
+        version: Hashable = 0,
+        context: Hashable = None,
+        limit: int = 25
+    ) -> List[app_commands.Choice]:
+        """
+        Responde a uma interação de autocomplete
+
+        fetch(texto, limite) consulta os dados e devolve pares (nome, opção);
+        version deve mudar sempre que os dados consultados mudarem, e context
+        distingue resultados que dependem de outras opções já preenchidas.
+        """
+        command = interaction.command.qualified_name if interaction.command else ""
+        slot = (interaction.user.id, command, option)
+
+        # Cancela a consulta anterior deste usuário e opção, se ainda estiver rodando
+        task = asyncio.current_task()
+        previous = self._inflight.get(slot)
+        if previous is not None and previous is not task and not previous.done():
+            previous.cancel()
+            self.cancelled += 1
+        self._inflight[slot] = task
+        try:
+            candidates = await self._lookup(slot + (context,), current, fetch, version, limit)
+        finally:
+            if self._inflight.get(slot) is task:
+                del self._inflight[slot]
+        return [choice for _, choice in candidates]
+
+    async def _lookup(self, base: Tuple, current: str, fetch: Fetcher, version: Hashable, limit: int) -> List[Candidate]:
+        now = time.monotonic()
+        query = current.lower()
+
+        entry = self._get(base + (query,), version, now)
+        if entry is not None:
+            self.hits += 1
+            return entry.candidates[:limit]
+
+        # Procura o maior texto anterior já consultado que seja prefixo do atual
+        for size in range(len(query) - 1, -1, -1):
+            entry = self._get(base + (query[:size],), version, now)
+            if entry is None:
+                continue
+            if entry.complete:
+                self.narrowed += 1
+                candidates = match_items(entry.candidates, query, itemgetter(0), limit)
+                self._put(base + (query,), candidates, True, version, now)
+                return candidates
+            # Um texto mais curto traria ainda mais itens; não adianta continuar
+            break
+
+        self.misses += 1
+        candidates = await fetch(current, limit)
+        self._put(base + (query,), candidates, len(candidates) < limit, version, time.monotonic())
+        return candidates
+
+    def _get(self, key: Tuple, version: Hashable, now: float) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires <= now or entry.version != version:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: Tuple, candidates: List[Candidate], complete: bool, version: Hashable, now: float):
+        self._entries[key] = _Entry(candidates, complete, version, now + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "narrowed": self.narrowed,
+            "misses": self.misses,
+            "cancelled": self.cancelled,
+        }
+
+# Cache compartilhado pelos autocompletes de todos os cogs
+autocomplete_cache = AutocompleteCache()
@@ -0,0 +1,926 @@
+import copy
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Any, List, Optional, Iterator, AsyncIterator, Tuple
+
+from utils.aio import run_io
+from utils.journal import MutationJournal
+from utils.locks import lock_manager
+from utils.storage import StorageManager, file_signature
+from utils.summaries import SummaryProjection
+from config.settings import (
+    DATABASE_FILE, EQUIPMENT_FILE, FICHAS_DIR, FICHAS_FILE, FLUSH_INTERVAL,
+    JOURNAL_FILE, JOURNAL_MAX_BYTES, STORAGE_BACKEND, SUMMARY_FILE, TITULOS_FILE
+)
+
+# Alterações pontuais em uma ficha; retornam True se algo mudou
+def _bump_version(data: Dict[str, Any]):
+    """Incrementa a versão da ficha, usada para invalidar caches de exibição"""
+    data["versao"] = data.get("versao", 0) + 1
+
+def _equip_item(data: Dict[str, Any], item: str) -> bool:
+    equipamentos = data.setdefault("equipamentos", [])
+    if item in equipamentos:
+        return False
+    equipamentos.append(item)
+    _bump_version(data)
+    return True
+
+def _add_title(data: Dict[str, Any], title: str) -> bool:
+    titulos = data.setdefault("titulos", [])
+    if title in titulos:
+        return False
+    titulos.append(title)
+    _bump_version(data)
+    return True
+
+def _remove_title(data: Dict[str, Any], title: str) -> bool:
+    titulos = data.get("titulos", [])
+    if title not in titulos:
+        return False
+    titulos.remove(title)
+    _bump_version(data)
+    return True
+
+# Interface para os mecanismos de armazenamento
+class IStorageBackend:
+    """
+    Interface comum de armazenamento de personagens, equipamentos e títulos
+
+    Personagens são identificados por (user_id, chave), onde a chave é o nome
+    do personagem em minúsculas. Equipamentos são identificados pelo nome,
+    sem diferenciar maiúsculas de minúsculas.
+    """
+
+    # Personagens
+    def iter_characters(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        """Percorre todos os personagens como tuplas (user_id, chave, dados)"""
+        raise NotImplementedError
+
+    def get_character(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        """Retorna os dados de um personagem, ou None se não existir"""
+        raise NotImplementedError
+
+    def iter_character_summaries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre os resumos de todos os personagens, sem carregar as fichas
+
+        Cada resumo tem user_id, key, nome, nivel, classe e updated_at.
+        """
+        raise NotImplementedError
+
+    def save_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        """Cria ou substitui um personagem"""
+        raise NotImplementedError
+
+    def delete_character(self, user_id: str, key: str) -> bool:
+        """Exclui um personagem; retorna False se ele não existir"""
+        raise NotImplementedError
+
+    def replace_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        """
+        Cria ou substitui um personagem com uma versão maior que a anterior
+
+        Assim uma ficha recriada com o mesmo nome nunca reaproveita a versão
+        de uma ficha antiga que ainda esteja em algum cache.
+        """
+        current = self.get_character(user_id, key)
+        data["versao"] = max(data.get("versao", 0), current.get("versao", 0) if current else 0)
+        _bump_version(data)
+        self.save_character(user_id, key, data)
+
+    def update_character(self, user_id: str, key: str, mutate) -> Optional[bool]:
+        """
+        Aplica mutate(dados) a um personagem e persiste se ela retornar True
+
+        Retorna None se o personagem não existir, senão o retorno de mutate.
+        """
+        raise NotImplementedError
+
+    def add_character_equipment(self, user_id: str, key: str, item: str) -> Optional[bool]:
+        """Equipa um item; retorna False se já equipado e None se o personagem não existir"""
+        return self.update_character(user_id, key, lambda data: _equip_item(data, item))
+
+    def add_character_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        """Adiciona um título; retorna False se já presente e None se o personagem não existir"""
+        return self.update_character(user_id, key, lambda data: _add_title(data, title))
+
+    def remove_character_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        """Remove um título; retorna False se ausente e None se o personagem não existir"""
+        return self.update_character(user_id, key, lambda data: _remove_title(data, title))
+
+    # Equipamentos
+    def get_all_equipment(self) -> List[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def get_equipment(self, name: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def add_equipment(self, data: Dict[str, Any]):
+        raise NotImplementedError
+
+    def update_equipment(self, name: str, data: Dict[str, Any]) -> bool:
+        raise NotImplementedError
+
+    def delete_equipment(self, name: str) -> bool:
+        raise NotImplementedError
+
+    # Títulos
+    def get_all_titles(self) -> List[str]:
+        raise NotImplementedError
+
+    def add_title(self, title: str) -> bool:
+        raise NotImplementedError
+
+    def remove_title(self, title: str) -> bool:
+        raise NotImplementedError
+
+    def save_titles(self, titles: List[str]):
+        raise NotImplementedError
+
+    def close(self):
+        """Libera os recursos do mecanismo e grava alterações pendentes"""
+        pass
+
+    # Variantes assíncronas, executadas no pool de E/S
+    async def aget_character(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        return await run_io(self.get_character, user_id, key)
+
+    # As alterações são serializadas pelo lock do personagem afetado
+    async def asave_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        async with lock_manager.character(user_id, key):
+            await run_io(self.replace_character, user_id, key, data)
+
+    async def adelete_character(self, user_id: str, key: str) -> bool:
+        async with lock_manager.character(user_id, key):
+            return await run_io(self.delete_character, user_id, key)
+
+    async def aadd_character_equipment(self, user_id: str, key: str, item: str) -> Optional[bool]:
+        async with lock_manager.character(user_id, key):
+            return await run_io(self.add_character_equipment, user_id, key, item)
+
+    async def aadd_character_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        async with lock_manager.character(user_id, key):
+            return await run_io(self.add_character_title, user_id, key, title)
+
+    async def aremove_character_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        async with lock_manager.character(user_id, key):
+            return await run_io(self.remove_character_title, user_id, key, title)
+
+    async def aiter_character_summaries(self) -> AsyncIterator[Dict[str, Any]]:
+        """Percorre os resumos dos personagens sem bloquear o event loop"""
+        for summary in await run_io(lambda: list(self.iter_character_summaries())):
+            yield summary
+
+# Implementação baseada nos arquivos JSON de data/
+class JsonBackend(IStorageBackend):
+    """
+    Armazenamento nos documentos JSON, lidos e gravados por inteiro
+
+    Os resumos das fichas ficam em uma projeção à parte (summary_file),
+    atualizada a cada alteração e identificada por SUMMARY_KIND, para que
+    mecanismos diferentes não reaproveitem a projeção uns dos outros. Ela é
+    validada pela assinatura das fichas em disco (_summary_signature) e
+    reconstruída quando o fichas.json é editado por fora (_summary_reloads).
+    """
+
+    SUMMARY_KIND = 'json'
+
+    def __init__(
+        self,
+        fichas_file: str = FICHAS_FILE,
+        equipment_file: str = EQUIPMENT_FILE,
+        titulos_file: str = TITULOS_FILE,
+        summary_file: str = SUMMARY_FILE,
+        flush_interval: float = FLUSH_INTERVAL
+    ):
+        self.fichas = StorageManager(fichas_file, flush_interval=flush_interval)
+        self.equipment = StorageManager(equipment_file, flush_interval=flush_interval)
+        self.titulos = StorageManager(titulos_file, flush_interval=flush_interval)
+        self.summaries = SummaryProjection(
+            summary_file, self.SUMMARY_KIND, self.iter_characters, flush_interval=flush_interval,
+            signature=self._summary_signature, reloads=self._summary_reloads
+        )
+        self._lock = threading.RLock()
+
+    # Projeção dos resumos
+    def _summary_signature(self) -> Any:
+        """Assinatura das fichas em disco, gravada como origem da projeção"""
+        return file_signature(self.fichas.file_path)
+
+    def _summary_reloads(self) -> Optional[int]:
+        """Releituras das fichas por edições externas (None se não se aplica)"""
+        self.fichas.load()
+        return self.fichas.reloads
+
+    # Personagens
+    def iter_characters(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        for user_id, user_fichas in list(self.fichas.load().items()):
+            for key, data in list(user_fichas.items()):
+                yield user_id, key, data
+
+    def get_character(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        return self.fichas.load().get(user_id, {}).get(key)
+
+    def iter_character_summaries(self) -> Iterator[Dict[str, Any]]:
+        return self.summaries.iter_summaries()
+
+    # As fichas em cache só são alteradas sob self.fichas.lock, liberado
+    # antes de atualizar a projeção (que pode reler as fichas)
+    def save_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        with self._lock:
+            with self.fichas.lock:
+                fichas = self.fichas.load()
+                fichas.setdefault(user_id, {})[key] = data
+                self.fichas.save(fichas)
+            self.summaries.put(user_id, key, data)
+
+    def delete_character(self, user_id: str, key: str) -> bool:
+        with self._lock:
+            with self.fichas.lock:
+                fichas = self.fichas.load()
+                user_fichas = fichas.get(user_id, {})
+                if key not in user_fichas:
+                    return False
+                del user_fichas[key]
+                if not user_fichas:
+                    fichas.pop(user_id, None)
+                self.fichas.save(fichas)
+            self.summaries.remove(user_id, key)
+            return True
+
+    def update_character(self, user_id: str, key: str, mutate) -> Optional[bool]:
+        with self._lock:
+            with self.fichas.lock:
+                fichas = self.fichas.load()
+                data = fichas.get(user_id, {}).get(key)
+                if data is None:
+                    return None
+                changed = mutate(data)
+                if changed:
+                    self.fichas.save(fichas)
+            if changed:
+                self.summaries.put(user_id, key, data)
+            return changed
+
+    # Equipamentos
+    def _load_equipment(self) -> List[Dict[str, Any]]:
+        equipments = self.equipment.load()
+        return equipments if isinstance(equipments, list) else []
+
+    def get_all_equipment(self) -> List[Dict[str, Any]]:
+        return list(self._load_equipment())
+
+    def get_equipment(self, name: str) -> Optional[Dict[str, Any]]:
+        for eq in self._load_equipment():
+            if eq["name"].lower() == name.lower():
+                return eq
+        return None
+
+    def add_equipment(self, data: Dict[str, Any]):
+        with self._lock, self.equipment.lock:
+            equipments = self._load_equipment()
+            equipments.append(data)
+            self.equipment.save(equipments)
+
+    def update_equipment(self, name: str, data: Dict[str, Any]) -> bool:
+        with self._lock, self.equipment.lock:
+            equipments = self._load_equipment()
+            for i, eq in enumerate(equipments):
+                if eq["name"].lower() == name.lower():
+                    equipments[i] = data
+                    self.equipment.save(equipments)
+                    return True
+            return False
+
+    def delete_equipment(self, name: str) -> bool:
+        with self._lock:
+            equipments = self._load_equipment()
+            remaining = [eq for eq in equipments if eq["name"].lower() != name.lower()]
+            if len(remaining) == len(equipments):
+                return False
+            self.equipment.save(remaining)
+            return True
+
+    # Títulos
+    def get_all_titles(self) -> List[str]:
+        return list(self.titulos.load().get("titulos", []))
+
+    def add_title(self, title: str) -> bool:
+        with self._lock:
+            titles = self.get_all_titles()
+            if title in titles:
+                return False
+            titles.append(title)
+            self.save_titles(titles)
+            return True
+
+    def remove_title(self, title: str) -> bool:
+        with self._lock:
+            titles = self.get_all_titles()
+            if title not in titles:
+                return False
+            titles.remove(title)
+            self.save_titles(titles)
+            return True
+
+    def save_titles(self, titles: List[str]):
+        self.titulos.save({"titulos": titles})
+
+    def close(self):
+        for storage in (self.fichas, self.equipment, self.titulos):
+            storage.flush()
+        # Com as fichas em disco, a projeção pode ser validada no próximo início
+        self.summaries.seal()
+
+# Implementação com um arquivo de fichas por usuário
+class ShardedJsonBackend(JsonBackend):
+    """
+    Armazenamento das fichas em um arquivo por usuário (data/fichas/<id>.json)
+
+    Criar ou alterar uma ficha lê e grava apenas o arquivo do dono, e as
+    listagens carregam os arquivos um a um, à medida que são percorridas.
+    Equipamentos e títulos continuam nos documentos JSON compartilhados.
+    """
+
+    MIGRATION_MARKER = '.migrated'
+    SUMMARY_KIND = 'sharded'
+
+    def __init__(self, fichas_dir: str = FICHAS_DIR, flush_interval: float = FLUSH_INTERVAL, **kwargs):
+        super().__init__(flush_interval=flush_interval, **kwargs)
+        self.fichas_dir = fichas_dir
+        self.flush_interval = flush_interval
+        self._shards: Dict[str, StorageManager] = {}
+        self._shard_locks: Dict[str, threading.RLock] = {}
+        os.makedirs(fichas_dir, exist_ok=True)
+
+    def _summary_signature(self) -> Any:
+        # As gravações atômicas renomeiam os arquivos, o que muda o diretório
+        return file_signature(self.fichas_dir)
+
+    def _summary_reloads(self) -> Optional[int]:
+        # Só os arquivos já carregados; os demais são lidos na reconstrução
+        return sum(shard.reloads for shard in list(self._shards.values()))
+
+    def _shard(self, user_id: str) -> StorageManager:
+        """Retorna o gerenciador do arquivo de fichas de um usuário"""
+        shard = self._shards.get(user_id)
+        if shard is None:
+            with self._lock:
+                shard = self._shards.get(user_id)
+                if shard is None:
+                    shard = StorageManager(
+                        os.path.join(self.fichas_dir, f"{user_id}.json"),
+                        flush_interval=self.flush_interval
+                    )
+                    self._shard_locks[user_id] = threading.RLock()
+                    self._shards[user_id] = shard
+        return shard
+
+    def _shard_lock(self, user_id: str) -> threading.RLock:
+        self._shard(user_id)
+        return self._shard_locks[user_id]
+
+    def iter_user_ids(self) -> Iterator[str]:
+        """Percorre os ids dos usuários que possuem um arquivo de fichas"""
+        with os.scandir(self.fichas_dir) as entries:
+            names = sorted(entry.name for entry in entries if entry.is_file())
+        for name in names:
+            if name.endswith('.json') and not name.startswith('.'):
+                yield name[:-len('.json')]
+
+    # Personagens
+    def iter_characters(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        for user_id in self.iter_user_ids():
+            for key, data in list(self._shard(user_id).load().items()):
+                yield user_id, key, data
+
+    def get_character(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        return self._shard(user_id).load().get(key)
+
+    def save_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        with self._shard_lock(user_id):
+            shard = self._shard(user_id)
+            with shard.lock:
+                fichas = shard.load()
+                fichas[key] = data
+                shard.save(fichas)
+            self.summaries.put(user_id, key, data)
+
+    def delete_character(self, user_id: str, key: str) -> bool:
+        with self._shard_lock(user_id):
+            shard = self._shard(user_id)
+            with shard.lock:
+                fichas = shard.load()
+                if key not in fichas:
+                    return False
+                del fichas[key]
+                shard.save(fichas)
+            self.summaries.remove(user_id, key)
+            return True
+
+    def update_character(self, user_id: str, key: str, mutate) -> Optional[bool]:
+        with self._shard_lock(user_id):
+            shard = self._shard(user_id)
+            with shard.lock:
+                fichas = shard.load()
+                data = fichas.get(key)
+                if data is None:
+                    return None
+                changed = mutate(data)
+                if changed:
+                    shard.save(fichas)
+            if changed:
+                self.summaries.put(user_id, key, data)
+            return changed
+
+    # Migração
+    def migrate_from_json(self, source: JsonBackend):
+        """Divide, uma única vez, o fichas.json em um arquivo por usuário"""
+        marker = os.path.join(self.fichas_dir, self.MIGRATION_MARKER)
+        if os.path.exists(marker):
+            return
+        por_usuario: Dict[str, Dict[str, Any]] = {}
+        for user_id, key, data in source.iter_characters():
+            por_usuario.setdefault(user_id, {})[key] = data
+        for user_id, fichas in por_usuario.items():
+            shard = self._shard(user_id)
+            if not os.path.exists(shard.file_path):
+                shard.save(fichas)
+                shard.flush()
+        with open(marker, 'w', encoding='utf-8') as f:
+            f.write(str(len(por_usuario)))
+        # Os arquivos foram gravados sem passar por save_character
+        self.summaries.rebuild()
+
+    def close(self):
+        # Grava os arquivos das fichas antes de selar a projeção
+        for shard in list(self._shards.values()):
+            shard.flush()
+        super().close()
+
+# Implementação com diário de alterações sobre o snapshot fichas.json
+class JournaledJsonBackend(JsonBackend):
+    """
+    Armazenamento das fichas em memória, persistido por um diário de alterações
+
+    Cada alteração anexa uma linha pequena ao diário em vez de regravar o
+    fichas.json. Ao iniciar, o diário é reaplicado sobre o snapshot; quando
+    passa de compact_threshold bytes, uma thread grava um novo snapshot e
+    arquiva o diário. As operações são idempotentes, então reaplicar entradas
+    que já estão no snapshot (queda durante a compactação) é seguro.
+    """
+
+    _MUTATIONS = {
+        "add_equipment": _equip_item,
+        "add_title": _add_title,
+        "remove_title": _remove_title,
+    }
+
+    SUMMARY_KIND = 'journal'
+
+    def __init__(
+        self,
+        journal_file: str = JOURNAL_FILE,
+        compact_threshold: int = JOURNAL_MAX_BYTES,
+        **kwargs
+    ):
+        super().__init__(**kwargs)
+        self.compact_threshold = compact_threshold
+        self._compacting = False
+        self._fichas = self.fichas.load()
+        self.journal = MutationJournal(journal_file)
+        for entry in self.journal.entries():
+            self._apply(entry)
+        if self.journal.has_pending():
+            # Queda durante a compactação: as fichas reaplicadas já contêm tudo
+            self._write_snapshot(copy.deepcopy(self._fichas))
+            self.journal.archive()
+        self._maybe_compact()
+
+    def _summary_signature(self) -> Any:
+        return [file_signature(self.fichas.file_path), file_signature(self.journal.file_path)]
+
+    def _summary_reloads(self) -> Optional[int]:
+        # As fichas ficam em memória; o snapshot não é relido com o bot rodando
+        return None
+
+    def _apply(self, entry: Dict[str, Any]) -> Optional[bool]:
+        """
+        Aplica uma entrada do diário às fichas em memória e à projeção
+
+        Na reaplicação ao iniciar, a projeção usa o horário gravado na entrada.
+        """
+        op, user_id, key = entry["op"], entry["user"], entry["key"]
+        if op == "set_character":
+            self._fichas.setdefault(user_id, {})[key] = entry["data"]
+            self.summaries.put(user_id, key, entry["data"], entry.get("ts"))
+            return True
+
+        user_fichas = self._fichas.get(user_id, {})
+        if op == "delete_character":
+            removed = user_fichas.pop(key, None) is not None
+            if not user_fichas:
+                self._fichas.pop(user_id, None)
+            if removed:
+                self.summaries.remove(user_id, key)
+            return removed
+
+        data = user_fichas.get(key)
+        if data is None:
+            return None
+        changed = self._MUTATIONS[op](data, entry["value"])
+        if changed:
+            self.summaries.put(user_id, key, data, entry.get("ts"))
+        return changed
+
+    def _preview(self, entry: Dict[str, Any]) -> Optional[bool]:
+        """Resultado que _apply teria, sem alterar as fichas"""
+        op, user_id, key = entry["op"], entry["user"], entry["key"]
+        if op == "set_character":
+            return True
+        data = self._fichas.get(user_id, {}).get(key)
+        if op == "delete_character":
+            return data is not None
+        if data is None:
+            return None
+        return self._MUTATIONS[op](copy.deepcopy(data), entry["value"])
+
+    def _record(self, entry: Dict[str, Any]) -> Optional[bool]:
+        """
+        Anexa uma alteração ao diário, se ela tiver efeito, e só então a aplica
+
+        Se a gravação no diário falhar, a exceção sobe e nada muda em memória.
+        """
+        with self._lock:
+            result = self._preview(entry)
+            if result:
+                self.journal.append(entry)
+                self._apply(entry)
+        self._maybe_compact()
+        return result
+
+    def _maybe_compact(self):
+        """Dispara a compactação em segundo plano se o diário passou do limite"""
+        with self._lock:
+            if self._compacting or self.journal.size() < self.compact_threshold:
+                return
+            self._compacting = True
+        threading.Thread(target=self.compact, name='journal-compact', daemon=True).start()
+
+    def _write_snapshot(self, fichas: Dict[str, Any]):
+        """Grava o snapshot das fichas e a projeção, que não é reaplicada de diários arquivados"""
+        self.fichas.save(fichas)
+        self.fichas.flush()
+        self.summaries.flush()
+
+    def compact(self):
+        """
+        Grava o snapshot atual das fichas e arquiva o diário
+
+        Sob o lock, apenas copia as fichas e separa o diário; a gravação do
+        snapshot acontece fora dele, sem bloquear as alterações, que seguem
+        para o diário novo.
+        """
+        try:
+            with self._lock:
+                copia = copy.deepcopy(self._fichas)
+                # Se a última compactação falhou, o diário separado continua
+                # pendente e a cópia já cobre também o diário atual
+                if not self.journal.has_pending():
+                    self.journal.rotate()
+            self._write_snapshot(copia)
+            self.journal.archive()
+        except Exception as e:
+            print(f"Erro ao compactar o diário de fichas: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    # Personagens
+    def iter_characters(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        for user_id, user_fichas in list(self._fichas.items()):
+            for key, data in list(user_fichas.items()):
+                yield user_id, key, data
+
+    def get_character(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        return self._fichas.get(user_id, {}).get(key)
+
+    def save_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        self._record({"op": "set_character", "user": user_id, "key": key, "data": data})
+
+    def delete_character(self, user_id: str, key: str) -> bool:
+        return bool(self._record({"op": "delete_character", "user": user_id, "key": key}))
+
+    def update_character(self, user_id: str, key: str, mutate) -> Optional[bool]:
+        # Alterações arbitrárias são registradas como a ficha completa; a
+        # cópia só substitui a ficha depois de gravada no diário
+        with self._lock:
+            data = self.get_character(user_id, key)
+            if data is None:
+                return None
+            alterada = copy.deepcopy(data)
+            changed = mutate(alterada)
+            if changed:
+                self.journal.append({"op": "set_character", "user": user_id, "key": key, "data": alterada})
+                data.clear()
+                data.update(alterada)
+                self.summaries.put(user_id, key, data)
+        self._maybe_compact()
+        return changed
+
+    def add_character_equipment(self, user_id: str, key: str, item: str) -> Optional[bool]:
+        return self._record({"op": "add_equipment", "user": user_id, "key": key, "value": item})
+
+    def add_character_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        return self._record({"op": "add_title", "user": user_id, "key": key, "value": title})
+
+    def remove_character_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        return self._record({"op": "remove_title", "user": user_id, "key": key, "value": title})
+
+    def close(self):
+        with self._lock:
+            self.journal.close()
+        super().close()
+
+# Implementação em SQLite, com uma linha por personagem e por equipamento
+class SqliteBackend(IStorageBackend):
+    """
+    Armazenamento em um banco SQLite (modo WAL)
+
+    Cada personagem e cada equipamento ocupa uma linha, então equipar um item
+    ou adicionar um título atualiza apenas a linha do personagem afetado.
+    A tabela character_summaries é a projeção dos resumos das fichas, mantida
+    por triggers na mesma transação de cada alteração.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS characters (
+            user_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (user_id, key)
+        );
+        CREATE INDEX IF NOT EXISTS idx_characters_key ON characters (key);
+        CREATE TABLE IF NOT EXISTS character_summaries (
+            user_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            nome TEXT NOT NULL,
+            nivel INTEGER NOT NULL,
+            classe TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            PRIMARY KEY (user_id, key)
+        );
+        CREATE TRIGGER IF NOT EXISTS trg_characters_insert AFTER INSERT ON characters BEGIN
+            INSERT INTO character_summaries (user_id, key, nome, nivel, classe, updated_at)
+            VALUES (
+                NEW.user_id, NEW.key, json_extract(NEW.data, '$.nome'), json_extract(NEW.data, '$.nivel'),
+                json_extract(NEW.data, '$.classe'), strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')
+            )
+            ON CONFLICT (user_id, key) DO UPDATE SET
+                nome = excluded.nome, nivel = excluded.nivel,
+                classe = excluded.classe, updated_at = excluded.updated_at;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_characters_update AFTER UPDATE OF data ON characters BEGIN
+            INSERT INTO character_summaries (user_id, key, nome, nivel, classe, updated_at)
+            VALUES (
+                NEW.user_id, NEW.key, json_extract(NEW.data, '$.nome'), json_extract(NEW.data, '$.nivel'),
+                json_extract(NEW.data, '$.classe'), strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime')
+            )
+            ON CONFLICT (user_id, key) DO UPDATE SET
+                nome = excluded.nome, nivel = excluded.nivel,
+                classe = excluded.classe, updated_at = excluded.updated_at;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_characters_delete AFTER DELETE ON characters BEGIN
+            DELETE FROM character_summaries WHERE user_id = OLD.user_id AND key = OLD.key;
+        END;
+        CREATE TABLE IF NOT EXISTS equipment (
+            name_key TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS titles (
+            title TEXT PRIMARY KEY
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, db_file: str = DATABASE_FILE):
+        directory = os.path.dirname(db_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.db_file = db_file
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(self.SCHEMA)
+        self._backfill_summaries()
+
+    def _backfill_summaries(self):
+        """Preenche, uma única vez, a projeção de bancos criados antes dela"""
+        with self._lock:
+            if self._query("SELECT 1 FROM meta WHERE key = 'summaries_built'"):
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO character_summaries "
+                    "(user_id, key, nome, nivel, classe, updated_at) "
+                    "SELECT user_id, key, json_extract(data, '$.nome'), json_extract(data, '$.nivel'), "
+                    "json_extract(data, '$.classe'), strftime('%Y-%m-%dT%H:%M:%S', 'now', 'localtime') "
+                    "FROM characters"
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('summaries_built', datetime('now'))"
+                )
+                self._conn.execute("COMMIT")
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _execute(self, sql: str, params: tuple = ()) -> int:
+        """Executa um comando de escrita e retorna o número de linhas afetadas"""
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    # Personagens
+    def iter_characters(self) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+        for user_id, key, data in self._query(
+            "SELECT user_id, key, data FROM characters ORDER BY rowid"
+        ):
+            yield user_id, key, json.loads(data)
+
+    def get_character(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        rows = self._query(
+            "SELECT data FROM characters WHERE user_id = ? AND key = ?",
+            (user_id, key)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    def iter_character_summaries(self) -> Iterator[Dict[str, Any]]:
+        for user_id, key, nome, nivel, classe, updated_at in self._query(
+            "SELECT user_id, key, nome, nivel, classe, updated_at FROM character_summaries"
+        ):
+            yield {
+                "user_id": user_id,
+                "key": key,
+                "nome": nome,
+                "nivel": nivel,
+                "classe": classe,
+                "updated_at": updated_at,
+            }
+
+    def save_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        self._execute(
+            "INSERT INTO characters (user_id, key, data) VALUES (?, ?, ?) "
+            "ON CONFLICT (user_id, key) DO UPDATE SET data = excluded.data",
+            (user_id, key, json.dumps(data, ensure_ascii=False))
+        )
+
+    def delete_character(self, user_id: str, key: str) -> bool:
+        return self._execute(
+            "DELETE FROM characters WHERE user_id = ? AND key = ?",
+            (user_id, key)
+        ) > 0
+
+    def update_character(self, user_id: str, key: str, mutate) -> Optional[bool]:
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self._conn.execute(
+                    "SELECT data FROM characters WHERE user_id = ? AND key = ?",
+                    (user_id, key)
+                ).fetchall()
+                if not rows:
+                    self._conn.execute("ROLLBACK")
+                    return None
+                data = json.loads(rows[0][0])
+                changed = mutate(data)
+                if changed:
+                    self._conn.execute(
+                        "UPDATE characters SET data = ? WHERE user_id = ? AND key = ?",
+                        (json.dumps(data, ensure_ascii=False), user_id, key)
+                    )
+                self._conn.execute("COMMIT")
+                return changed
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Equipamentos
+    def get_all_equipment(self) -> List[Dict[str, Any]]:
+        return [
+            json.loads(data)
+            for (data,) in self._query("SELECT data FROM equipment ORDER BY rowid")
+        ]
+
+    def get_equipment(self, name: str) -> Optional[Dict[str, Any]]:
+        rows = self._query("SELECT data FROM equipment WHERE name_key = ?", (name.lower(),))
+        return json.loads(rows[0][0]) if rows else None
+
+    def add_equipment(self, data: Dict[str, Any]):
+        self._execute(
+            "INSERT INTO equipment (name_key, data) VALUES (?, ?)",
+            (data["name"].lower(), json.dumps(data, ensure_ascii=False))
+        )
+
+    def update_equipment(self, name: str, data: Dict[str, Any]) -> bool:
+        return self._execute(
+            "UPDATE equipment SET name_key = ?, data = ? WHERE name_key = ?",
+            (data["name"].lower(), json.dumps(data, ensure_ascii=False), name.lower())
+        ) > 0
+
+    def delete_equipment(self, name: str) -> bool:
+        return self._execute("DELETE FROM equipment WHERE name_key = ?", (name.lower(),)) > 0
+
+    # Títulos
+    def get_all_titles(self) -> List[str]:
+        return [title for (title,) in self._query("SELECT title FROM titles ORDER BY rowid")]
+
+    def add_title(self, title: str) -> bool:
+        return self._execute("INSERT OR IGNORE INTO titles (title) VALUES (?)", (title,)) > 0
+
+    def remove_title(self, title: str) -> bool:
+        return self._execute("DELETE FROM titles WHERE title = ?", (title,)) > 0
+
+    def save_titles(self, titles: List[str]):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("DELETE FROM titles")
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO titles (title) VALUES (?)",
+                    [(title,) for title in titles]
+                )
+                self._conn.execute("COMMIT")
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    # Migração
+    def is_migrated(self) -> bool:
+        return bool(self._query("SELECT 1 FROM meta WHERE key = 'json_migrated'"))
+
+    def migrate_from_json(self, source: JsonBackend):
+        """Importa, uma única vez, os dados dos arquivos JSON para o banco"""
+        with self._lock:
+            if self.is_migrated():
+                return
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO characters (user_id, key, data) VALUES (?, ?, ?)",
+                    [
+                        (user_id, key, json.dumps(data, ensure_ascii=False))
+                        for user_id, key, data in source.iter_characters()
+                    ]
+                )
+                # Nomes repetidos mantêm o primeiro, como na busca do JSON
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO equipment (name_key, data) VALUES (?, ?)",
+                    [
+                        (eq["name"].lower(), json.dumps(eq, ensure_ascii=False))
+                        for eq in source.get_all_equipment()
+                    ]
+                )
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO titles (title) VALUES (?)",
+                    [(title,) for title in source.get_all_titles()]
+                )
+                self._conn.execute(
+                    "INSERT INTO meta (key, value) VALUES ('json_migrated', datetime('now'))"
+                )
+                self._conn.execute("COMMIT")
+            except:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+def create_backend(kind: str = STORAGE_BACKEND) -> IStorageBackend:
+    """Cria o mecanismo de armazenamento configurado"""
+    if kind == 'json':
+        return JsonBackend()
+    if kind == 'sqlite':
+        backend = SqliteBackend()
+        # Na primeira execução importa os dados existentes em data/*.json
+        backend.migrate_from_json(JsonBackend())
+        return backend
+    if kind == 'journal':
+        return JournaledJsonBackend()
+    if kind == 'sharded':
+        backend = ShardedJsonBackend()
+        backend.migrate_from_json(JsonBackend())
+        return backend
+    raise ValueError(f"Mecanismo de armazenamento desconhecido: {kind}")
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+import json
+from typing import List, Optional
+
+import discord
+from discord import app_commands
+
+from config.settings import COMMAND_SYNC_FILE
+from utils.storage import StorageManager
+
+class CommandSyncState:
+    """
+    Sincronização da árvore de comandos apenas quando ela muda
+
+    Calcula um hash estável das assinaturas dos comandos (o mesmo payload
+    enviado ao Discord) e o compara com o hash da última sincronização do
+    mesmo escopo (global ou um servidor), persistido em disco. Assim
+    reinícios e reconexões não gastam o limite de sincronizações quando
+    nenhum comando mudou.
+    """
+
+    def __init__(self, tree: app_commands.CommandTree, file_path: str = COMMAND_SYNC_FILE):
+        self.tree = tree
+        self.storage = StorageManager(file_path)
+        # Serializa as leituras-alterações-gravações do arquivo de hashes
+        self._lock = asyncio.Lock()
+
+    def _scope(self, guild: Optional[discord.abc.Snowflake]) -> str:
+        # Inclui a aplicação, para que trocar o token não aproveite hashes antigos
+        escopo = "global" if guild is None else str(guild.id)
+        return f"{self.tree.client.application_id}:{escopo}"
+
+    def compute_hash(self, guild: Optional[discord.abc.Snowflake] = None) -> str:
+        """Hash das assinaturas dos comandos de um escopo"""
+        payload = sorted(
+            (command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)),
+            key=lambda command: (command.get("type", 1), command["name"])
+        )
+        serializado = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+    async def sync(
+        self,
+        guild: Optional[discord.abc.Snowflake] = None,
+        force: bool = False
+    ) -> Optional[List[app_commands.AppCommand]]:
+        """
+        Sincroniza um escopo se o hash mudou (ou se force for True)
+
+        Retorna os comandos sincronizados, ou None se nada mudou desde a
+        última sincronização.
+        """
+        digest = self.compute_hash(guild)
+        hashes = await self.storage.aload()
+        if not force and hashes.get(self._scope(guild)) == digest:
+            return None
+
+        synced = await self.tree.sync(guild=guild)
+
+        async with self._lock:
+            hashes = dict(await self.storage.aload())
+            hashes[self._scope(guild)] = digest
+            await self.storage.asave(hashes)
+        return synced
+
+    async def forget(self, guild: discord.abc.Snowflake):
+        """Descarta o hash de um servidor, para que a próxima entrada sincronize de novo"""
+        async with self._lock:
+            hashes = dict(await self.storage.aload())
+            if hashes.pop(self._scope(guild), None) is not None:
+                await self.storage.asave(hashes)
@@ -1,7 +1,15 @@
-from typing import List, Tuple, Dict
+from collections import Counter
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 import random
 import re
 
+# NumPy é opcional: acelera rolagens grandes, mas o bot funciona sem ele
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 def calcular_dado(nivel_atributo: int) -> str:
     """
     Calcula o dado baseado no nível do atributo
@@ -23,9 +31,182 @@ def calcular_dado(nivel_atributo: int) -> str:
         return f"{dado}+{bonus}"
     return dado 
 
+# Limites de uma expressão de dados
+MAX_DADOS = 100_000
+MAX_FACES = 65_536
+MAX_GRUPOS = 20
+
+# Grupos com até esta quantidade de dados guardam cada resultado; acima
+# dela, são rolados em lote e guardam apenas a contagem de cada face
+LIMITE_INDIVIDUAL = 100
+
+# Máximo de vezes que um mesmo dado explosivo pode ser rolado de novo
+MAX_EXPLOSOES = 100
+
+class DiceGroup(NamedTuple):
+    """
+    Grupo de dados iguais de uma expressão (exemplo: o 2d20 de 2d20+5)
+
+    explosivo: um dado que tira o valor máximo é rolado de novo e somado.
+    manter: quantos dados entram na soma (positivo: os maiores, negativo:
+    os menores, 0: todos).
+    """
+    sinal: int
+    quantidade: int
+    faces: int
+    explosivo: bool = False
+    manter: int = 0
+
+    @property
+    def tem_regras(self) -> bool:
+        return self.explosivo or self.manter != 0
+
+    @property
+    def notacao(self) -> str:
+        notacao = f"{'-' if self.sinal < 0 else ''}{self.quantidade}d{self.faces}"
+        if self.explosivo:
+            notacao += "!"
+        if self.manter:
+            notacao += f"kh{self.manter}" if self.manter > 0 else f"kl{-self.manter}"
+        return notacao
+
+class DiceExpression(NamedTuple):
+    """
+    Expressão de dados compilada
+
+    Guarda os grupos de dados na ordem em que aparecem e a soma de todas as
+    constantes, já com sinal, de forma que rolar a expressão não exija
+    nenhuma análise de texto.
+    """
+    notacao: str
+    grupos: Tuple[DiceGroup, ...]
+    modificador: int
+
+# Um token por casamento: número, "d", regra de grupo ("!", "kh", "kl" ou
+# "k") ou operador; qualquer outro caractere cai no último grupo e é rejeitado
+_TOKEN = re.compile(r"(\d+)|(d)|(!|kh|kl|k)|([+\-,])|(.)")
+
+def _tokenize(notation: str) -> Iterator[Tuple[str, str]]:
+    for match in _TOKEN.finditer(notation):
+        numero, dado, regra, operador, invalido = match.groups()
+        if numero is not None:
+            yield "num", numero
+        elif dado is not None:
+            yield "d", dado
+        elif regra is not None:
+            yield "regra", regra
+        elif operador is not None:
+            yield "op", operador
+        else:
+            raise ValueError(f"Caractere inválido na notação: '{invalido}'")
+
+def normalizar_notacao(notation: str) -> str:
+    """Forma canônica da notação: minúsculas e sem espaços"""
+    return "".join(notation.lower().split())
+
+@lru_cache(maxsize=1024)
+def _compilar(notacao: str) -> DiceExpression:
+    grupos = []
+    modificador = 0
+    sinal = 1
+    esperando_termo = True
+    tokens = list(_tokenize(notacao))
+    i = 0
+
+    while i < len(tokens):
+        tipo, valor = tokens[i]
+        if tipo == "op":
+            if not esperando_termo:
+                # Vírgula separa rolagens, que são somadas como em "+"
+                sinal = -1 if valor == "-" else 1
+                esperando_termo = True
+            elif valor == "-":
+                sinal = -sinal
+            else:
+                raise ValueError(f"Operador '{valor}' fora de lugar")
+            i += 1
+            continue
+
+        if not esperando_termo:
+            raise ValueError("Falta um operador entre os termos")
+
+        quantidade = None
+        if tipo == "num":
+            quantidade = int(valor)
+            i += 1
+            if i >= len(tokens) or tokens[i][0] != "d":
+                modificador += sinal * quantidade
+                esperando_termo = False
+                continue
+
+        # Grupo de dados: [quantidade]d<faces>
+        if tokens[i][0] != "d":
+            raise ValueError(f"Termo inválido na notação: '{tokens[i][1]}'")
+        i += 1
+        if i >= len(tokens) or tokens[i][0] != "num":
+            raise ValueError("Informe o número de faces após o 'd'")
+        faces = int(tokens[i][1])
+        i += 1
+        quantidade = 1 if quantidade is None else quantidade
+
+        # Regras opcionais do grupo: "!" (explosivo) e "kh<n>"/"kl<n>" (manter)
+        explosivo = False
+        manter = 0
+        while i < len(tokens) and tokens[i][0] == "regra":
+            regra = tokens[i][1]
+            i += 1
+            if regra == "!":
+                if explosivo:
+                    raise ValueError("Regra '!' repetida")
+                explosivo = True
+                continue
+            if manter:
+                raise ValueError("Use apenas uma regra de manter dados por grupo")
+            if i >= len(tokens) or tokens[i][0] != "num":
+                raise ValueError(f"Informe quantos dados manter após '{regra}'")
+            manter = int(tokens[i][1])
+            i += 1
+            if not 1 <= manter <= quantidade:
+                raise ValueError("A quantidade de dados mantidos deve estar entre 1 e a de dados rolados")
+            manter = -manter if regra == "kl" else manter
+
+        if quantidade < 1 or faces < 1:
+            raise ValueError("A quantidade de dados e de faces deve ser ao menos 1")
+        if quantidade > MAX_DADOS:
+            raise ValueError(f"Máximo de {MAX_DADOS} dados permitido")
+        if faces > MAX_FACES:
+            raise ValueError(f"Máximo de {MAX_FACES} faces permitido")
+        if explosivo and faces < 2:
+            raise ValueError("Dados explosivos precisam de ao menos 2 faces")
+        if (explosivo or manter) and quantidade > LIMITE_INDIVIDUAL:
+            raise ValueError(f"Grupos com regras aceitam no máximo {LIMITE_INDIVIDUAL} dados")
+        grupos.append(DiceGroup(sinal, quantidade, faces, explosivo, manter))
+        if len(grupos) > MAX_GRUPOS:
+            raise ValueError(f"Máximo de {MAX_GRUPOS} grupos de dados permitido")
+        esperando_termo = False
+
+    if esperando_termo:
+        raise ValueError("Notação de dados incompleta")
+    if not grupos:
+        raise ValueError("Notação de dados inválida")
+    return DiceExpression(notacao, tuple(grupos), modificador)
+
+def compilar_notacao(notation: str) -> DiceExpression:
+    """
+    Compila uma notação de dados (exemplo: 2d20+1d6-3, 1d20,2d8, 4d6kh3)
+
+    Aceita somas e diferenças de qualquer número de grupos de dados e
+    constantes; vírgulas separam rolagens somadas no total. Cada grupo pode
+    ser explosivo ("3d6!") e manter só os maiores ou menores dados
+    ("4d6kh3", "2d20kl1"). O resultado fica
+    em cache pela notação normalizada, então rolagens frequentes não são
+    analisadas de novo.
+    """
+    return _compilar(normalizar_notacao(notation))
+
 def parse_dice_notation(notation: str) -> Tuple[int, int, int]:
     """
-    Analisa a notação de dados (exemplo: 2d20+5)
+    Analisa a notação de um único grupo de dados (exemplo: 2d20+5)
     
     Args:
         notation: String com a notação de dados
@@ -33,24 +214,13 @@ def parse_dice_notation(notation: str) -> Tuple[int, int, int]:
     Returns:
         Tupla com (quantidade_dados, faces, modificador)
     """
-    pattern = r'^(\d+)?d(\d+)([+-]\d+)?$'
-    match = re.match(pattern, notation.lower().replace(' ', ''))
-    
-    if not match:
+    expressao = compilar_notacao(notation)
+    if len(expressao.grupos) != 1 or expressao.grupos[0].sinal < 0:
         raise ValueError("Notação de dados inválida")
-    
-    quantidade = int(match.group(1)) if match.group(1) else 1
-    faces = int(match.group(2))
-    modificador = int(match.group(3)) if match.group(3) else 0
-    
-    if quantidade > 100:
-        raise ValueError("Máximo de 100 dados permitido")
-    if faces > 1000:
-        raise ValueError("Máximo de 1000 faces permitido")
-        
-    return quantidade, faces, modificador
+    grupo = expressao.grupos[0]
+    return grupo.quantidade, grupo.faces, expressao.modificador
 
-def parse_multiple_dice_notation(notation: str) -> List[Tuple[int, int, int]]:
+def parse_multiple_dice_notation(notation: str) -> List[Tuple[int, int, int, int]]:
     """
     Analisa múltiplas notações de dados separadas por vírgula ou mais
     
@@ -58,91 +228,338 @@ def parse_multiple_dice_notation(notation: str) -> List[Tuple[int, int, int]]:
         notation: String com as notações de dados (exemplo: 2d20+5,1d6 ou 1d20+1d6)
         
     Returns:
-        Lista de tuplas com (quantidade_dados, faces, modificador)
+        Lista de tuplas com (quantidade_dados, faces, modificador, sinal),
+        com o modificador total no último grupo. A quantidade é sempre
+        positiva; o sinal (1 ou -1, como nos grupos de rolar_expressao)
+        indica se o grupo é somado ou subtraído, como o 1d4 em 1d20-1d4
     """
-    # Primeiro, procura por dados (padrão XdY)
-    dice_pattern = r'\d*d\d+'
-    dice_matches = re.finditer(dice_pattern, notation)
-    
-    # Extrai as posições dos dados encontrados
-    dados = []
-    last_end = 0
-    modificador_total = 0
-    
-    for match in dice_matches:
-        start, end = match.span()
-        
-        # Verifica se há um modificador numérico entre o último dado e este
-        if last_end > 0:
-            mod_str = notation[last_end:start].strip('+ ,')
-            if mod_str and mod_str.isdigit():
-                modificador_total += int(mod_str)
-        
-        dados.append(match.group())
-        last_end = end
-    
-    # Verifica se há um modificador final
-    if last_end < len(notation):
-        mod_str = notation[last_end:].strip('+ ,')
-        if mod_str and mod_str.replace('-', '').isdigit():
-            modificador_total += int(mod_str)
-    
-    if not dados:
-        raise ValueError("Notação de dados inválida")
-    
-    if len(dados) > 2:
-        raise ValueError("Máximo de 2 tipos de dados permitidos")
-    
-    # Processa cada dado encontrado
-    resultados = []
-    for dado in dados:
-        quantidade, faces = map(lambda x: int(x) if x else 1, re.match(r'(\d*)d(\d+)', dado).groups())
-        resultados.append((quantidade, faces, 0))  # Modificador individual zerado
-    
-    # Adiciona o modificador total ao último dado
-    if modificador_total != 0:
-        last_qtd, last_faces, _ = resultados[-1]
-        resultados[-1] = (last_qtd, last_faces, modificador_total)
-    
+    expressao = compilar_notacao(notation)
+    resultados = [(grupo.quantidade, grupo.faces, 0, grupo.sinal) for grupo in expressao.grupos]
+    if expressao.modificador:
+        quantidade, faces, _, sinal = resultados[-1]
+        resultados[-1] = (quantidade, faces, expressao.modificador, sinal)
     return resultados
 
-def rolar_dados(notation: str) -> Dict:
+def _contar_faces_numpy(quantidade: int, faces: int) -> Dict[int, int]:
+    # A contagem de cada face de n dados uniformes segue uma multinomial
+    contagens = _rng.multinomial(quantidade, np.full(faces, 1 / faces))
+    return {int(face) + 1: int(contagens[face]) for face in np.flatnonzero(contagens)}
+
+def _contar_faces_stdlib(quantidade: int, faces: int) -> Dict[int, int]:
+    # Sorteia bytes em bloco (1 ou 2 por dado) e conta os valores com o
+    # Counter, que percorre os dados em C; valores da sobra que causaria
+    # viés são descartados e sorteados de novo
+    largura = 1 if faces <= 0x100 else 2
+    espaco = 1 << (8 * largura)
+    limite = espaco - espaco % faces
+    contagens: Dict[int, int] = {}
+    restantes = quantidade
+    while restantes:
+        dados = random.randbytes(restantes * largura)
+        valores = memoryview(dados).cast("H") if largura == 2 else dados
+        for valor, n in Counter(valores).items():
+            if valor < limite:
+                face = valor % faces + 1
+                contagens[face] = contagens.get(face, 0) + n
+                restantes -= n
+    return contagens
+
+_rng = np.random.default_rng() if np is not None else None
+
+def rolar_em_lote(quantidade: int, faces: int) -> Tuple[Dict[int, int], int]:
+    """
+    Rola muitos dados iguais de uma vez, sem um laço por dado
+
+    Usa o NumPy quando disponível e, sem ele, bytes aleatórios sorteados em
+    bloco. Retorna a contagem de cada face que saiu ({face: vezes}) e a soma.
+    """
+    if np is not None:
+        contagens = _contar_faces_numpy(quantidade, faces)
+    else:
+        contagens = _contar_faces_stdlib(quantidade, faces)
+    return contagens, sum(face * n for face, n in contagens.items())
+
+def rolar_grupo_com_regras(grupo: DiceGroup, rng=random) -> Tuple[List[int], List[int]]:
+    """
+    Rola um grupo explosivo e/ou que mantém apenas parte dos dados
+
+    Retorna o valor de cada dado (já somadas as explosões) e as posições,
+    a partir de 0, dos dados descartados pela regra de manter.
+    """
+    resultados = []
+    for _ in range(grupo.quantidade):
+        valor = rolagem = rng.randint(1, grupo.faces)
+        explosoes = 0
+        while grupo.explosivo and rolagem == grupo.faces and explosoes < MAX_EXPLOSOES:
+            rolagem = rng.randint(1, grupo.faces)
+            valor += rolagem
+            explosoes += 1
+        resultados.append(valor)
+
+    descartados = []
+    if grupo.manter:
+        ordem = sorted(range(len(resultados)), key=resultados.__getitem__, reverse=grupo.manter > 0)
+        descartados = sorted(ordem[abs(grupo.manter):])
+    return resultados, descartados
+
+def rolar_expressao(expressao: DiceExpression) -> Dict[str, Any]:
+    """
+    Rola uma expressão já compilada
+
+    Returns:
+        Dicionário com a notação, os grupos rolados (notacao, sinal,
+        quantidade, faces, contagens por face, resultados, posições
+        descartadas e subtotal com sinal), os resultados de cada grupo, o
+        modificador, o total e os críticos de d20 como pares (grupo, posição
+        a partir de 1). Grupos rolados em lote têm resultados None e ficam
+        de fora dos críticos por posição; seus críticos estão nas contagens
+        das faces 1 e 20.
+    """
+    grupos = []
+    criticos = []
+    total = expressao.modificador
+
+    for i, grupo in enumerate(expressao.grupos):
+        descartados = []
+        if grupo.tem_regras:
+            resultados, descartados = rolar_grupo_com_regras(grupo)
+            contagens = dict(Counter(resultados))
+            ignorados = set(descartados)
+            soma = sum(valor for j, valor in enumerate(resultados) if j not in ignorados)
+        elif grupo.quantidade <= LIMITE_INDIVIDUAL:
+            resultados = [random.randint(1, grupo.faces) for _ in range(grupo.quantidade)]
+            contagens = dict(Counter(resultados))
+            soma = sum(resultados)
+        else:
+            resultados = None
+            contagens, soma = rolar_em_lote(grupo.quantidade, grupo.faces)
+        subtotal = grupo.sinal * soma
+        total += subtotal
+        grupos.append({
+            "notacao": grupo.notacao,
+            "sinal": grupo.sinal,
+            "quantidade": grupo.quantidade,
+            "faces": grupo.faces,
+            "contagens": contagens,
+            "resultados": resultados,
+            "descartados": descartados,
+            "subtotal": subtotal,
+        })
+
+        # Verifica críticos (apenas para d20 que entraram na soma; um 20
+        # explosivo vale mais que 20, mas continua sendo crítico)
+        if grupo.faces == 20 and resultados is not None:
+            criticos.extend(
+                (i, j + 1) for j, resultado in enumerate(resultados)
+                if (resultado >= 20 or resultado == 1) and j not in descartados
+            )
+
+    return {
+        "notacao": expressao.notacao,
+        "grupos": grupos,
+        "resultados_grupos": [grupo["resultados"] for grupo in grupos],
+        "modificador": expressao.modificador,
+        "total": total,
+        "criticos": criticos
+    }
+
+def rolar_dados(notation: str) -> Dict[str, Any]:
     """
     Rola os dados conforme a notação fornecida
     
     Args:
-        notation: String com a notação de dados (exemplo: 2d20+5,1d6 ou 1d20+1d6)
+        notation: String com a notação de dados (exemplo: 2d20+5,1d6 ou 1d20+1d6-1d4)
         
     Returns:
-        Dicionário com os resultados da rolagem
+        Dicionário com os resultados da rolagem (veja rolar_expressao)
     """
     try:
-        notacoes = parse_multiple_dice_notation(notation)
-        resultados_totais = []
-        criticos_totais = []
-        modificador_total = 0
-        
-        for i, (quantidade, faces, modificador) in enumerate(notacoes):
-            # Rola os dados
-            resultados = [random.randint(1, faces) for _ in range(quantidade)]
-            resultados_totais.append(resultados)
-            modificador_total += modificador
-            
-            # Verifica críticos (apenas para d20)
-            if faces == 20:
-                criticos = [
-                    (i, j + 1) for j, resultado in enumerate(resultados)
-                    if resultado == 20 or resultado == 1
-                ]
-                criticos_totais.extend(criticos)
-        
-        return {
-            "notacao": notation,
-            "resultados_grupos": resultados_totais,
-            "modificador": modificador_total,
-            "total": sum(sum(grupo) for grupo in resultados_totais) + modificador_total,
-            "criticos": criticos_totais
-        }
+        return rolar_expressao(compilar_notacao(notation))
     except Exception as e:
         # Adiciona mais contexto ao erro
-        raise ValueError(f"Erro ao processar rolagem '{notation}': {str(e)}") 
\ No newline at end of file
+        raise ValueError(f"Erro ao processar rolagem '{notation}': {str(e)}")
+
+# Limites do cálculo exato de distribuições: tamanho do intervalo de totais
+# e, sem o NumPy, custo estimado das convoluções em Python puro
+MAX_SUPORTE_EXATO = 2_000_000
+MAX_CUSTO_EXATO_PURO = 10_000_000
+
+# Percentis mostrados nos resumos de /probabilidade e /simular
+PERCENTIS = (0.1, 0.25, 0.5, 0.75, 0.9)
+
+class ResumoDistribuicao(NamedTuple):
+    """Estatísticas de uma distribuição, calculadas em uma única passada"""
+    minimo: int
+    maximo: int
+    media: float
+    desvio_padrao: float
+    # (fração, total) para cada fração de PERCENTIS
+    percentis: Tuple[Tuple[float, int], ...]
+    # P(total ≥ alvo), ou None sem alvo
+    prob_alvo: Optional[float]
+
+class Distribuicao(NamedTuple):
+    """
+    Distribuição exata do total de uma expressão de dados
+
+    probabilidades[i] é a chance de o total ser minimo + i.
+    """
+    minimo: int
+    probabilidades: Tuple[float, ...]
+
+    @property
+    def maximo(self) -> int:
+        return self.minimo + len(self.probabilidades) - 1
+
+    def resumir(self, alvo: Optional[int] = None, fracoes: Tuple[float, ...] = PERCENTIS) -> ResumoDistribuicao:
+        """
+        Média, desvio padrão, percentis e P(total ≥ alvo) em uma só passada
+
+        Cada percentil é o menor total cuja probabilidade acumulada atinge a
+        fração; a chance do alvo é o complemento do acumulado abaixo dele.
+        """
+        limite_alvo = None if alvo is None else alvo - self.minimo
+        abaixo_alvo = 0.0 if limite_alvo is not None and limite_alvo <= 0 else None
+        pendentes = sorted(fracoes)
+        percentis = {}
+        soma = soma_quadrados = acumulada = 0.0
+        for i, p in enumerate(self.probabilidades):
+            soma += i * p
+            soma_quadrados += i * i * p
+            if i == limite_alvo:
+                abaixo_alvo = acumulada
+            acumulada += p
+            while pendentes and acumulada >= pendentes[0] - 1e-12:
+                percentis[pendentes.pop(0)] = self.minimo + i
+        for fracao in pendentes:
+            percentis[fracao] = self.maximo
+        if limite_alvo is not None and abaixo_alvo is None:
+            # Alvo acima do máximo
+            abaixo_alvo = 1.0
+
+        variancia = max(soma_quadrados - soma * soma, 0.0)
+        return ResumoDistribuicao(
+            minimo=self.minimo,
+            maximo=self.maximo,
+            media=self.minimo + soma,
+            desvio_padrao=variancia ** 0.5,
+            percentis=tuple((fracao, percentis[fracao]) for fracao in fracoes),
+            prob_alvo=None if alvo is None else min(max(1.0 - abaixo_alvo, 0.0), 1.0)
+        )
+
+def _convolver_puro(a, b) -> List[float]:
+    if len(a) < len(b):
+        a, b = b, a
+    resultado = [0.0] * (len(a) + len(b) - 1)
+    m = len(a)
+    # Soma cada termo de b, escalado, a uma fatia do resultado
+    for j, q in enumerate(b):
+        if q:
+            resultado[j:j + m] = [x + q * y for x, y in zip(resultado[j:j + m], a)]
+    return resultado
+
+def _convolver_numpy(a, b):
+    n = len(a) + len(b) - 1
+    if min(len(a), len(b)) < 64:
+        return np.convolve(a, b)
+    # Convolução pela FFT, O(n log n); ruído numérico negativo vira zero
+    tamanho = 1 << (n - 1).bit_length()
+    resultado = np.fft.irfft(np.fft.rfft(a, tamanho) * np.fft.rfft(b, tamanho), tamanho)[:n]
+    return np.clip(resultado, 0.0, None)
+
+def _convolver(a, b):
+    return _convolver_numpy(a, b) if np is not None else _convolver_puro(a, b)
+
+def _somar_dado(distribuicao, faces: int) -> List[float]:
+    # Convolução com um dado uniforme por janela deslizante, O(n)
+    resultado = []
+    janela = 0.0
+    n = len(distribuicao)
+    for s in range(n + faces - 1):
+        if s < n:
+            janela += distribuicao[s]
+        if s >= faces:
+            janela -= distribuicao[s - faces]
+        resultado.append(janela / faces)
+    return resultado
+
+@lru_cache(maxsize=256)
+def _distribuicao_grupo(quantidade: int, faces: int):
+    """Probabilidades das somas de quantidade..quantidade*faces, por elevação ao quadrado"""
+    if quantidade == 1:
+        uniforme = [1 / faces] * faces
+        return np.array(uniforme) if np is not None else tuple(uniforme)
+    metade = _distribuicao_grupo(quantidade // 2, faces)
+    resultado = _convolver(metade, metade)
+    if quantidade % 2:
+        resultado = _somar_dado(resultado, faces)
+    if np is not None:
+        resultado = np.asarray(resultado)
+        # Fica em cache: ninguém deve alterá-lo
+        resultado.flags.writeable = False
+        return resultado
+    return tuple(resultado)
+
+def _custo_puro(expressao: DiceExpression) -> int:
+    custo = 0
+    suporte_total = 1
+    for grupo in expressao.grupos:
+        suporte = grupo.quantidade * (grupo.faces - 1) + 1
+        # Elevações ao quadrado sucessivas: ~suporte² / 4 + suporte² / 16 + ...
+        custo += suporte * suporte // 3 + suporte_total * suporte
+        suporte_total += suporte - 1
+    return custo
+
+def validar_distribuicao(expressao: DiceExpression):
+    """Lança ValueError se a expressão não puder ter a distribuição exata calculada"""
+    if any(grupo.tem_regras for grupo in expressao.grupos):
+        raise ValueError("O cálculo exato não cobre dados explosivos ou mantidos; use /simular")
+    suporte = sum(grupo.quantidade * (grupo.faces - 1) for grupo in expressao.grupos) + 1
+    if suporte > MAX_SUPORTE_EXATO or (np is None and _custo_puro(expressao) > MAX_CUSTO_EXATO_PURO):
+        raise ValueError("Expressão grande demais para o cálculo exato")
+
+def distribuicao_expressao(expressao: DiceExpression) -> Distribuicao:
+    """
+    Calcula a distribuição exata do total de uma expressão compilada
+
+    Cada grupo é obtido por convoluções sucessivas da distribuição de um dado
+    (nunca enumerando combinações) e guardado em cache por (quantidade,
+    faces), para ser reaproveitado por outras expressões.
+    """
+    validar_distribuicao(expressao)
+
+    minimo = expressao.modificador
+    total = None
+    for grupo in expressao.grupos:
+        probabilidades = _distribuicao_grupo(grupo.quantidade, grupo.faces)
+        if grupo.sinal > 0:
+            minimo += grupo.quantidade
+        else:
+            # Um grupo subtraído tem a distribuição espelhada
+            probabilidades = probabilidades[::-1]
+            minimo -= grupo.quantidade * grupo.faces
+        total = probabilidades if total is None else _convolver(total, probabilidades)
+
+    return Distribuicao(minimo, tuple(float(p) for p in total))
+
+def distribuicao_dados(notation: str) -> Distribuicao:
+    """
+    Distribuição exata do total de uma notação de dados (exemplo: 20d20+3d12)
+
+    Returns:
+        Distribuicao com o menor total e a probabilidade de cada total,
+        resumida por Distribuicao.resumir
+    """
+    try:
+        return distribuicao_expressao(compilar_notacao(notation))
+    except Exception as e:
+        raise ValueError(f"Erro ao calcular a distribuição de '{notation}': {str(e)}")
+
+def resumir_dados(notation: str, alvo: Optional[int] = None) -> ResumoDistribuicao:
+    """
+    Calcula a distribuição exata de uma notação e devolve só o resumo
+
+    Roda inteira nos processos de cálculo (veja utils.simulation), de forma
+    que apenas o resumo, e não a distribuição, volta ao processo do bot.
+    """
+    return distribuicao_dados(notation).resumir(alvo)
@@ -0,0 +1,169 @@
+import asyncio
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import discord
+
+from config.settings import GUILD_SYNC_BACKOFF, GUILD_SYNC_INTERVAL, GUILD_SYNC_MAX_RETRIES
+from utils.command_sync import CommandSyncState
+
+class GuildSyncQueue:
+    """
+    Fila de sincronização de comandos por servidor, processada em segundo plano
+
+    enqueue() apenas registra o servidor e retorna na hora; um único worker
+    sincroniza um servidor por vez, com um intervalo mínimo entre as
+    chamadas. Servidores repetidos na fila são ignorados. Em um 429, a fila
+    inteira pausa pelo tempo indicado nos cabeçalhos de rate limit da
+    resposta; outros erros são tentados de novo com backoff exponencial, até
+    max_retries vezes. Servidores que já têm os comandos atuais (pelo hash
+    de CommandSyncState) são pulados sem chamar a API.
+    """
+
+    def __init__(
+        self,
+        command_sync: CommandSyncState,
+        interval: float = GUILD_SYNC_INTERVAL,
+        max_retries: int = GUILD_SYNC_MAX_RETRIES,
+        backoff: float = GUILD_SYNC_BACKOFF
+    ):
+        self.command_sync = command_sync
+        self.interval = interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        # guild_id -> [tentativas já feitas, instante a partir do qual pode rodar]
+        self._pending: "OrderedDict[int, List[float]]" = OrderedDict()
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.synced = 0
+        self.skipped = 0
+        self.failed = 0
+
+    @property
+    def depth(self) -> int:
+        """Quantidade de servidores aguardando sincronização"""
+        return len(self._pending)
+
+    def start(self):
+        """Inicia o worker (deve ser chamado com o event loop rodando)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name='guild-sync')
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def enqueue(self, guild_id: int) -> bool:
+        """Agenda a sincronização de um servidor; retorna False se já estava na fila"""
+        if guild_id in self._pending:
+            return False
+        self._pending[guild_id] = [0, 0.0]
+        self._wakeup.set()
+        return True
+
+    def discard(self, guild_id: int) -> bool:
+        """Tira um servidor da fila (por exemplo, quando o bot sai dele)"""
+        return self._pending.pop(guild_id, None) is not None
+
+    def stats(self) -> Dict[str, Any]:
+        """Profundidade da fila e contadores de sincronizações"""
+        return {
+            "depth": self.depth,
+            "synced": self.synced,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "paused_for": max(0.0, round(self._paused_until - time.monotonic(), 1)),
+        }
+
+    def _next(self) -> Optional[int]:
+        """Próximo servidor pronto para rodar, na ordem de chegada"""
+        now = time.monotonic()
+        for guild_id, (_, ready_at) in self._pending.items():
+            if ready_at <= now:
+                return guild_id
+        return None
+
+    def _delay(self) -> Optional[float]:
+        """Tempo até o próximo servidor ficar pronto (None com a fila vazia)"""
+        if not self._pending:
+            return None
+        ready_at = max(self._paused_until, min(item[1] for item in self._pending.values()))
+        return max(0.0, ready_at - time.monotonic())
+
+    @staticmethod
+    def _retry_after(error: discord.HTTPException) -> Optional[float]:
+        """Tempo de espera indicado nos cabeçalhos de rate limit, se houver"""
+        headers = getattr(error.response, 'headers', None) or {}
+        for header in ('Retry-After', 'X-RateLimit-Reset-After'):
+            try:
+                return float(headers[header])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return None
+
+    async def _run(self):
+        while True:
+            delay = self._delay()
+            if delay is None or delay > 0:
+                # Dorme até o próximo servidor ficar pronto ou chegar um novo
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            guild_id = self._next()
+            if guild_id is None:
+                continue
+            await self._sync(guild_id)
+            await asyncio.sleep(self.interval)
+
+    async def _sync(self, guild_id: int):
+        attempts = self._pending[guild_id][0]
+        try:
+            synced = await self.command_sync.sync(guild=discord.Object(id=guild_id))
+        except (discord.Forbidden, discord.NotFound) as e:
+            # Sem permissão de comandos ou o bot já saiu do servidor
+            self._pending.pop(guild_id, None)
+            self.failed += 1
+            print(f'❌ Sincronização do servidor {guild_id} descartada: {e}')
+            return
+        except Exception as e:
+            if guild_id not in self._pending:
+                return
+            attempts += 1
+            if attempts > self.max_retries:
+                self._pending.pop(guild_id, None)
+                self.failed += 1
+                print(f'❌ Sincronização do servidor {guild_id} falhou após {attempts} tentativas: {e}')
+                return
+
+            retry_after = self._retry_after(e) if isinstance(e, discord.HTTPException) else None
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                # O limite vale para o bucket todo: pausa a fila inteira
+                wait = retry_after if retry_after is not None else self.backoff
+                self._paused_until = time.monotonic() + wait
+            else:
+                wait = retry_after or self.backoff * 2 ** (attempts - 1) * random.uniform(0.8, 1.2)
+            self._pending[guild_id] = [attempts, time.monotonic() + wait]
+            # Vai para o fim da fila, para não travar os demais servidores
+            self._pending.move_to_end(guild_id)
+            print(f'⚠️ Erro ao sincronizar o servidor {guild_id} (tentativa {attempts}), nova tentativa em {wait:.1f}s: {e}')
+            return
+
+        if self._pending.pop(guild_id, None) is None:
+            return
+        if synced is None:
+            self.skipped += 1
+        else:
+            self.synced += 1
+            print(f'✅ Comandos sincronizados com o servidor {guild_id} ({self.depth} na fila)')
@@ -0,0 +1,101 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, Any, Iterator, List
+
+from config.settings import JOURNAL_ARCHIVE_KEEP
+
+class MutationJournal:
+    """
+    Diário de alterações somente-anexação (uma entrada JSON por linha)
+
+    Cada append() grava uma linha pequena e faz fsync, o que é barato mesmo em
+    volumes lentos. O diário é reaplicado sobre o último snapshot ao iniciar.
+
+    A compactação acontece em duas etapas: rotate() separa o diário atual em
+    <arquivo>.compacting e começa um novo; depois de gravado o snapshot,
+    archive() o arquiva com a data no nome, servindo como auditoria, e
+    mantém apenas os keep_archives arquivos mais recentes. Um .compacting
+    que sobrou de uma queda é reaplicado antes do diário atual.
+    """
+
+    def __init__(self, file_path: str, keep_archives: int = JOURNAL_ARCHIVE_KEEP):
+        self.file_path = file_path
+        self.pending_path = f"{file_path}.compacting"
+        self.keep_archives = keep_archives
+        self.directory = os.path.dirname(file_path)
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+        self._file = open(file_path, 'a', encoding='utf-8')
+
+    def append(self, entry: Dict[str, Any]):
+        """Anexa uma entrada ao diário e garante que ela chegou ao disco"""
+        entry = {"ts": datetime.now().isoformat(timespec='seconds'), **entry}
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def entries(self) -> Iterator[Dict[str, Any]]:
+        """
+        Percorre as entradas gravadas, ignorando linhas incompletas
+
+        Inclui, antes das entradas atuais, as de uma compactação interrompida.
+        """
+        for path in (self.pending_path, self.file_path):
+            if not os.path.exists(path):
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Linha truncada por uma queda no meio da escrita
+                        print(f"Entrada inválida ignorada em {path}")
+
+    def has_pending(self) -> bool:
+        """Indica se há uma compactação interrompida a concluir"""
+        return os.path.exists(self.pending_path)
+
+    def size(self) -> int:
+        """Tamanho atual do diário em bytes"""
+        return self._file.tell()
+
+    def rotate(self):
+        """
+        Separa o diário atual para a compactação e começa um novo, vazio
+
+        Deve ser chamado junto com a cópia das fichas que irá para o
+        snapshot, sem uma compactação anterior pendente.
+        """
+        self._file.close()
+        os.replace(self.file_path, self.pending_path)
+        self._file = open(self.file_path, 'a', encoding='utf-8')
+
+    def archive(self) -> str:
+        """
+        Arquiva o diário separado por rotate() e apaga os arquivos antigos
+
+        Deve ser chamado depois de gravar o snapshot que já contém suas
+        entradas. Retorna o caminho do arquivo arquivado.
+        """
+        archive = f"{self.file_path}.{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        os.replace(self.pending_path, archive)
+        for path in self.archives()[:-self.keep_archives or None]:
+            try:
+                os.remove(path)
+            except OSError as e:
+                print(f"Erro ao apagar o diário arquivado {path}: {e}")
+        return archive
+
+    def archives(self) -> List[str]:
+        """Diários arquivados, do mais antigo para o mais recente"""
+        prefixo = os.path.basename(self.file_path) + "."
+        with os.scandir(self.directory or '.') as entries:
+            nomes = sorted(
+                entry.name for entry in entries
+                if entry.name.startswith(prefixo) and entry.name[len(prefixo):].isdigit()
+            )
+        return [os.path.join(self.directory, nome) for nome in nomes]
+
+    def close(self):
+        self._file.close()
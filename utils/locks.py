@@ -0,0 +1,47 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Hashable
+
+class KeyedLockManager:
+    """
+    Registro de locks do asyncio indexados por chave
+
+    Alterações na mesma chave (por exemplo, o mesmo personagem) são executadas
+    em série, enquanto chaves diferentes seguem em paralelo. Cada lock conta
+    quantas tarefas o usam e é descartado assim que fica ocioso, então o
+    registro só guarda locks de chaves com alterações em andamento.
+    """
+
+    def __init__(self):
+        self._locks: Dict[Hashable, asyncio.Lock] = {}
+        self._waiters: Dict[Hashable, int] = {}
+
+    @asynccontextmanager
+    async def acquire(self, key: Hashable) -> AsyncIterator[None]:
+        """Mantém o lock da chave durante o bloco async with"""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[key] -= 1
+            if not self._waiters[key]:
+                del self._waiters[key]
+                del self._locks[key]
+
+    def character(self, user_id: str, key: str):
+        """Lock de um personagem específico"""
+        return self.acquire(("character", user_id, key))
+
+    def catalog(self, name: str):
+        """Lock de um catálogo compartilhado ("equipment" ou "titles")"""
+        return self.acquire(("catalog", name))
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+# Registro compartilhado por todos os repositórios do processo
+lock_manager = KeyedLockManager()
@@ -0,0 +1,136 @@
+import bisect
+import heapq
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Set, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Maior n-grama indexado; consultas mais longas intersectam seus trigramas
+_MAX_GRAM = 3
+
+def _ngrams(text: str, size: int) -> Set[str]:
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+class NameIndex:
+    """
+    Índice de nomes para autocomplete
+
+    Mantém os nomes normalizados (lower, como as chaves dos repositórios)
+    em uma lista ordenada, para achar prefixos com bisect, e um índice de
+    n-gramas (1 a 3 caracteres) para buscas por trecho. Inclusões e remoções
+    são incrementais, e a busca devolve primeiro os nomes que começam com o
+    texto digitado e depois os que apenas o contêm, sem percorrer todos os
+    registros.
+    """
+
+    def __init__(self):
+        self._sorted: List[Tuple[str, Hashable]] = []
+        self._items: Dict[Hashable, Tuple[str, Any]] = {}
+        self._grams: Dict[str, Set[Hashable]] = {}
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __contains__(self, item_id: Hashable) -> bool:
+        return item_id in self._items
+
+    def add(self, item_id: Hashable, name: str, payload: Any = None):
+        """Inclui (ou substitui) um item; payload é o que a busca devolve"""
+        if item_id in self._items:
+            self.remove(item_id)
+        folded = name.lower()
+        self._items[item_id] = (folded, payload)
+        bisect.insort(self._sorted, (folded, item_id))
+        for size in range(1, _MAX_GRAM + 1):
+            for gram in _ngrams(folded, size):
+                self._grams.setdefault(gram, set()).add(item_id)
+
+    def remove(self, item_id: Hashable) -> bool:
+        """Remove um item; retorna False se ele não estiver indexado"""
+        entry = self._items.pop(item_id, None)
+        if entry is None:
+            return False
+        folded = entry[0]
+        pos = bisect.bisect_left(self._sorted, (folded, item_id))
+        del self._sorted[pos]
+        for size in range(1, _MAX_GRAM + 1):
+            for gram in _ngrams(folded, size):
+                ids = self._grams[gram]
+                ids.discard(item_id)
+                if not ids:
+                    del self._grams[gram]
+        return True
+
+    def clear(self):
+        self._sorted.clear()
+        self._items.clear()
+        self._grams.clear()
+
+    def page(self, offset: int, limit: int) -> List[Any]:
+        """Payloads de uma faixa da lista em ordem alfabética, para paginação"""
+        return [self._items[item_id][1] for _, item_id in self._sorted[offset:offset + limit]]
+
+    def _substring_candidates(self, query: str) -> Set[Hashable]:
+        """Ids cujos nomes podem conter a consulta, pelo índice de n-gramas"""
+        if len(query) <= _MAX_GRAM:
+            return self._grams.get(query, set())
+        sets = sorted(
+            (self._grams.get(gram, set()) for gram in _ngrams(query, _MAX_GRAM)),
+            key=len
+        )
+        candidates = set(sets[0])
+        for ids in sets[1:]:
+            candidates &= ids
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query: str, limit: int = 25) -> List[Any]:
+        """Devolve até limit payloads: primeiro prefixos, depois trechos"""
+        query = query.lower()
+        results = []
+        seen = set()
+
+        # Prefixos: intervalo contíguo da lista ordenada
+        pos = bisect.bisect_left(self._sorted, (query,))
+        while pos < len(self._sorted) and len(results) < limit:
+            folded, item_id = self._sorted[pos]
+            if not folded.startswith(query):
+                break
+            results.append(self._items[item_id][1])
+            seen.add(item_id)
+            pos += 1
+
+        if len(results) >= limit or not query:
+            return results
+
+        # Trechos: candidatos do índice de n-gramas, confirmados e ordenados
+        matches = (
+            (self._items[item_id][0], item_id)
+            for item_id in self._substring_candidates(query)
+            if item_id not in seen and query in self._items[item_id][0]
+        )
+        for _, item_id in heapq.nsmallest(limit - len(results), matches):
+            results.append(self._items[item_id][1])
+        return results
+
+def match_items(items: Iterable[T], query: str, key: Callable[[T], str], limit: int = 25) -> List[T]:
+    """
+    Aplica a mesma regra de NameIndex.search a uma coleção pequena, sem
+    construir um índice: primeiro prefixos, depois trechos, em ordem alfabética
+    """
+    query = query.lower()
+    prefixes, others = [], []
+    for item in items:
+        folded = key(item).lower()
+        if folded.startswith(query):
+            prefixes.append((folded, item))
+        elif query in folded:
+            others.append((folded, item))
+    ordered = heapq.nsmallest(limit, prefixes, key=lambda entry: entry[0])
+    if len(ordered) < limit:
+        ordered += heapq.nsmallest(limit - len(ordered), others, key=lambda entry: entry[0])
+    return [item for _, item in ordered]
+
+def match_names(names: Iterable[str], query: str, limit: int = 25) -> List[str]:
+    """Versão de match_items para uma lista de nomes"""
+    return match_items(names, query, str, limit)
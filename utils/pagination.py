@@ -0,0 +1,116 @@
+import math
+from typing import Any, List, Optional
+
+import discord
+
+from config.settings import PAGINATION_TIMEOUT
+
+class PaginatedView(discord.ui.View):
+    """
+    View paginada sob demanda
+
+    Guarda apenas a página atual; a cada navegação, as subclasses contam os
+    itens e buscam somente os da página visível (count, fetch_page) para
+    montar o embed (render). Subclasses podem ainda adicionar componentes
+    próprios da página em update_components. Apenas quem abriu a lista pode
+    navegar, e a view expira após timeout segundos, desativando os botões.
+    """
+
+    def __init__(self, author_id: int, per_page: int = 10, timeout: float = PAGINATION_TIMEOUT):
+        super().__init__(timeout=timeout)
+        self.author_id = author_id
+        self.per_page = per_page
+        self.page = 0
+        self.pages = 1
+        self.message: Optional[discord.Message] = None
+
+    async def count(self) -> int:
+        """Quantidade total de itens da lista"""
+        raise NotImplementedError
+
+    async def fetch_page(self, offset: int, limit: int) -> List[Any]:
+        """Itens da página que começa em offset"""
+        raise NotImplementedError
+
+    async def render(self, items: List[Any]) -> discord.Embed:
+        """Embed da página atual"""
+        raise NotImplementedError
+
+    def update_components(self, items: List[Any]):
+        """Ajusta componentes que dependem dos itens da página"""
+
+    async def _build(self) -> discord.Embed:
+        self.pages = max(1, math.ceil(await self.count() / self.per_page))
+        self.page = min(max(self.page, 0), self.pages - 1)
+        items = await self.fetch_page(self.page * self.per_page, self.per_page)
+
+        self.previous_page.disabled = self.page == 0
+        self.next_page.disabled = self.page >= self.pages - 1
+        self.jump_to_page.disabled = self.pages == 1
+        self.page_indicator.label = f"{self.page + 1}/{self.pages}"
+        self.update_components(items)
+        return await self.render(items)
+
+    async def send(self, interaction: discord.Interaction, ephemeral: bool = False):
+        """Envia a primeira página como resposta à interação"""
+        embed = await self._build()
+        await interaction.response.send_message(embed=embed, view=self, ephemeral=ephemeral)
+        self.message = await interaction.original_response()
+
+    async def show(self, interaction: discord.Interaction, page: int):
+        """Mostra outra página, editando a mensagem da lista"""
+        self.page = page
+        embed = await self._build()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message(
+                "Apenas quem abriu esta lista pode usá-la.",
+                ephemeral=True
+            )
+            return False
+        return True
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+        self.message = None
+
+    @discord.ui.button(label="◀", style=discord.ButtonStyle.secondary, row=1)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label="1/1", style=discord.ButtonStyle.secondary, row=1, disabled=True)
+    async def page_indicator(self, interaction: discord.Interaction, button: discord.ui.Button):
+        pass
+
+    @discord.ui.button(label="▶", style=discord.ButtonStyle.secondary, row=1)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
+    @discord.ui.button(label="Ir para...", style=discord.ButtonStyle.primary, row=1)
+    async def jump_to_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(_JumpToPageModal(self))
+
+class _JumpToPageModal(discord.ui.Modal, title="Ir para a página"):
+    """Pede o número da página para a qual a lista deve pular"""
+    pagina = discord.ui.TextInput(label="Número da página", max_length=6)
+
+    def __init__(self, paginator: PaginatedView):
+        super().__init__()
+        self.paginator = paginator
+        self.pagina.placeholder = f"1 a {paginator.pages}"
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            page = int(self.pagina.value)
+        except ValueError:
+            await interaction.response.send_message("❌ Informe um número de página válido.", ephemeral=True)
+            return
+        await self.paginator.show(interaction, page - 1)
@@ -0,0 +1,51 @@
+import copy
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import discord
+
+from config.settings import EMBED_CACHE_SIZE
+
+class EmbedCache:
+    """
+    Cache LRU de embeds já montados
+
+    Guarda o payload (to_dict) de cada embed sob uma chave que deve incluir
+    a versão dos dados exibidos; quando os dados mudam a chave muda junto,
+    então não há invalidação explícita e as entradas antigas simplesmente
+    deixam de ser usadas até saírem pelo LRU. Cada leitura devolve um embed
+    novo, que pode ser alterado sem afetar o cache.
+    """
+
+    def __init__(self, max_entries: int = EMBED_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._payloads: "OrderedDict[Hashable, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[discord.Embed]:
+        payload = self._payloads.get(key)
+        if payload is None:
+            self.misses += 1
+            return None
+        self._payloads.move_to_end(key)
+        self.hits += 1
+        return discord.Embed.from_dict(copy.deepcopy(payload))
+
+    def put(self, key: Hashable, embed: discord.Embed):
+        # to_dict compartilha listas com o embed; a cópia isola o cache
+        self._payloads[key] = copy.deepcopy(embed.to_dict())
+        self._payloads.move_to_end(key)
+        while len(self._payloads) > self.max_entries:
+            self._payloads.popitem(last=False)
+
+    def clear(self):
+        self._payloads.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        return {
+            "entries": len(self._payloads),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
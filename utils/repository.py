@@ -0,0 +1,500 @@
+import asyncio
+import threading
+from datetime import datetime
+from typing import Dict, Any, List, Optional, Iterator, Set, Tuple
+
+from models.equipment import Equipment
+from utils.aio import run_io
+from utils.backends import IStorageBackend, create_backend
+from utils.locks import lock_manager
+from utils.name_index import NameIndex
+
+class AmbiguousCharacterError(Exception):
+    """Mais de um usuário possui um personagem com o mesmo nome"""
+    def __init__(self, key: str, owners: List[str]):
+        self.key = key
+        self.owners = sorted(owners)
+        super().__init__(
+            f"Há {len(self.owners)} personagens chamados '{key}' "
+            f"(donos: {', '.join(self.owners)})"
+        )
+
+# Acesso aos personagens
+class CharacterRepository:
+    """
+    Repositório assíncrono de personagens, identificados por (user_id, chave)
+
+    Mantém índices de nomes (um global e um por usuário) para o autocomplete
+    e as listagens, e um índice reverso chave -> donos, usado pelos comandos
+    de mestre. Os índices são construídos na primeira utilização a partir da
+    projeção de resumos do armazenamento, sem carregar as fichas completas,
+    e atualizados a cada criação ou exclusão. O atributo version é
+    incrementado a cada alteração, para que caches de autocomplete saibam
+    quando descartar resultados.
+    """
+    def __init__(self, backend: IStorageBackend):
+        self.backend = backend
+        self.version = 0
+        self._names: Optional[NameIndex] = None
+        self._user_names: Dict[str, NameIndex] = {}
+        self._owners: Dict[str, Set[str]] = {}
+        self._index_lock = asyncio.Lock()
+
+    @staticmethod
+    def _summary(user_id: str, key: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Dados mínimos de um personagem devolvidos pelas buscas"""
+        return {
+            "user_id": user_id,
+            "key": key,
+            "nome": data["nome"],
+            "nivel": data["nivel"],
+            "classe": data["classe"],
+            "updated_at": datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def _index_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        self._index_summary(self._summary(user_id, key, data))
+
+    def _index_summary(self, summary: Dict[str, Any]):
+        user_id, key = summary["user_id"], summary["key"]
+        self._names.add((user_id, key), key, summary)
+        self._user_names.setdefault(user_id, NameIndex()).add(key, key, summary)
+        self._owners.setdefault(key, set()).add(user_id)
+
+    def _unindex_character(self, user_id: str, key: str):
+        self._names.remove((user_id, key))
+        user_names = self._user_names.get(user_id)
+        if user_names is not None:
+            user_names.remove(key)
+            if not len(user_names):
+                del self._user_names[user_id]
+        owners = self._owners.get(key)
+        if owners is not None:
+            owners.discard(user_id)
+            if not owners:
+                del self._owners[key]
+
+    async def _ensure_indexed(self):
+        """Constrói os índices de nomes na primeira utilização"""
+        if self._names is not None:
+            return
+        async with self._index_lock:
+            if self._names is not None:
+                return
+            self._names = NameIndex()
+            try:
+                async for summary in self.backend.aiter_character_summaries():
+                    self._index_summary(summary)
+            except:
+                self._names = None
+                self._user_names = {}
+                self._owners = {}
+                raise
+
+    async def aresolve(self, name: str) -> Optional[Tuple[str, str]]:
+        """
+        Resolve o nome de um personagem de qualquer usuário em (user_id, chave)
+
+        Aceita também a forma qualificada "user_id:chave". Retorna None se o
+        personagem não existir e lança AmbiguousCharacterError se mais de um
+        usuário tiver um personagem com esse nome.
+        """
+        await self._ensure_indexed()
+        owner, sep, key = name.partition(":")
+        if sep and owner.isdigit():
+            return (owner, key.lower()) if owner in self._owners.get(key.lower(), ()) else None
+
+        key = name.lower()
+        owners = self._owners.get(key)
+        if not owners:
+            return None
+        if len(owners) > 1:
+            raise AmbiguousCharacterError(key, list(owners))
+        return next(iter(owners)), key
+
+    def choice_value(self, user_id: str, key: str) -> str:
+        """Valor de autocomplete de um personagem, qualificado se o nome se repetir"""
+        if len(self._owners.get(key, ())) > 1:
+            return f"{user_id}:{key}"
+        return key
+
+    async def asearch(self, query: str, user_id: Optional[str] = None, limit: int = 25) -> List[Dict[str, Any]]:
+        """
+        Busca personagens pelo nome (prefixo e depois trecho)
+
+        Com user_id, considera apenas os personagens desse usuário.
+        Devolve resumos com user_id, key, nome, nivel, classe e updated_at.
+        """
+        await self._ensure_indexed()
+        index = self._names if user_id is None else self._user_names.get(user_id)
+        return index.search(query, limit) if index is not None else []
+
+    async def acount(self, user_id: Optional[str] = None) -> int:
+        """Quantidade de personagens (de todos ou de um usuário)"""
+        await self._ensure_indexed()
+        index = self._names if user_id is None else self._user_names.get(user_id)
+        return len(index) if index is not None else 0
+
+    async def apage(self, offset: int, limit: int, user_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Resumos de uma página de personagens, em ordem alfabética de nome"""
+        await self._ensure_indexed()
+        index = self._names if user_id is None else self._user_names.get(user_id)
+        return index.page(offset, limit) if index is not None else []
+
+    async def aget_character(self, user_id: str, key: str) -> Optional[Dict[str, Any]]:
+        return await self.backend.aget_character(user_id, key)
+
+    async def asave_character(self, user_id: str, key: str, data: Dict[str, Any]):
+        await self.backend.asave_character(user_id, key, data)
+        self.version += 1
+        if self._names is not None:
+            self._index_character(user_id, key, data)
+
+    async def adelete_character(self, user_id: str, key: str) -> bool:
+        deleted = await self.backend.adelete_character(user_id, key)
+        if deleted:
+            self.version += 1
+        if deleted and self._names is not None:
+            self._unindex_character(user_id, key)
+        return deleted
+
+    async def aadd_equipment(self, user_id: str, key: str, item: str) -> Optional[bool]:
+        return self._changed(await self.backend.aadd_character_equipment(user_id, key, item))
+
+    async def aadd_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        return self._changed(await self.backend.aadd_character_title(user_id, key, title))
+
+    async def aremove_title(self, user_id: str, key: str, title: str) -> Optional[bool]:
+        return self._changed(await self.backend.aremove_character_title(user_id, key, title))
+
+    def _changed(self, result: Optional[bool]) -> Optional[bool]:
+        """Incrementa a versão quando uma alteração foi aplicada"""
+        if result:
+            self.version += 1
+        return result
+
+# Gerenciador de persistência de equipamentos
+class EquipmentRepository:
+    """
+    Repositório de equipamentos com índice em memória
+
+    O catálogo é carregado uma única vez em um dicionário indexado pelo nome
+    normalizado (lower, como nos mecanismos de armazenamento), com os
+    objetos Equipment já materializados. Buscas, checagem de duplicados,
+    edições e exclusões custam O(1), e só uma alteração efetiva chega ao
+    mecanismo de armazenamento.
+    """
+    def __init__(self, backend: IStorageBackend):
+        self.backend = backend
+        self.version = 0
+        self._index: Optional[Dict[str, Equipment]] = None
+        self._names = NameIndex()
+        self._lock = threading.RLock()
+        self._names_lock = threading.Lock()
+
+    @staticmethod
+    def _key(name: str) -> str:
+        return name.lower()
+
+    def _ensure_loaded(self) -> Dict[str, Equipment]:
+        """Carrega o índice do catálogo na primeira utilização"""
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    index = {}
+                    for data in self.backend.get_all_equipment():
+                        # Nomes repetidos mantêm o primeiro, como na busca linear
+                        index.setdefault(self._key(data["name"]), Equipment.from_dict(data))
+                    with self._names_lock:
+                        self._names.clear()
+                        for key, eq in index.items():
+                            self._names.add(key, eq.name, eq)
+                    self._index = index
+        return self._index
+
+    def _set_name(self, old_key: Optional[str], equipment: Optional[Equipment]):
+        """Atualiza o índice de nomes após uma inclusão, edição ou exclusão"""
+        with self._names_lock:
+            if old_key is not None:
+                self._names.remove(old_key)
+            if equipment is not None:
+                self._names.add(self._key(equipment.name), equipment.name, equipment)
+            self.version += 1
+
+    def search_equipment(self, query: str, limit: int = 25) -> List[Equipment]:
+        """Busca equipamentos pelo nome (prefixo e depois trecho)"""
+        self._ensure_loaded()
+        with self._names_lock:
+            return self._names.search(query, limit)
+
+    def count_equipment(self) -> int:
+        return len(self._ensure_loaded())
+
+    def page_equipment(self, offset: int, limit: int) -> List[Equipment]:
+        """Uma página do catálogo, em ordem alfabética de nome"""
+        self._ensure_loaded()
+        with self._names_lock:
+            return self._names.page(offset, limit)
+
+    def reload(self):
+        """Descarta o índice, forçando uma nova leitura do catálogo"""
+        with self._lock:
+            self._index = None
+            self.version += 1
+
+    def save_equipment(self, equipment: Equipment) -> bool:
+        try:
+            with self._lock:
+                index = self._ensure_loaded()
+                key = self._key(equipment.name)
+                if key in index:
+                    print(f"Equipamento '{equipment.name}' já existe")
+                    return False
+                self.backend.add_equipment(equipment.to_dict())
+                index[key] = equipment
+                self._set_name(None, equipment)
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar equipamento: {e}")
+            return False
+
+    def iter_equipment(self) -> Iterator[Equipment]:
+        """
+        Percorre os equipamentos do catálogo, na ordem de criação
+
+        Equipamentos renomeados vão para o fim até a próxima leitura do catálogo.
+        """
+        return iter(list(self._ensure_loaded().values()))
+
+    def get_all_equipment(self) -> list[Dict[str, Any]]:
+        try:
+            return [eq.to_dict() for eq in self.iter_equipment()]
+        except Exception as e:
+            print(f"Erro ao ler equipamentos: {e}")
+            return []
+
+    def get_equipment_by_name(self, name: str) -> Optional[Equipment]:
+        """Busca um equipamento pelo nome"""
+        return self._ensure_loaded().get(self._key(name))
+
+    def update_equipment(self, name: str, updated_equipment: Equipment) -> bool:
+        """Atualiza um equipamento existente"""
+        try:
+            with self._lock:
+                index = self._ensure_loaded()
+                old_key, new_key = self._key(name), self._key(updated_equipment.name)
+                current = index.get(old_key)
+                if current is None:
+                    return False
+                if new_key != old_key and new_key in index:
+                    print(f"Equipamento '{updated_equipment.name}' já existe")
+                    return False
+                if current.to_dict() == updated_equipment.to_dict():
+                    return True
+
+                if not self.backend.update_equipment(current.name, updated_equipment.to_dict()):
+                    return False
+                self._set_name(old_key, updated_equipment)
+                if new_key != old_key:
+                    del index[old_key]
+                index[new_key] = updated_equipment
+                return True
+        except Exception as e:
+            print(f"Erro ao atualizar equipamento: {e}")
+            return False
+
+    def delete_equipment(self, name: str) -> bool:
+        """Exclui um equipamento pelo nome"""
+        try:
+            with self._lock:
+                index = self._ensure_loaded()
+                key = self._key(name)
+                if key not in index:
+                    return False
+                if not self.backend.delete_equipment(index[key].name):
+                    return False
+                del index[key]
+                self._set_name(key, None)
+                return True
+        except Exception as e:
+            print(f"Erro ao excluir equipamento: {e}")
+            return False
+
+    # Variantes assíncronas; as leituras só usam o pool na carga inicial
+    async def asave_equipment(self, equipment: Equipment) -> bool:
+        async with lock_manager.catalog("equipment"):
+            return await run_io(self.save_equipment, equipment)
+
+    async def acount_equipment(self) -> int:
+        if self._index is None:
+            await run_io(self._ensure_loaded)
+        return self.count_equipment()
+
+    async def apage_equipment(self, offset: int, limit: int) -> List[Equipment]:
+        if self._index is None:
+            await run_io(self._ensure_loaded)
+        return self.page_equipment(offset, limit)
+
+    async def asearch_equipment(self, query: str, limit: int = 25) -> List[Equipment]:
+        if self._index is None:
+            await run_io(self._ensure_loaded)
+        return self.search_equipment(query, limit)
+
+    async def aget_equipment_by_name(self, name: str) -> Optional[Equipment]:
+        if self._index is None:
+            await run_io(self._ensure_loaded)
+        return self.get_equipment_by_name(name)
+
+    async def aupdate_equipment(self, name: str, updated_equipment: Equipment) -> bool:
+        async with lock_manager.catalog("equipment"):
+            return await run_io(self.update_equipment, name, updated_equipment)
+
+    async def adelete_equipment(self, name: str) -> bool:
+        async with lock_manager.catalog("equipment"):
+            return await run_io(self.delete_equipment, name)
+
+class TitleRepository:
+    """Repositório para gerenciamento de títulos"""
+    def __init__(self, backend: IStorageBackend):
+        self.backend = backend
+        self.version = 0
+        self._names: Optional[NameIndex] = None
+        self._names_lock = threading.Lock()
+
+    def _reindex(self, titles: List[str]):
+        names = NameIndex()
+        for title in titles:
+            names.add(title, title, title)
+        with self._names_lock:
+            self._names = names
+
+    def get_all_titles(self) -> List[str]:
+        """Carrega a lista de títulos disponíveis"""
+        try:
+            return self.backend.get_all_titles()
+        except Exception as e:
+            print(f"Erro ao carregar títulos: {e}")
+            return []
+
+    def search_titles(self, query: str, limit: int = 25) -> List[str]:
+        """Busca títulos pelo nome (prefixo e depois trecho)"""
+        names = self._ensure_indexed()
+        with self._names_lock:
+            return names.search(query, limit)
+
+    def _ensure_indexed(self) -> NameIndex:
+        if self._names is None:
+            self._reindex(self.get_all_titles())
+        return self._names
+
+    def count_titles(self) -> int:
+        return len(self._ensure_indexed())
+
+    def page_titles(self, offset: int, limit: int) -> List[str]:
+        """Uma página dos títulos, em ordem alfabética"""
+        names = self._ensure_indexed()
+        with self._names_lock:
+            return names.page(offset, limit)
+
+    def add_title(self, title: str) -> bool:
+        """Adiciona um título à lista; retorna False se ele já existir"""
+        added = self.backend.add_title(title)
+        if added:
+            self.version += 1
+        if added and self._names is not None:
+            with self._names_lock:
+                self._names.add(title, title, title)
+        return added
+
+    def remove_title(self, title: str) -> bool:
+        """Remove um título da lista; retorna False se ele não existir"""
+        removed = self.backend.remove_title(title)
+        if removed:
+            self.version += 1
+        if removed and self._names is not None:
+            with self._names_lock:
+                self._names.remove(title)
+        return removed
+
+    def save_titles(self, titles: List[str]) -> bool:
+        """Salva a lista de títulos"""
+        try:
+            self.backend.save_titles(titles)
+            self._reindex(titles)
+            self.version += 1
+            return True
+        except Exception as e:
+            print(f"Erro ao salvar títulos: {e}")
+            return False
+
+    # Variantes assíncronas, executadas no pool de E/S
+    async def aget_all_titles(self) -> List[str]:
+        return await run_io(self.get_all_titles)
+
+    async def acount_titles(self) -> int:
+        if self._names is None:
+            return await run_io(self.count_titles)
+        return self.count_titles()
+
+    async def apage_titles(self, offset: int, limit: int) -> List[str]:
+        if self._names is None:
+            return await run_io(self.page_titles, offset, limit)
+        return self.page_titles(offset, limit)
+
+    async def asearch_titles(self, query: str, limit: int = 25) -> List[str]:
+        if self._names is None:
+            return await run_io(self.search_titles, query, limit)
+        return self.search_titles(query, limit)
+
+    async def aadd_title(self, title: str) -> bool:
+        async with lock_manager.catalog("titles"):
+            return await run_io(self.add_title, title)
+
+    async def aremove_title(self, title: str) -> bool:
+        async with lock_manager.catalog("titles"):
+            return await run_io(self.remove_title, title)
+
+class CharacterTitleManager:
+    """Gerenciador de títulos de personagens"""
+    def __init__(self, characters: CharacterRepository):
+        self.characters = characters
+        self.backend = characters.backend
+
+    # O dono é resolvido pelo índice do repositório
+    async def aget_character_titles(self, character_name: str) -> Optional[List[str]]:
+        resolved = await self.characters.aresolve(character_name)
+        if resolved is None:
+            return None
+        data = await self.characters.aget_character(*resolved)
+        return data.get("titulos", []) if data else None
+
+    async def aadd_title_to_character(self, character_name: str, title: str) -> bool:
+        resolved = await self.characters.aresolve(character_name)
+        if resolved is None:
+            return False
+        return await self.characters.aadd_title(*resolved, title) is not None
+
+    async def aremove_title_from_character(self, character_name: str, title: str) -> bool:
+        resolved = await self.characters.aresolve(character_name)
+        if resolved is None:
+            return False
+        return bool(await self.characters.aremove_title(*resolved, title))
+
+class DataRepository:
+    """
+    Camada única de acesso a dados do bot
+
+    Criada uma vez na inicialização e compartilhada por todos os cogs, de
+    forma que um só mecanismo de armazenamento (com seu cache e sua
+    persistência) atenda personagens, equipamentos e títulos.
+    """
+    def __init__(self, backend: Optional[IStorageBackend] = None):
+        self.backend = backend or create_backend()
+        self.characters = CharacterRepository(self.backend)
+        self.equipment = EquipmentRepository(self.backend)
+        self.titles = TitleRepository(self.backend)
+        self.character_titles = CharacterTitleManager(self.characters)
+
+    def close(self):
+        """Grava alterações pendentes e libera o mecanismo de armazenamento"""
+        self.backend.close()
@@ -0,0 +1,230 @@
+import asyncio
+import multiprocessing
+import random
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.settings import SIMULATION_BATCH, SIMULATION_WORKERS
+from utils.dice import (
+    MAX_EXPLOSOES, DiceExpression, Distribuicao, ResumoDistribuicao, compilar_notacao, np,
+    resumir_dados, rolar_grupo_com_regras
+)
+
+# Máximo de dados (tentativas x dados por tentativa) sorteados de uma vez
+# no caminho do NumPy, para limitar a memória de cada processo
+_MAX_DADOS_POR_BLOCO = 2_000_000
+
+def _simular_numpy(expressao: DiceExpression, tentativas: int, semente: int) -> Tuple[Counter, int, int]:
+    rng = np.random.default_rng(semente)
+    dados_por_tentativa = sum(grupo.quantidade for grupo in expressao.grupos)
+    bloco = max(1, _MAX_DADOS_POR_BLOCO // max(dados_por_tentativa, 1))
+    histograma = Counter()
+    sucessos = falhas = 0
+
+    for inicio in range(0, tentativas, bloco):
+        n = min(bloco, tentativas - inicio)
+        totais = np.full(n, expressao.modificador, dtype=np.int64)
+        sucesso = np.zeros(n, dtype=bool)
+        falha = np.zeros(n, dtype=bool)
+
+        for grupo in expressao.grupos:
+            valores = rng.integers(1, grupo.faces + 1, size=(n, grupo.quantidade), dtype=np.int64)
+            if grupo.explosivo:
+                # Rola de novo apenas as posições que ainda estão explodindo
+                explodindo = valores == grupo.faces
+                for _ in range(MAX_EXPLOSOES):
+                    if not explodindo.any():
+                        break
+                    novos = rng.integers(1, grupo.faces + 1, size=int(explodindo.sum()), dtype=np.int64)
+                    valores[explodindo] += novos
+                    explodindo[explodindo] = novos == grupo.faces
+            if grupo.manter:
+                valores.sort(axis=1)
+                valores = valores[:, -grupo.manter:] if grupo.manter > 0 else valores[:, :-grupo.manter]
+            if grupo.faces == 20:
+                sucesso |= (valores >= 20).any(axis=1)
+                falha |= (valores == 1).any(axis=1)
+            totais += grupo.sinal * valores.sum(axis=1)
+
+        valores_unicos, contagens = np.unique(totais, return_counts=True)
+        histograma.update(dict(zip(valores_unicos.tolist(), contagens.tolist())))
+        sucessos += int(sucesso.sum())
+        falhas += int(falha.sum())
+    return histograma, sucessos, falhas
+
+def _simular_puro(expressao: DiceExpression, tentativas: int, semente: int) -> Tuple[Counter, int, int]:
+    rng = random.Random(semente)
+    histograma = Counter()
+    sucessos = falhas = 0
+
+    for _ in range(tentativas):
+        total = expressao.modificador
+        sucesso = falha = False
+        for grupo in expressao.grupos:
+            if grupo.tem_regras:
+                resultados, descartados = rolar_grupo_com_regras(grupo, rng)
+                valores = [valor for j, valor in enumerate(resultados) if j not in descartados]
+            else:
+                valores = rng.choices(range(1, grupo.faces + 1), k=grupo.quantidade)
+            if grupo.faces == 20:
+                sucesso = sucesso or max(valores) >= 20
+                falha = falha or 1 in valores
+            total += grupo.sinal * sum(valores)
+        histograma[total] += 1
+        sucessos += sucesso
+        falhas += falha
+    return histograma, sucessos, falhas
+
+def simular_lote(notacao: str, tentativas: int, semente: int) -> Tuple[Dict[int, int], int, int]:
+    """
+    Executa um lote de tentativas de uma notação (roda nos processos do pool)
+
+    Retorna o histograma dos totais e quantas tentativas tiveram ao menos um
+    sucesso e uma falha crítica em d20.
+    """
+    expressao = compilar_notacao(notacao)
+    if np is not None:
+        histograma, sucessos, falhas = _simular_numpy(expressao, tentativas, semente)
+    else:
+        histograma, sucessos, falhas = _simular_puro(expressao, tentativas, semente)
+    return dict(histograma), sucessos, falhas
+
+class ResultadoSimulacao:
+    """Histograma e contadores acumulados de uma simulação"""
+
+    def __init__(self, notacao: str, tentativas: int):
+        self.notacao = notacao
+        self.tentativas = tentativas
+        self.concluidas = 0
+        self.histograma: Counter = Counter()
+        self.sucessos_criticos = 0
+        self.falhas_criticas = 0
+        self.cancelada = False
+
+    def acumular(self, tentativas: int, histograma: Dict[int, int], sucessos: int, falhas: int):
+        self.concluidas += tentativas
+        self.histograma.update(histograma)
+        self.sucessos_criticos += sucessos
+        self.falhas_criticas += falhas
+
+    def distribuicao(self) -> Distribuicao:
+        """Distribuição empírica dos totais observados até agora"""
+        minimo, maximo = min(self.histograma), max(self.histograma)
+        return Distribuicao(
+            minimo,
+            tuple(self.histograma.get(total, 0) / self.concluidas for total in range(minimo, maximo + 1))
+        )
+
+    def faixas(self, quantidade: int = 12) -> List[Tuple[int, int, float]]:
+        """Histograma agrupado em faixas: (início, fim, fração das tentativas)"""
+        minimo, maximo = min(self.histograma), max(self.histograma)
+        largura = max(1, -(-(maximo - minimo + 1) // quantidade))
+        faixas = Counter()
+        for total, n in self.histograma.items():
+            faixas[(total - minimo) // largura] += n
+        return [
+            (minimo + i * largura, min(minimo + (i + 1) * largura - 1, maximo), faixas[i] / self.concluidas)
+            for i in range((maximo - minimo) // largura + 1)
+        ]
+
+_executor: Optional[ProcessPoolExecutor] = None
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # "spawn" evita herdar as threads e o event loop do processo do bot
+        _executor = ProcessPoolExecutor(
+            max_workers=SIMULATION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+class Simulacao:
+    """
+    Simulação de Monte Carlo de uma notação de dados
+
+    As tentativas são divididas em lotes executados em paralelo em um
+    ProcessPoolExecutor, sem bloquear o event loop. Os lotes concluídos são
+    acumulados à medida que chegam, e cancelar() interrompe os que ainda
+    não começaram, mantendo o resultado parcial.
+    """
+
+    def __init__(self, notacao: str, tentativas: int):
+        # Valida a notação aqui, antes de ocupar o pool
+        self.expressao = compilar_notacao(notacao)
+        self.resultado = ResultadoSimulacao(self.expressao.notacao, tentativas)
+        self._futuros: List[asyncio.Future] = []
+
+    def cancelar(self):
+        self.resultado.cancelada = True
+        for futuro in self._futuros:
+            futuro.cancel()
+
+    async def executar(
+        self,
+        ao_progredir: Optional[Callable[[ResultadoSimulacao], Awaitable[None]]] = None,
+        intervalo: float = 1.5
+    ) -> ResultadoSimulacao:
+        """Roda a simulação, chamando ao_progredir no máximo a cada intervalo segundos"""
+        loop = asyncio.get_running_loop()
+        executor = _get_executor()
+        restantes = self.resultado.tentativas
+        lotes = []
+        while restantes:
+            lote = min(SIMULATION_BATCH, restantes)
+            lotes.append(lote)
+            restantes -= lote
+
+        self._futuros = [
+            loop.run_in_executor(executor, simular_lote, self.expressao.notacao, lote, random.getrandbits(63))
+            for lote in lotes
+        ]
+        tamanhos = dict(zip(self._futuros, lotes))
+
+        ultimo_aviso = time.monotonic()
+        pendentes = set(self._futuros)
+        try:
+            while pendentes and not self.resultado.cancelada:
+                prontos, pendentes = await asyncio.wait(pendentes, return_when=asyncio.FIRST_COMPLETED)
+                for futuro in prontos:
+                    if futuro.cancelled():
+                        continue
+                    try:
+                        self.resultado.acumular(tamanhos[futuro], *futuro.result())
+                    except BrokenProcessPool:
+                        # Um processo morreu; o próximo uso cria um pool novo
+                        shutdown()
+                        raise
+                if ao_progredir is not None and pendentes and time.monotonic() - ultimo_aviso >= intervalo:
+                    ultimo_aviso = time.monotonic()
+                    await ao_progredir(self.resultado)
+        except BaseException:
+            for futuro in pendentes:
+                futuro.cancel()
+            raise
+        return self.resultado
+
+async def calcular_distribuicao(notacao: str, alvo: Optional[int] = None) -> ResumoDistribuicao:
+    """
+    Resumo da distribuição exata de uma notação, calculado no pool de processos
+
+    As convoluções e o resumo são CPU puro: rodam fora do event loop e fora
+    do pool de E/S, para não atrasar as gravações de fichas.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor(), resumir_dados, notacao, alvo)
+    except BrokenProcessPool:
+        # Um processo morreu; o próximo uso cria um pool novo
+        shutdown()
+        raise
+
+def shutdown():
+    """Encerra o pool de simulação, descartando lotes que não começaram"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
@@ -1,34 +1,269 @@
+import atexit
 import json
 import os
-from typing import Dict, Any
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+from config.settings import FLUSH_RETRY_BACKOFF, FLUSH_RETRY_MAX
+from utils.aio import run_io
+
+class _CachedFile:
+    """Visão em memória de um arquivo JSON, compartilhada por todo o processo"""
+
+    def __init__(self):
+        self.data: Optional[Dict[str, Any]] = None
+        self.signature: Optional[Tuple[int, int]] = None
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        # Releituras causadas por alterações externas no arquivo
+        self.reloads = 0
+        # Falhas seguidas de gravação, para o backoff das novas tentativas
+        self.failures = 0
+        # Serializações feitas e a última já gravada, para que uma gravação
+        # atrasada nunca substitua no disco uma versão mais nova
+        self.snapshots = 0
+        self.committed = 0
+        self.dirty = False
+        self.timer: Optional[threading.Timer] = None
+        self.lock = threading.RLock()
+
+# Cache global indexado pelo caminho absoluto do arquivo
+_cache: Dict[str, _CachedFile] = {}
+_cache_lock = threading.Lock()
+
+def cache_stats() -> Dict[str, Dict[str, int]]:
+    """Retorna os contadores de acertos/falhas do cache para cada arquivo"""
+    return {
+        path: {"hits": entry.hits, "misses": entry.misses, "writes": entry.writes}
+        for path, entry in _cache.items()
+    }
+
+def file_signature(file_path: str) -> Optional[Tuple[int, int]]:
+    """Retorna (mtime, tamanho) de um arquivo ou diretório, ou None se ele não existir"""
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def _write_temp(file_path: str, content: str) -> str:
+    """Grava o conteúdo em um arquivo temporário ao lado do destino, com fsync"""
+    directory = os.path.dirname(file_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+    except:
+        _discard_temp(tmp_path)
+        raise
+    return tmp_path
+
+def _discard_temp(tmp_path: str):
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+
+def _commit_temp(tmp_path: str, file_path: str):
+    """Renomeia o temporário sobre o destino e garante que a renomeação chegou ao disco"""
+    try:
+        os.replace(tmp_path, file_path)
+    except:
+        _discard_temp(tmp_path)
+        raise
+
+    # Apenas POSIX
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(os.path.dirname(file_path) or '.', os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+def atomic_write_json(file_path: str, data: Any):
+    """
+    Grava o JSON em um arquivo temporário, faz fsync e o renomeia sobre o
+    destino, de forma que uma queda no meio da escrita nunca trunque o arquivo
+    """
+    _commit_temp(_write_temp(file_path, json.dumps(data, ensure_ascii=False, indent=4)), file_path)
+
+def flush_all():
+    """Grava imediatamente todos os arquivos com alterações pendentes"""
+    for path, entry in list(_cache.items()):
+        _flush_entry(path, entry)
+
+def _flush_entry(path: str, entry: _CachedFile, raise_errors: bool = False):
+    """
+    Grava o conteúdo em memória de uma entrada, se estiver sujo
+
+    O JSON é gerado sob entry.lock, que também é segurado por quem altera os
+    dados em cache (veja StorageManager.lock), de forma que o arquivo nunca
+    recebe uma alteração pela metade; só a escrita e o fsync ficam de fora.
+    """
+    with entry.lock:
+        if entry.timer is not None:
+            entry.timer.cancel()
+            entry.timer = None
+        if not entry.dirty:
+            return
+        try:
+            content = json.dumps(entry.data, ensure_ascii=False, indent=4)
+        except Exception as e:
+            _flush_failed(path, entry, e, raise_errors)
+            return
+        # Limpa a marca antes de gravar: um save() concorrente volta a marcá-la
+        entry.dirty = False
+        entry.snapshots += 1
+        snapshot = entry.snapshots
+
+    try:
+        tmp_path = _write_temp(path, content)
+    except Exception as e:
+        _flush_failed(path, entry, e, raise_errors)
+        return
+
+    with entry.lock:
+        if snapshot < entry.committed:
+            # Uma gravação concorrente, com dados mais novos, já terminou
+            _discard_temp(tmp_path)
+            return
+        try:
+            _commit_temp(tmp_path, path)
+        except Exception as e:
+            _flush_failed(path, entry, e, raise_errors)
+            return
+        entry.committed = snapshot
+        entry.failures = 0
+        entry.writes += 1
+        entry.signature = file_signature(path)
+
+def _flush_failed(path: str, entry: _CachedFile, error: Exception, raise_errors: bool):
+    """
+    Mantém os dados sujos após uma falha de gravação
+
+    Com raise_errors (save() síncrono), o erro sobe para quem salvou; na
+    gravação em segundo plano, uma nova tentativa é agendada, esperando mais
+    a cada falha seguida.
+    """
+    with entry.lock:
+        entry.dirty = True
+        if raise_errors:
+            raise error
+        entry.failures += 1
+        delay = min(FLUSH_RETRY_MAX, FLUSH_RETRY_BACKOFF * 2 ** (entry.failures - 1))
+        _schedule_flush(path, entry, delay)
+    print(f"Erro ao gravar {path} (tentativa {entry.failures}), nova tentativa em {delay:.1f}s: {error}")
+
+def _schedule_flush(path: str, entry: _CachedFile, interval: float):
+    """Agenda uma gravação em segundo plano, caso ainda não haja uma pendente"""
+    if entry.timer is not None:
+        return
+    entry.timer = threading.Timer(interval, _flush_entry, args=(path, entry))
+    entry.timer.daemon = True
+    entry.timer.start()
+
+# Garante a gravação final das alterações pendentes ao encerrar o processo
+atexit.register(flush_all)
 
 class StorageManager:
-    """Gerenciador de armazenamento para salvar e carregar dados do JSON"""
-    
-    def __init__(self, file_path: str):
+    """
+    Gerenciador de armazenamento para salvar e carregar dados do JSON
+
+    Com flush_interval > 0 o gerenciador opera em modo write-behind: save()
+    apenas atualiza a visão em memória e marca os dados como sujos, e uma
+    thread em segundo plano grava o arquivo no máximo uma vez por intervalo.
+    """
+
+    def __init__(self, file_path: str, flush_interval: float = 0):
         self.file_path = file_path
         self.directory = os.path.dirname(file_path)
+        self.flush_interval = flush_interval
+        self._path = os.path.abspath(file_path)
+        with _cache_lock:
+            self._entry = _cache.setdefault(self._path, _CachedFile())
 
     def _ensure_directory_exists(self):
         """Garante que o diretório do arquivo existe"""
         os.makedirs(self.directory, exist_ok=True)
 
+    @property
+    def lock(self) -> threading.RLock:
+        """
+        Lock dos dados em cache deste arquivo
+
+        Quem altera o dicionário devolvido por load() deve segurá-lo da
+        leitura até o save(), para que a gravação em segundo plano nunca
+        serialize uma alteração pela metade.
+        """
+        return self._entry.lock
+
+    @property
+    def reloads(self) -> int:
+        """Quantas vezes o arquivo já carregado foi relido por ter mudado em disco"""
+        return self._entry.reloads
+
     def load(self) -> Dict[str, Any]:
-        """Carrega os dados do arquivo JSON"""
+        """
+        Carrega os dados do arquivo JSON
+
+        O arquivo só é relido quando seu mtime ou tamanho mudam; caso
+        contrário é retornada a visão em cache, compartilhada entre todas as
+        instâncias. Alterações nela devem ser persistidas com save().
+        """
         self._ensure_directory_exists()
-        
-        if not os.path.exists(self.file_path):
-            return {}
-            
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
+
+        entry = self._entry
+        with entry.lock:
+            # Com alterações pendentes, a memória é a versão mais recente
+            if entry.dirty:
+                entry.hits += 1
+                return entry.data
+
+            signature = file_signature(self.file_path)
+            if entry.data is not None and entry.signature == signature:
+                entry.hits += 1
+                return entry.data
+
+            entry.misses += 1
+            if entry.data is not None:
+                entry.reloads += 1
+            data = {}
+            if signature is not None:
+                try:
+                    with open(self.file_path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except:
+                    data = {}
+
+            entry.data = data
+            entry.signature = signature
+            return data
 
     def save(self, data: Dict[str, Any]):
-        """Salva os dados no arquivo JSON"""
+        """Salva os dados no arquivo JSON (ou agenda a gravação) e atualiza o cache"""
         self._ensure_directory_exists()
-        
-        with open(self.file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=4) 
\ No newline at end of file
+
+        entry = self._entry
+        with entry.lock:
+            entry.data = data
+            entry.dirty = True
+            if self.flush_interval > 0:
+                _schedule_flush(self._path, entry, self.flush_interval)
+            else:
+                _flush_entry(self._path, entry, raise_errors=True)
+
+    async def aload(self) -> Dict[str, Any]:
+        """Versão assíncrona de load(), executada no pool de E/S"""
+        return await run_io(self.load)
+
+    async def asave(self, data: Dict[str, Any]):
+        """Versão assíncrona de save(), executada no pool de E/S"""
+        await run_io(self.save, data)
+
+    def flush(self):
+        """Grava imediatamente as alterações pendentes deste arquivo"""
+        _flush_entry(self._path, self._entry)
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from utils.storage import StorageManager
+
+def summary_row(data: Dict[str, Any], updated_at: Optional[str] = None) -> list:
+    """Linha da projeção: [nome, nivel, classe, updated_at]"""
+    return [
+        data["nome"],
+        data["nivel"],
+        data["classe"],
+        updated_at or datetime.now().isoformat(timespec='seconds'),
+    ]
+
+class SummaryProjection:
+    """
+    Projeção compacta das fichas, mantida em um arquivo JSON próprio
+
+    Guarda, para cada (user_id, chave), apenas nome, nivel, classe e o
+    horário da última alteração, no formato
+    {"backend": tipo, "origem": assinatura, "fichas": {user_id: {chave: [nome, nivel, classe, updated_at]}}}.
+    O mecanismo de armazenamento a atualiza a cada alteração, e as listagens
+    e o autocomplete leem só ela, sem carregar as fichas completas.
+
+    A origem é a assinatura das fichas em disco (signature()), gravada por
+    seal() no encerramento normal e apagada a cada alteração. No primeiro uso
+    (leitura ou alteração), a projeção é reconstruída a partir de source() se
+    o arquivo não existir, tiver sido gerado por outro mecanismo ou se a
+    origem não bater com as fichas atuais (queda antes de gravar tudo ou
+    edição externa com o bot parado). Com o bot rodando, a projeção também é
+    reconstruída quando reloads() muda, ou seja, quando o arquivo de fichas
+    foi editado por fora e relido.
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        kind: str,
+        source: Callable[[], Iterator[Tuple[str, str, Dict[str, Any]]]],
+        flush_interval: float = 0,
+        signature: Optional[Callable[[], Any]] = None,
+        reloads: Optional[Callable[[], int]] = None
+    ):
+        self.storage = StorageManager(file_path, flush_interval=flush_interval)
+        self.kind = kind
+        self.source = source
+        self.signature = signature
+        self.reloads = reloads
+        self._built = False
+        self._reloads = None
+        self._lock = threading.RLock()
+
+    def _origem(self) -> Any:
+        """Assinatura atual das fichas, no formato gravado no JSON"""
+        if self.signature is None:
+            return None
+        # Passa pelo JSON para comparar tuplas com as listas lidas do arquivo
+        return json.loads(json.dumps(self.signature()))
+
+    def _documento(self) -> Dict[str, Any]:
+        """Documento atual da projeção, reconstruindo-a se necessário"""
+        with self._lock:
+            if not self._built:
+                documento = self.storage.load()
+                if (
+                    not os.path.exists(self.storage.file_path)
+                    or documento.get("backend") != self.kind
+                    or not isinstance(documento.get("fichas"), dict)
+                    or documento.get("origem") != self._origem()
+                ):
+                    self.rebuild()
+                else:
+                    self._built = True
+                    self._reloads = self.reloads() if self.reloads else None
+            elif self.reloads is not None and self.reloads() != self._reloads:
+                # As fichas foram editadas por fora e relidas
+                self.rebuild()
+            return self.storage.load()
+
+    def rebuild(self):
+        """Recria a projeção percorrendo todas as fichas"""
+        with self._lock:
+            fichas: Dict[str, Dict[str, list]] = {}
+            for user_id, key, data in self.source():
+                fichas.setdefault(user_id, {})[key] = summary_row(data)
+            self.storage.save({"backend": self.kind, "origem": None, "fichas": fichas})
+            self.storage.flush()
+            self._built = True
+            self._reloads = self.reloads() if self.reloads else None
+
+    def seal(self):
+        """
+        Grava a assinatura das fichas atuais como origem da projeção
+
+        Deve ser chamado com as fichas já gravadas em disco, no encerramento.
+        """
+        with self._lock:
+            documento = self._documento()
+            origem = self._origem()
+            with self.storage.lock:
+                documento["origem"] = origem
+                self.storage.save(documento)
+            self.storage.flush()
+
+    def put(self, user_id: str, key: str, data: Dict[str, Any], updated_at: Optional[str] = None):
+        """Cria ou atualiza o resumo de uma ficha"""
+        with self._lock:
+            documento = self._documento()
+            with self.storage.lock:
+                documento["fichas"].setdefault(user_id, {})[key] = summary_row(data, updated_at)
+                documento["origem"] = None
+                self.storage.save(documento)
+
+    def remove(self, user_id: str, key: str):
+        """Remove o resumo de uma ficha, se existir"""
+        with self._lock:
+            documento = self._documento()
+            with self.storage.lock:
+                user_fichas = documento["fichas"].get(user_id)
+                if user_fichas is None or user_fichas.pop(key, None) is None:
+                    return
+                if not user_fichas:
+                    del documento["fichas"][user_id]
+                documento["origem"] = None
+                self.storage.save(documento)
+
+    def iter_summaries(self) -> Iterator[Dict[str, Any]]:
+        """Percorre os resumos de todas as fichas"""
+        with self._lock:
+            linhas = [
+                (user_id, key, row)
+                for user_id, user_fichas in self._documento()["fichas"].items()
+                for key, row in user_fichas.items()
+            ]
+        for user_id, key, (nome, nivel, classe, updated_at) in linhas:
+            yield {
+                "user_id": user_id,
+                "key": key,
+                "nome": nome,
+                "nivel": nivel,
+                "classe": classe,
+                "updated_at": updated_at,
+            }
+
+    def flush(self):
+        self.storage.flush()
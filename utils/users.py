@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import discord
+
+from config.settings import USER_CACHE_TTL, USER_FETCH_CONCURRENCY
+
+class UserNameResolver:
+    """
+    Resolve IDs de usuários do Discord em nomes, com cache e em lote
+
+    Consulta primeiro o cache do gateway (bot.get_user), depois um LRU
+    próprio com validade de ttl segundos e, só então, a API REST. IDs
+    repetidos são resolvidos uma única vez, inclusive entre chamadas
+    simultâneas, e as buscas na API rodam em paralelo, limitadas por um
+    semáforo para não esbarrar no rate limit.
+    """
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        ttl: float = USER_CACHE_TTL,
+        max_entries: int = 4096,
+        concurrency: int = USER_FETCH_CONCURRENCY
+    ):
+        self.bot = bot
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._names: "OrderedDict[int, Tuple[str, float]]" = OrderedDict()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self.gateway_hits = 0
+        self.hits = 0
+        self.fetches = 0
+        self.failures = 0
+
+    def _cached(self, user_id: int) -> Optional[str]:
+        user = self.bot.get_user(user_id)
+        if user is not None:
+            self.gateway_hits += 1
+            return user.name
+
+        entry = self._names.get(user_id)
+        if entry is not None:
+            name, expires = entry
+            if expires > time.monotonic():
+                self._names.move_to_end(user_id)
+                self.hits += 1
+                return name
+            del self._names[user_id]
+        return None
+
+    def _store(self, user_id: int, name: str):
+        self._names[user_id] = (name, time.monotonic() + self.ttl)
+        self._names.move_to_end(user_id)
+        while len(self._names) > self.max_entries:
+            self._names.popitem(last=False)
+
+    async def _fetch(self, user_id: int) -> Optional[str]:
+        async with self._semaphore:
+            self.fetches += 1
+            try:
+                user = await self.bot.fetch_user(user_id)
+            except discord.HTTPException as e:
+                self.failures += 1
+                print(f"Erro ao buscar usuário {user_id}: {e}")
+                return None
+        self._store(user_id, user.name)
+        return user.name
+
+    async def resolve(self, user_id: Any) -> Optional[str]:
+        """Nome do usuário, ou None se ele não puder ser encontrado"""
+        user_id = int(user_id)
+        name = self._cached(user_id)
+        if name is not None:
+            return name
+
+        # Reaproveita uma busca já em andamento para o mesmo ID
+        pending = self._pending.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        pending = self._pending[user_id] = asyncio.ensure_future(self._fetch(user_id))
+        pending.add_done_callback(lambda _: self._pending.pop(user_id, None))
+        return await asyncio.shield(pending)
+
+    async def resolve_many(self, user_ids: Iterable[Any]) -> Dict[str, Optional[str]]:
+        """Resolve vários IDs de uma vez; a chave do resultado é o ID como string"""
+        unique = list(dict.fromkeys(str(user_id) for user_id in user_ids))
+        names = await asyncio.gather(*(self.resolve(user_id) for user_id in unique))
+        return dict(zip(unique, names))
+
+    def stats(self) -> Dict[str, Any]:
+        """Contadores de uso do cache"""
+        lookups = self.gateway_hits + self.hits + self.fetches
+        return {
+            "entries": len(self._names),
+            "gateway_hits": self.gateway_hits,
+            "hits": self.hits,
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "hit_rate": (self.gateway_hits + self.hits) / lookups if lookups else 0.0,
+        }